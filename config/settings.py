@@ -30,6 +30,9 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# The toolbar slows every request down, DEBUG_TOOLBAR=0 turns it off
+DEBUG_TOOLBAR = DEBUG and os.getenv("DEBUG_TOOLBAR", "1") == "1"
+
 ALLOWED_HOSTS = []
 
 # Application definition
@@ -41,9 +44,9 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # 3rd apps
     "rest_framework",
-    "debug_toolbar",
     "drf_spectacular",
     # project apps
     "planetarium",
@@ -51,9 +54,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "planetarium.timing.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -61,6 +64,10 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(3, "debug_toolbar.middleware.DebugToolbarMiddleware")
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -84,6 +91,15 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Connections are pooled per process (psycopg 3 pool), checked on checkout.
+# Set POSTGRES_POOL=0 to open a new connection for every request instead
+
+DATABASE_POOL = os.getenv("POSTGRES_POOL", "1") == "1" and {
+    "min_size": int(os.getenv("POSTGRES_POOL_MIN_SIZE", 2)),
+    "max_size": int(os.getenv("POSTGRES_POOL_MAX_SIZE", 10)),
+    "timeout": float(os.getenv("POSTGRES_POOL_TIMEOUT", 10)),
+}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -92,9 +108,42 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("POSTGRES_HOST"),
         "PORT": os.getenv("POSTGRES_PORT"),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"pool": DATABASE_POOL},
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Set CACHE_BACKEND/CACHE_LOCATION to a shared backend (e.g. Redis) in production
+
+CACHES = {
+    # Also holds the JWT users (user.authentication), user.W001 warns when
+    # it is per process outside DEBUG
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    },
+    "catalog": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "catalog"),
+        "KEY_PREFIX": "planetarium",
+    },
+    # Must be shared by all workers (CACHE_BACKEND) for limits to be global,
+    # planetarium.W001 warns when it is not outside DEBUG
+    "throttle": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "throttle"),
+        "KEY_PREFIX": "planetarium",
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -147,16 +196,53 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "planetarium.permissions.IsAdminOrIfAuthenticatedReadOnly"
     ],
-    "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication"
-    ],
+    "DEFAULT_AUTHENTICATION_CLASSES": ["user.authentication.CachedJWTAuthentication"],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "planetarium.throttling.AnonSlidingWindowThrottle",
+        "planetarium.throttling.UserSlidingWindowThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "10/day", "user": "100/day"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "10/day",
+        "user": "100/day",
+        "catalog": "1000/day",
+        "booking": "30/hour",
+    },
+}
+
+# Per request timing lines of planetarium.timing.ServerTimingMiddleware
+# are logged at INFO, set REQUEST_TIMING_LOG_LEVEL=INFO to see them
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "planetarium.timing": {
+            "handlers": ["console"],
+            "level": os.getenv("REQUEST_TIMING_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+    },
 }
 
+# List actions build their output from values() rows instead of model
+# instances and serializer fields, see planetarium.fast_serializers
+FAST_LIST_SERIALIZERS = os.getenv("FAST_LIST_SERIALIZERS", "0") == "1"
+
+# Seconds a JWT user row is served from the cache instead of the database
+JWT_USER_CACHE_TIMEOUT = 60
+
+# How long selected seats stay held before a reservation must be made
+SEAT_HOLD_MINUTES = 10
+
+# Most seats one request can hold, and one user can hold in a show session
+SEAT_HOLD_MAX_PER_REQUEST = 10
+SEAT_HOLD_MAX_PER_SESSION = 10
+
+# Days after their show time when sessions and their tickets are moved to
+# the archive tables by the archive_sessions command
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Planetarium API",
     "DESCRIPTION": "Order tickets for astronomy shows",
@@ -1,9 +1,12 @@
 from django.contrib import admin
 
 from planetarium.models import (
+    ArchivedShowSession,
+    ArchivedTicket,
     AstronomyShow,
     Reservation,
     PlanetariumDome,
+    SeatHold,
     ShowSession,
     ShowTheme,
     Ticket,
@@ -25,3 +28,6 @@ admin.site.register(PlanetariumDome)
 admin.site.register(AstronomyShow)
 admin.site.register(ShowTheme)
 admin.site.register(Ticket)
+admin.site.register(SeatHold)
+admin.site.register(ArchivedShowSession)
+admin.site.register(ArchivedTicket)
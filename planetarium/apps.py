@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class PlanetariumConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "planetarium"
+
+    def ready(self):
+        import planetarium.signals  # noqa: F401
+        import planetarium.throttling  # noqa: F401
+        from planetarium.timing import install_instrumentation
+
+        install_instrumentation()
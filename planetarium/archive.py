@@ -0,0 +1,114 @@
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from planetarium.bulk import column_names
+from planetarium.models import (
+    ArchivedShowSession,
+    ArchivedTicket,
+    SeatHold,
+    ShowSession,
+    Ticket,
+)
+
+
+def archive_horizon(days: int | None = None) -> datetime:
+    """Sessions shown before this are archived"""
+    if days is None:
+        days = settings.ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def in_ids(column: str, ids: list) -> str:
+    return f"{connection.ops.quote_name(column)} IN ({', '.join(['%s'] * len(ids))})"
+
+
+def insert_selected(cursor, source, target, column, ids, **values) -> None:
+    """INSERT ... SELECT the rows of source with column in ids into target
+
+    Columns of target are read from the source columns of the same name,
+    except for those given in values.
+    """
+    fields = [
+        field for field in target._meta.concrete_fields if field.name not in values
+    ]
+    value_fields = [target._meta.get_field(name) for name in values]
+    selected = [column_names([source._meta.get_field(field.name) for field in fields])]
+
+    cursor.execute(
+        f"INSERT INTO {connection.ops.quote_name(target._meta.db_table)} "
+        f"({column_names(fields + value_fields)}) "
+        f"SELECT {', '.join(selected + ['%s'] * len(values))} "
+        f"FROM {connection.ops.quote_name(source._meta.db_table)} "
+        f"WHERE {in_ids(column, ids)}",
+        [
+            field.get_db_prep_save(value, connection)
+            for field, value in zip(value_fields, values.values())
+        ]
+        + ids,
+    )
+
+
+def delete_selected(cursor, model, column, ids) -> int:
+    cursor.execute(
+        f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)} "
+        f"WHERE {in_ids(column, ids)}",
+        ids,
+    )
+    return cursor.rowcount
+
+
+def archive_show_sessions(session_ids) -> int:
+    """Move show sessions and their tickets into the archive tables
+
+    Rows are moved with INSERT ... SELECT and DELETE, without Ticket signals,
+    so the seat maps of the moved sessions are not rewritten on their way
+    out. Seat holds of the sessions are dropped. Returns the moved tickets.
+    """
+    session_ids = list(session_ids)
+    if not session_ids:
+        return 0
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        SeatHold.objects.filter(show_session_id__in=session_ids).delete()
+        insert_selected(
+            cursor,
+            ShowSession,
+            ArchivedShowSession,
+            "id",
+            session_ids,
+            archived_at=timezone.now(),
+        )
+        insert_selected(cursor, Ticket, ArchivedTicket, "show_session_id", session_ids)
+        tickets = delete_selected(cursor, Ticket, "show_session_id", session_ids)
+        delete_selected(cursor, ShowSession, "id", session_ids)
+    return tickets
+
+
+def archive_before(horizon: datetime, batch_size: int = 100, pause: float = 0):
+    """Archive sessions shown before horizon, batch_size sessions per transaction
+
+    Sessions locked by a booking are skipped and left for the next run.
+    Yields (sessions, tickets, milliseconds) per batch.
+    """
+    sessions = ShowSession.objects.filter(show_time__lt=horizon).order_by(
+        "show_time", "id"
+    )
+    while True:
+        start = time.perf_counter()
+        with transaction.atomic():
+            session_ids = list(
+                sessions.select_for_update(skip_locked=True).values_list(
+                    "id", flat=True
+                )[:batch_size]
+            )
+            if not session_ids:
+                return
+            tickets = archive_show_sessions(session_ids)
+
+        yield len(session_ids), tickets, (time.perf_counter() - start) * 1000
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,101 @@
+import csv
+import io
+
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connection, connections, models
+from django.utils import timezone
+
+
+def insert_fields(model, objects) -> list:
+    # Rows without pk (m2m through rows) take it from the sequence
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if not (field.primary_key and objects[0].pk is None)
+    ]
+
+
+def db_rows(fields, objects):
+    # Stored as is: bulk_create would overwrite auto_now_add fields.
+    # The real connection is bound once, the proxy costs a lookup per access
+    db_connection = connections[DEFAULT_DB_ALIAS]
+    # Unset auto_now fields get the time of the insert
+    now = timezone.now()
+    preparers = [
+        (
+            field.attname,
+            field.get_db_prep_save,
+            now if getattr(field, "auto_now", False) else None,
+        )
+        for field in fields
+    ]
+    for obj in objects:
+        yield [
+            prepare(
+                default if (value := getattr(obj, attname)) is None else value,
+                db_connection,
+            )
+            for attname, prepare, default in preparers
+        ]
+
+
+def copy_rows(model, objects) -> None:
+    """Insert objects with PostgreSQL COPY FROM STDIN"""
+    fields = insert_fields(model, objects)
+    data = io.StringIO()
+    writer = csv.writer(data)
+    binary = {
+        index
+        for index, field in enumerate(fields)
+        if isinstance(field, models.BinaryField)
+    }
+    for obj, values in zip(objects, db_rows(fields, objects)):
+        for index, value in enumerate(values):
+            if value is None:
+                values[index] = r"\N"
+            elif index in binary:
+                values[index] = "\\x" + bytes(getattr(obj, fields[index].attname)).hex()
+        writer.writerow(values)
+    data.seek(0)
+
+    sql = (
+        f"COPY {connection.ops.quote_name(model._meta.db_table)} "
+        f"({column_names(fields)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    )
+    with connection.cursor() as cursor, connection.wrap_database_errors:
+        if hasattr(cursor.cursor, "copy_expert"):
+            # psycopg2
+            cursor.cursor.copy_expert(sql, data)
+        else:
+            with cursor.cursor.copy(sql) as copy:
+                copy.write(data.getvalue())
+
+
+def insert_rows(model, objects) -> None:
+    """Insert objects with one executemany() for databases without COPY"""
+    fields = insert_fields(model, objects)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {connection.ops.quote_name(model._meta.db_table)} "
+            f"({column_names(fields)}) VALUES ({', '.join(['%s'] * len(fields))})",
+            list(db_rows(fields, objects)),
+        )
+
+
+def column_names(fields) -> str:
+    return ", ".join(connection.ops.quote_name(field.column) for field in fields)
+
+
+def bulk_insert(model, objects) -> None:
+    """Insert objects with their field values as is, without signals"""
+    if connection.vendor == "postgresql":
+        copy_rows(model, objects)
+    else:
+        insert_rows(model, objects)
+
+
+def reset_sequences(models_to_reset) -> None:
+    """Move pk sequences past explicitly inserted ids"""
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models_to_reset):
+            cursor.execute(sql)
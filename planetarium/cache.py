@@ -0,0 +1,51 @@
+import time
+
+from django.core.cache import caches
+
+CATALOG_CACHE_ALIAS = "catalog"
+CATALOG_CACHE_TIMEOUT = 60 * 10
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_HITS_KEY = "catalog:hits"
+CATALOG_MISSES_KEY = "catalog:misses"
+
+
+def catalog_cache():
+    return caches[CATALOG_CACHE_ALIAS]
+
+
+def new_catalog_version() -> int:
+    # Starts from the clock rather than 1, so the versions (and the ETags
+    # derived from them) are not reused after the cache is cleared
+    return time.time_ns()
+
+
+def get_catalog_version() -> int:
+    cache = catalog_cache()
+    cache.add(CATALOG_VERSION_KEY, new_catalog_version(), timeout=None)
+    return cache.get(CATALOG_VERSION_KEY) or new_catalog_version()
+
+
+def invalidate_catalog() -> None:
+    """Move every cached catalog response to a stale version"""
+    cache = catalog_cache()
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, new_catalog_version(), timeout=None)
+
+
+def count_catalog_lookup(hit: bool) -> None:
+    cache = catalog_cache()
+    key = CATALOG_HITS_KEY if hit else CATALOG_MISSES_KEY
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_catalog_cache_stats() -> dict:
+    stats = catalog_cache().get_many([CATALOG_HITS_KEY, CATALOG_MISSES_KEY])
+    return {
+        "hits": stats.get(CATALOG_HITS_KEY, 0),
+        "misses": stats.get(CATALOG_MISSES_KEY, 0),
+    }
@@ -0,0 +1,26 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class SeatConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the requested seats are not available."
+    default_code = "seat_conflict"
+
+    def __init__(self, seats: list[tuple[int, int, int]]):
+        super().__init__()
+        self.detail = {
+            "detail": self.default_detail,
+            "seats": [
+                {"show_session": session_id, "row": row, "seat": seat}
+                for session_id, row, seat in seats
+            ],
+        }
+
+
+class SeatsNotTogether(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_code = "seats_not_together"
+
+    def __init__(self, count: int):
+        super().__init__(f"No {count} free seats together in a row.")
@@ -0,0 +1,65 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from planetarium.models import Ticket
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+EXPORT_FIELDS = {
+    "reservation_id": "reservation_id",
+    "reservation_created_at": "reservation__created_at",
+    "user_email": "reservation__user__email",
+    "ticket_id": "id",
+    "row": "row",
+    "seat": "seat",
+    "show_session_id": "show_session_id",
+    "show_time": "show_session__show_time",
+    "astronomy_show": "show_session__astronomy_show__title",
+    "planetarium_dome": "show_session__planetarium_dome__name",
+}
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object for csv.writer that returns the line instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def get_export_rows(created_from=None, created_to=None, show_session_ids=None):
+    """One tuple per ticket, streamed from a server-side cursor"""
+    tickets = Ticket.objects.order_by("reservation_id", "id")
+
+    if created_from:
+        tickets = tickets.filter(reservation__created_at__gte=created_from)
+    if created_to:
+        tickets = tickets.filter(reservation__created_at__lt=created_to)
+    if show_session_ids:
+        tickets = tickets.filter(show_session_id__in=show_session_ids)
+
+    return tickets.values_list(*EXPORT_FIELDS.values()).iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    )
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(EXPORT_FIELDS, row))) + "\n"
+
+
+def stream_export(export_format: str, rows):
+    if export_format == "csv":
+        return stream_csv(rows)
+    return stream_ndjson(rows)
@@ -0,0 +1,166 @@
+from collections import defaultdict
+from functools import cache
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# Fields whose to_representation() returns database values of their type as is
+PLAIN_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.SlugRelatedField,
+)
+
+
+def relation_lookup(field) -> str:
+    lookup = list(field.source_attrs)
+    if isinstance(field, serializers.SlugRelatedField):
+        lookup += field.slug_field.replace("__", ".").split(".")
+    return "__".join(lookup)
+
+
+def is_iso_datetime(field) -> bool:
+    return (
+        type(field) is serializers.DateTimeField
+        and settings.USE_TZ
+        and not hasattr(field, "timezone")
+        and getattr(field, "format", api_settings.DATETIME_FORMAT).lower() == ISO_8601
+    )
+
+
+def value_getter(key: str, field, current_timezone):
+    get = itemgetter(key)
+    if type(field) in PLAIN_FIELDS:
+        return get
+
+    convert = field.to_representation
+
+    if is_iso_datetime(field):
+        # DateTimeField.to_representation() looks the timezone up per value
+        def get_datetime(row):
+            value = get(row)
+            if value is None or value.tzinfo is None:
+                return value and convert(value)
+            value = value.astimezone(current_timezone).isoformat()
+            return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+        return get_datetime
+
+    def get_value(row):
+        value = get(row)
+        return None if value is None else convert(value)
+
+    return get_value
+
+
+class FastSerializer:
+    """Output of a ModelSerializer built from queryset.values() rows
+
+    Fields are compiled once into values() lookups: model fields and forward
+    relations are read from the row, to-many relations (slugs or nested
+    serializers) with one extra query per page, like prefetch_related().
+    Related rows come in primary key order unless their model defines an
+    ordering.
+    """
+
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        self.model = serializer.Meta.model
+        self.pk = self.model._meta.pk.attname
+        self.lookups = [self.pk]
+        # (output name, values() key, serializer field), key None for relations
+        self.fields = []
+        # (output name, related model, lookup back to this model, slug or serializer)
+        self.relations = []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(
+                field, (serializers.ManyRelatedField, serializers.ListSerializer)
+            ):
+                self.relations.append((name, *self.compile_relation(field)))
+                self.fields.append((name, None, field))
+                continue
+
+            if isinstance(field, serializers.RelatedField):
+                key = relation_lookup(field)
+            elif (
+                isinstance(
+                    field,
+                    (serializers.BaseSerializer, serializers.SerializerMethodField),
+                )
+                or field.source == "*"
+            ):
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{name} has no fast path"
+                )
+            else:
+                key = "__".join(field.source_attrs)
+
+            if key not in self.lookups:
+                self.lookups.append(key)
+            self.fields.append((name, key, field))
+
+    def compile_relation(self, field) -> tuple:
+        model_field = self.model._meta.get_field(field.source)
+        if model_field.many_to_many and not model_field.auto_created:
+            link = model_field.related_query_name()
+        elif model_field.one_to_many:
+            link = model_field.field.name
+        else:
+            raise ImproperlyConfigured(f"{field.source} is not a to-many relation")
+
+        if isinstance(field, serializers.ListSerializer):
+            related = fast_serializer(type(field.child))
+        else:
+            related = "__".join(field.child_relation.slug_field.split("."))
+        return model_field.related_model, link, related
+
+    def rows(self, queryset):
+        return queryset.prefetch_related(None).values(*self.lookups)
+
+    @staticmethod
+    def related_values(related_model, link, related, parent_ids) -> dict:
+        queryset = related_model._default_manager.filter(**{f"{link}__in": parent_ids})
+        if not related_model._meta.ordering:
+            # Grouped by parent first, so the index of the relation is used
+            queryset = queryset.order_by(f"{link}__pk", "pk")
+
+        grouped = defaultdict(list)
+        if isinstance(related, FastSerializer):
+            rows = list(queryset.values(link, *related.lookups))
+            for row, item in zip(rows, related.to_representation(rows)):
+                grouped[row[link]].append(item)
+        else:
+            for parent_id, value in queryset.values_list(link, related):
+                grouped[parent_id].append(value)
+        return grouped
+
+    def to_representation(self, rows) -> list[dict]:
+        rows = list(rows)
+        current_timezone = timezone.get_current_timezone()
+        getters = {
+            name: key and value_getter(key, field, current_timezone)
+            for name, key, field in self.fields
+        }
+        if self.relations and rows:
+            parent_ids = [row[self.pk] for row in rows]
+            pk = itemgetter(self.pk)
+            for name, related_model, link, related in self.relations:
+                grouped = self.related_values(related_model, link, related, parent_ids)
+                getters[name] = lambda row, grouped=grouped: grouped.get(pk(row), [])
+
+        getters = list(getters.items())
+        return [{name: get(row) for name, get in getters} for row in rows]
+
+
+@cache
+def fast_serializer(serializer_class) -> FastSerializer:
+    return FastSerializer(serializer_class)
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from planetarium.archive import archive_before, archive_horizon
+
+
+class Command(BaseCommand):
+    help = (
+        "Move show sessions older than --days (ARCHIVE_AFTER_DAYS by default) "
+        "and their tickets to the archive tables, --batch-size sessions per "
+        "transaction so no lock is held for long"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None)
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--pause", type=float, default=0.0)
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+        days = options["days"]
+        if days is None:
+            days = settings.ARCHIVE_AFTER_DAYS
+        # A horizon of now or later would archive sessions still to be shown
+        if days < 1:
+            raise CommandError("--days (or ARCHIVE_AFTER_DAYS) must be positive")
+
+        horizon = archive_horizon(days)
+        sessions = tickets = batches = 0
+        longest_ms = 0.0
+        for batch_sessions, batch_tickets, elapsed_ms in archive_before(
+            horizon, options["batch_size"], options["pause"]
+        ):
+            sessions += batch_sessions
+            tickets += batch_tickets
+            batches += 1
+            longest_ms = max(longest_ms, elapsed_ms)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{sessions} show sessions and {tickets} tickets before "
+                f"{horizon:%Y-%m-%d %H:%M} archived in {batches} batches "
+                f"(longest {longest_ms:.1f} ms)"
+            )
+        )
@@ -0,0 +1,207 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from planetarium.archive import archive_before, archive_horizon
+from planetarium.models import (
+    ArchivedShowSession,
+    ArchivedTicket,
+    Reservation,
+    ShowSession,
+    Ticket,
+)
+
+COUNTED_MODELS = (ShowSession, Ticket, Reservation, ArchivedShowSession, ArchivedTicket)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a multi-year history of show sessions, time the hot "
+        "endpoints, archive sessions older than --days and time them again. "
+        "All data is rolled back. On PostgreSQL the moved rows stay as dead "
+        "tuples until the transaction ends, so scans walking them are slower "
+        "here than after a committed run and VACUUM."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--years", type=int, default=3)
+        parser.add_argument("--sessions", type=int, default=4000)
+        parser.add_argument("--domes", type=int, default=10)
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--fill", type=float, default=0.5)
+        parser.add_argument("--upcoming-days", type=int, default=60)
+        parser.add_argument("--days", type=int, default=90)
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--repeats", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def generate(self, options) -> None:
+        days = options["years"] * 365
+        call_command(
+            "generate_data",
+            domes=options["domes"],
+            shows=options["sessions"] // options["domes"] + 1,
+            sessions=options["sessions"],
+            days=days,
+            start=str(
+                timezone.localdate() - timedelta(days - options["upcoming_days"])
+            ),
+            users=options["users"],
+            fill=options["fill"],
+            seed=options["seed"],
+            stdout=StringIO(),
+        )
+
+    @staticmethod
+    def table_rows() -> dict:
+        return {model.__name__: model.objects.count() for model in COUNTED_MODELS}
+
+    @staticmethod
+    def measure(client, method, url, payload, repeats) -> dict:
+        timings = []
+        for _ in range(repeats):
+            savepoint = transaction.savepoint()
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = getattr(client, method)(url, payload, format="json")
+                timings.append((time.perf_counter() - start) * 1000)
+            transaction.savepoint_rollback(savepoint)
+
+        return {
+            "status": response.status_code,
+            "queries": len(context.captured_queries),
+            "median_ms": round(statistics.median(timings), 3),
+        }
+
+    def hot_endpoints(self, user) -> list[tuple]:
+        now = timezone.now()
+        upcoming = ShowSession.objects.filter(show_time__gt=now)
+        window = {"from": now.isoformat(), "to": (now + timedelta(days=1)).isoformat()}
+        return [
+            ("GET session list", "get", reverse("planetarium:showsession-list"), None),
+            (
+                "GET upcoming session list",
+                "get",
+                reverse("planetarium:showsession-list"),
+                {"from": window["from"]},
+            ),
+            (
+                "GET availability for a day",
+                "get",
+                reverse("planetarium:showsession-availability"),
+                window,
+            ),
+            (
+                "GET reservation list",
+                "get",
+                reverse("planetarium:reservation-list"),
+                None,
+            ),
+            (
+                "POST reservation",
+                "post",
+                reverse("planetarium:reservation-list"),
+                {
+                    "best_available": {
+                        "show_session": upcoming.order_by("tickets_sold").first().id,
+                        "count": 2,
+                    }
+                },
+            ),
+        ]
+
+    def time_endpoints(self, client, endpoints, repeats) -> dict:
+        return {
+            name: self.measure(client, method, url, payload, repeats)
+            for name, method, url, payload in endpoints
+        }
+
+    def handle(self, *args, **options):
+        repeats = options["repeats"]
+
+        # Throttles would reject repeated requests long before the run ends
+        with override_settings(
+            DEBUG=False, ALLOWED_HOSTS=["testserver"]
+        ), mock.patch.object(
+            APIView, "get_throttles", return_value=[]
+        ), transaction.atomic():
+            start = time.perf_counter()
+            self.generate(options)
+            generate_s = time.perf_counter() - start
+
+            # The user with the longest history
+            user = get_user_model().objects.get(
+                id=Reservation.objects.values("user")
+                .annotate(count=Count("id"))
+                .order_by("-count")
+                .values("user")[:1]
+            )
+            client = APIClient()
+            client.force_authenticate(user=user)
+            endpoints = self.hot_endpoints(user)
+
+            before_rows = self.table_rows()
+            before = self.time_endpoints(client, endpoints, repeats)
+
+            start = time.perf_counter()
+            batches = list(
+                archive_before(archive_horizon(options["days"]), options["batch_size"])
+            )
+            archive_s = time.perf_counter() - start
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    for model in COUNTED_MODELS:
+                        cursor.execute(
+                            f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}"
+                        )
+
+            after_rows = self.table_rows()
+            after = self.time_endpoints(client, endpoints, repeats)
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            json.dumps(
+                {
+                    "generate_s": round(generate_s, 2),
+                    "rows_before": before_rows,
+                    "rows_after": after_rows,
+                    "archive": {
+                        "batches": len(batches),
+                        "sessions": sum(batch[0] for batch in batches),
+                        "tickets": sum(batch[1] for batch in batches),
+                        "total_s": round(archive_s, 2),
+                        "longest_batch_ms": round(
+                            max((batch[2] for batch in batches), default=0), 1
+                        ),
+                    },
+                    "endpoints": [
+                        {
+                            "endpoint": name,
+                            "before": before[name],
+                            "after": after[name],
+                            "speedup": round(
+                                before[name]["median_ms"] / after[name]["median_ms"], 2
+                            ),
+                        }
+                        for name in before
+                    ],
+                },
+                indent=2,
+            )
+        )
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import statistics
+import time
+from threading import Barrier, Thread
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium.models import AstronomyShow, PlanetariumDome, ShowSession
+
+# (name, sync url name, async url name, model whose first id is the url arg)
+ENDPOINTS = [
+    ("session list", "showsession-list", "async-showsession-list", None),
+    ("session detail", "showsession-detail", "async-showsession-detail", ShowSession),
+    ("show list", "astronomyshow-list", "async-astronomyshow-list", None),
+    (
+        "show detail",
+        "astronomyshow-detail",
+        "async-astronomyshow-detail",
+        AstronomyShow,
+    ),
+    ("dome list", "planetariumdome-list", "async-planetariumdome-list", None),
+]
+
+
+def summarize(timings: list[float], elapsed: float, statuses: list[int]) -> dict:
+    timings = sorted(timings)
+    return {
+        "requests_per_second": round(len(timings) / elapsed, 1),
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+        "errors": sum(status >= 400 for status in statuses),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests/second of the sync read endpoints served by the WSGI "
+        "handler from a pool of threads with their async twins served by the "
+        "ASGI handler from one event loop, at the same concurrency. "
+        "Reads existing data, run generate_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--output", type=str, default="")
+
+    @staticmethod
+    def run_wsgi(url, headers, concurrency, requests_count):
+        timings = []
+        statuses = []
+        barrier = Barrier(concurrency + 1)
+
+        def worker(count):
+            client = Client()
+            barrier.wait()
+            try:
+                for _ in range(count):
+                    start = time.perf_counter()
+                    statuses.append(client.get(url, headers=headers).status_code)
+                    timings.append((time.perf_counter() - start) * 1000)
+            finally:
+                connection.close()
+
+        threads = [
+            Thread(
+                target=worker, args=(len(range(index, requests_count, concurrency)),)
+            )
+            for index in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        return summarize(timings, time.perf_counter() - start, statuses)
+
+    @staticmethod
+    async def run_asgi(url, headers, concurrency, requests_count):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+        timings = []
+
+        async def request():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                timings.append((time.perf_counter() - start) * 1000)
+                return response.status_code
+
+        start = time.perf_counter()
+        statuses = await asyncio.gather(*(request() for _ in range(requests_count)))
+        elapsed = time.perf_counter() - start
+        # The async ORM ran in a worker thread with its own connection
+        await sync_to_async(connections.close_all)()
+        return summarize(timings, elapsed, statuses)
+
+    def handle(self, *args, **options):
+        objects = {
+            model: model.objects.order_by("id").first()
+            for model in (ShowSession, AstronomyShow, PlanetariumDome)
+        }
+        if None in objects.values():
+            raise CommandError("No data to read, run generate_data first")
+
+        user = get_user_model().objects.create_user(
+            email=f"asgi-benchmark-{time.time_ns()}@planetarium.test"
+        )
+        headers = {"authorization": f"Bearer {AccessToken.for_user(user)}"}
+        concurrency = options["concurrency"]
+        requests_count = options["requests"]
+
+        results = []
+        try:
+            with override_settings(
+                DEBUG=False, ALLOWED_HOSTS=["testserver"]
+            ), mock.patch.object(APIView, "get_throttles", return_value=[]):
+                for name, sync_url_name, async_url_name, model in ENDPOINTS:
+                    args = [objects[model].id] if model else []
+                    results.append(
+                        {
+                            "endpoint": name,
+                            "wsgi": self.run_wsgi(
+                                reverse(f"planetarium:{sync_url_name}", args=args),
+                                headers,
+                                concurrency,
+                                requests_count,
+                            ),
+                            "asgi": asyncio.run(
+                                self.run_asgi(
+                                    reverse(f"planetarium:{async_url_name}", args=args),
+                                    headers,
+                                    concurrency,
+                                    requests_count,
+                                )
+                            ),
+                        }
+                    )
+        finally:
+            user.delete()
+
+        report = json.dumps(
+            {
+                "concurrency": concurrency,
+                "requests": requests_count,
+                "database": connection.vendor,
+                # Any of these makes the ASGI handler run views through a thread
+                "sync_only_middleware": [
+                    path
+                    for path in settings.MIDDLEWARE
+                    if not getattr(import_string(path), "async_capable", False)
+                ],
+                "endpoints": results,
+            },
+            indent=2,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(report)
+        else:
+            self.stdout.write(report)
+
+        errors = [
+            result["endpoint"]
+            for result in results
+            if result["wsgi"]["errors"] or result["asgi"]["errors"]
+        ]
+        if errors:
+            raise CommandError(f"Failed requests: {', '.join(errors)}")
@@ -0,0 +1,498 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from planetarium.cache import invalidate_catalog
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    SeatHold,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+
+
+# Maximum number of queries allowed per request, the JWT user comes from the cache.
+# Every endpoint of BUDGETED_NAMESPACES needs one.
+QUERY_BUDGETS = {
+    "GET planetarium:api-root": 0,
+    "GET planetarium:showsession-list": 1,
+    "POST planetarium:showsession-list": 4,
+    "GET planetarium:showsession-detail": 4,
+    "GET planetarium:showsession-availability": 1,
+    "GET planetarium:planetariumdome-list": 2,
+    "GET planetarium:planetariumdome-detail": 1,
+    "GET planetarium:astronomyshow-list": 3,
+    "GET planetarium:astronomyshow-detail": 2,
+    "POST planetarium:astronomyshow-list": 7,
+    "PUT planetarium:astronomyshow-detail": 7,
+    "PATCH planetarium:astronomyshow-detail": 4,
+    "DELETE planetarium:astronomyshow-detail": 6,
+    "GET planetarium:showtheme-list": 2,
+    "POST planetarium:showtheme-list": 2,
+    "GET planetarium:reservation-list": 5,
+    "GET planetarium:reservation-detail": 6,
+    "POST planetarium:reservation-list": 12,
+    "POST planetarium:reservation-batch": 12,
+    "GET planetarium:reservation-export": 1,
+    "POST planetarium:seathold-list": 7,
+    "GET planetarium:seathold-list": 2,
+    "DELETE planetarium:seathold-detail": 2,
+    "GET planetarium:async-showsession-list": 1,
+    "GET planetarium:async-showsession-detail": 4,
+    "GET planetarium:async-showsession-availability": 1,
+    "GET planetarium:async-planetariumdome-list": 2,
+    "GET planetarium:async-planetariumdome-detail": 1,
+    "GET planetarium:async-astronomyshow-list": 3,
+    "GET planetarium:async-astronomyshow-detail": 2,
+    "GET planetarium:db-pool": 0,
+    "GET planetarium:catalog-cache": 0,
+    "POST user:create": 2,
+    "POST user:token_obtain_pair": 1,
+    "POST user:token_refresh": 0,
+    "POST user:token_verify": 0,
+    "GET user:manage": 0,
+    "PUT user:manage": 4,
+    "PATCH user:manage": 3,
+}
+BUDGETED_NAMESPACES = ("planetarium", "user")
+
+
+def namespace_endpoints(namespace: str) -> set[str]:
+    """'METHOD namespace:url_name' of every view in the URL namespace"""
+    endpoints = set()
+    patterns = list(get_resolver().namespace_dict[namespace][1].url_patterns)
+    while patterns:
+        pattern = patterns.pop()
+        if isinstance(pattern, URLResolver):
+            patterns.extend(pattern.url_patterns)
+            continue
+        if not isinstance(pattern, URLPattern) or not pattern.name:
+            continue
+
+        view = getattr(pattern.callback, "cls", None) or pattern.callback.view_class
+        actions = getattr(pattern.callback, "actions", None) or {
+            method: method for method in view.http_method_names
+        }
+        endpoints.update(
+            f"{method.upper()} {namespace}:{pattern.name}"
+            for method in actions
+            if method in view.http_method_names
+            and method not in ("head", "options")
+            and hasattr(view, actions[method])
+        )
+    return endpoints
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a realistic dataset, request every API endpoint and write a JSON "
+        "report with query count, wall time and response size per endpoint. "
+        "Fails when an endpoint exceeds its query budget. All data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--domes", type=int, default=10)
+        parser.add_argument("--sessions", type=int, default=300)
+        parser.add_argument("--tickets", type=int, default=20000)
+        parser.add_argument("--repeats", type=int, default=5)
+        parser.add_argument("--output", type=str, default="")
+
+    @staticmethod
+    def seed(domes_count: int, sessions_count: int, tickets_count: int, user):
+        themes = ShowTheme.objects.bulk_create(
+            ShowTheme(name=f"benchmark theme {index}") for index in range(10)
+        )
+        domes = PlanetariumDome.objects.bulk_create(
+            PlanetariumDome(
+                name=f"benchmark dome {index}",
+                rows=20 + index % 5 * 5,
+                seats_in_row=30 + index % 3 * 10,
+            )
+            for index in range(domes_count)
+        )
+        shows = AstronomyShow.objects.bulk_create(
+            AstronomyShow(
+                title=f"benchmark show {index}",
+                description=f"benchmark description {index}",
+            )
+            for index in range(-(-sessions_count // domes_count))
+        )
+        AstronomyShow.themes.through.objects.bulk_create(
+            AstronomyShow.themes.through(
+                astronomyshow_id=show.id, showtheme_id=themes[index % len(themes)].id
+            )
+            for index, show in enumerate(shows)
+        )
+        now = timezone.now()
+        sessions = ShowSession.objects.bulk_create(
+            ShowSession(
+                astronomy_show=shows[index // domes_count],
+                planetarium_dome=domes[index % domes_count],
+                show_time=now + timedelta(hours=index),
+            )
+            for index in range(sessions_count)
+        )
+
+        # The last session is left empty for reservation POST requests
+        tickets_per_session = tickets_count // max(sessions_count - 1, 1)
+        tickets = []
+        for session in sessions[:-1]:
+            seats_in_row = session.planetarium_dome.seats_in_row
+            seats = [
+                (1 + index // seats_in_row, 1 + index % seats_in_row)
+                for index in range(
+                    min(tickets_per_session, session.planetarium_dome.total_seats)
+                )
+            ]
+            session.set_seats(seats)
+            tickets.extend(
+                Ticket(row=row, seat=seat, show_session=session) for row, seat in seats
+            )
+
+        users = [user] + get_user_model().objects.bulk_create(
+            get_user_model()(email=f"benchmark{index}@planetarium.test")
+            for index in range(1, 50)
+        )
+        reservations = Reservation.objects.bulk_create(
+            Reservation(user=users[index % len(users)])
+            for index in range(-(-len(tickets) // 4))
+        )
+        for index, ticket in enumerate(tickets):
+            ticket.reservation = reservations[index // 4]
+        Ticket.objects.bulk_create(tickets, batch_size=5000)
+        ShowSession.objects.bulk_update(sessions, ["seat_map", "tickets_sold"])
+
+        return {
+            "dome": domes[0],
+            "theme": themes[0],
+            "show": shows[0],
+            "session": sessions[0],
+            "schedule": sessions[:60],
+            "empty_session": sessions[-1],
+            "reservation": reservations[0],
+        }
+
+    def measure(self, client, method, url_name, args, payload, repeats):
+        timings = []
+        # The most of any repeat, catalog reads miss the cache on the first only
+        queries = 0
+
+        for repeat in range(repeats):
+            url = reverse(url_name, args=args(repeat) if callable(args) else args)
+            data = payload(repeat) if callable(payload) else payload
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = getattr(client, method.lower())(url, data, format="json")
+                # Streamed responses only run their queries while being read
+                if response.streaming:
+                    content = b"".join(response.streaming_content)
+                else:
+                    content = response.content
+                timings.append((time.perf_counter() - start) * 1000)
+            queries = max(queries, len(context.captured_queries))
+
+        budget = QUERY_BUDGETS[f"{method} {url_name}"]
+
+        return {
+            "endpoint": f"{method} {url_name}",
+            "url": url,
+            "status": response.status_code,
+            "queries": queries,
+            "query_budget": budget,
+            "within_budget": queries <= budget,
+            "median_ms": round(statistics.median(timings), 3),
+            "max_ms": round(max(timings), 3),
+            "response_bytes": len(content),
+        }
+
+    @staticmethod
+    def jwt_client(user) -> APIClient:
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}"
+        )
+        # Like any logged-in client, the user is already in the JWT user cache
+        client.get(reverse("user:manage"))
+        return client
+
+    def run_endpoints(self, objects, user, staff, repeats):
+        client = self.jwt_client(user)
+        staff_client = self.jwt_client(staff)
+        refresh = RefreshToken.for_user(user)
+        empty_session = objects["empty_session"]
+        seats_in_row = empty_session.planetarium_dome.seats_in_row
+
+        def reservation_payload(repeat):
+            return {
+                "tickets": [
+                    {
+                        "row": 1 + (repeat * 4 + index) // seats_in_row,
+                        "seat": 1 + (repeat * 4 + index) % seats_in_row,
+                        "show_session": empty_session.id,
+                    }
+                    for index in range(4)
+                ]
+            }
+
+        # Ten parties of two, seated together from the center out
+        batch_payload = {
+            "reservations": [
+                {"best_available": {"show_session": empty_session.id, "count": 2}}
+            ]
+            * 10
+        }
+
+        def hold_payload(repeat):
+            return [
+                {
+                    "row": empty_session.planetarium_dome.rows,
+                    "seat": 1 + (repeat * 4 + index) % seats_in_row,
+                    "show_session": empty_session.id,
+                }
+                for index in range(4)
+            ]
+
+        # One per repeat, deleted by the DELETE requests
+        deleted_holds = SeatHold.objects.bulk_create(
+            SeatHold(
+                row=empty_session.planetarium_dome.rows - 1,
+                seat=1 + repeat % seats_in_row,
+                show_session=empty_session,
+                user=user,
+                expires_at=timezone.now() + timedelta(hours=1),
+            )
+            for repeat in range(repeats)
+        )
+        # A show has one session per dome, so each new session needs its own
+        scheduled_shows, deleted_shows = (
+            AstronomyShow.objects.bulk_create(
+                AstronomyShow(
+                    title=f"benchmark {purpose} show {repeat}",
+                    description="benchmark description",
+                )
+                for repeat in range(repeats)
+            )
+            for purpose in ("scheduled", "deleted")
+        )
+        show_payload = {
+            "title": objects["show"].title,
+            "description": "benchmark description",
+            "themes": [objects["theme"].id],
+        }
+
+        def new_show_payload(repeat):
+            return {**show_payload, "title": f"benchmark new show {repeat}"}
+
+        def register_payload(repeat):
+            return {
+                "email": f"benchmark{repeat}@register.test",
+                "password": "benchmark",
+            }
+
+        endpoints = [
+            ("GET", "planetarium:showsession-list", [], None),
+            ("GET", "planetarium:showsession-detail", [objects["session"].id], None),
+            (
+                "GET",
+                "planetarium:showsession-availability",
+                [],
+                {"ids": ",".join(str(session.id) for session in objects["schedule"])},
+            ),
+            ("GET", "planetarium:planetariumdome-list", [], None),
+            ("GET", "planetarium:planetariumdome-detail", [objects["dome"].id], None),
+            ("GET", "planetarium:astronomyshow-list", [], None),
+            ("GET", "planetarium:astronomyshow-detail", [objects["show"].id], None),
+            ("GET", "planetarium:showtheme-list", [], None),
+            ("GET", "planetarium:reservation-list", [], None),
+            (
+                "GET",
+                "planetarium:reservation-detail",
+                [objects["reservation"].id],
+                None,
+            ),
+            ("POST", "planetarium:reservation-list", [], reservation_payload),
+            ("POST", "planetarium:reservation-batch", [], batch_payload),
+            ("POST", "planetarium:seathold-list", [], hold_payload),
+            ("GET", "planetarium:seathold-list", [], None),
+            ("POST", "user:create", [], register_payload),
+            (
+                "POST",
+                "user:token_obtain_pair",
+                [],
+                {"email": user.email, "password": "benchmark"},
+            ),
+            ("POST", "user:token_refresh", [], {"refresh": str(refresh)}),
+            ("POST", "user:token_verify", [], {"token": str(refresh.access_token)}),
+            ("GET", "user:manage", [], None),
+            ("GET", "planetarium:api-root", [], None),
+            (
+                "DELETE",
+                "planetarium:seathold-detail",
+                lambda repeat: [deleted_holds[repeat].id],
+                None,
+            ),
+            ("GET", "planetarium:async-showsession-list", [], None),
+            (
+                "GET",
+                "planetarium:async-showsession-detail",
+                [objects["session"].id],
+                None,
+            ),
+            (
+                "GET",
+                "planetarium:async-showsession-availability",
+                [],
+                {"ids": ",".join(str(session.id) for session in objects["schedule"])},
+            ),
+            ("GET", "planetarium:async-planetariumdome-list", [], None),
+            (
+                "GET",
+                "planetarium:async-planetariumdome-detail",
+                [objects["dome"].id],
+                None,
+            ),
+            ("GET", "planetarium:async-astronomyshow-list", [], None),
+            (
+                "GET",
+                "planetarium:async-astronomyshow-detail",
+                [objects["show"].id],
+                None,
+            ),
+        ]
+        staff_endpoints = [
+            (
+                "POST",
+                "planetarium:showsession-list",
+                [],
+                lambda repeat: {
+                    "astronomy_show": scheduled_shows[repeat].id,
+                    "planetarium_dome": objects["dome"].id,
+                    "show_time": timezone.now() + timedelta(days=365),
+                },
+            ),
+            ("POST", "planetarium:astronomyshow-list", [], new_show_payload),
+            (
+                "PUT",
+                "planetarium:astronomyshow-detail",
+                [objects["show"].id],
+                show_payload,
+            ),
+            (
+                "PATCH",
+                "planetarium:astronomyshow-detail",
+                [objects["show"].id],
+                {"description": "benchmark description"},
+            ),
+            (
+                "DELETE",
+                "planetarium:astronomyshow-detail",
+                lambda repeat: [deleted_shows[repeat].id],
+                None,
+            ),
+            (
+                "POST",
+                "planetarium:showtheme-list",
+                [],
+                lambda repeat: {"name": f"benchmark new theme {repeat}"},
+            ),
+            ("GET", "planetarium:reservation-export", [], None),
+            ("GET", "planetarium:db-pool", [], None),
+            ("GET", "planetarium:catalog-cache", [], None),
+            (
+                "PUT",
+                "user:manage",
+                [],
+                {"email": staff.email, "password": "benchmark"},
+            ),
+            ("PATCH", "user:manage", [], {"email": staff.email}),
+        ]
+
+        return [
+            self.measure(client, method, url_name, args, payload, repeats)
+            for method, url_name, args, payload in endpoints
+        ] + [
+            self.measure(staff_client, method, url_name, args, payload, repeats)
+            for method, url_name, args, payload in staff_endpoints
+        ]
+
+    def handle(self, *args, **options):
+        endpoints = set()
+        for namespace in BUDGETED_NAMESPACES:
+            endpoints |= namespace_endpoints(namespace)
+        if missing := sorted(endpoints - QUERY_BUDGETS.keys()):
+            raise CommandError(f"No query budget for: {', '.join(missing)}")
+
+        # Throttles and the seat hold limit would reject repeated requests
+        # long before the run ends, and slow runs outlast the JWT user cache
+        with override_settings(
+            ALLOWED_HOSTS=["testserver"],
+            SEAT_HOLD_MAX_PER_SESSION=10**6,
+            JWT_USER_CACHE_TIMEOUT=None,
+        ), mock.patch.object(
+            APIView, "get_throttles", return_value=[]
+        ), transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email="benchmark@planetarium.test", password="benchmark"
+            )
+            staff = get_user_model().objects.create_user(
+                email="benchmark-staff@planetarium.test",
+                password="benchmark",
+                is_staff=True,
+            )
+            start = time.perf_counter()
+            objects = self.seed(
+                options["domes"], options["sessions"], options["tickets"], user
+            )
+            seed_seconds = time.perf_counter() - start
+            # bulk_create sends no signals, responses cached for rows with
+            # the same ids must not be served
+            invalidate_catalog()
+            results = self.run_endpoints(objects, user, staff, options["repeats"])
+            transaction.set_rollback(True)
+        # Nor the benchmark rows once rolled back
+        invalidate_catalog()
+
+        report = json.dumps(
+            {
+                "dataset": {
+                    "domes": options["domes"],
+                    "sessions": options["sessions"],
+                    "tickets": options["tickets"],
+                    "seed_seconds": round(seed_seconds, 3),
+                },
+                "repeats": options["repeats"],
+                "endpoints": results,
+            },
+            indent=2,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(report)
+        else:
+            self.stdout.write(report)
+
+        over_budget = [result for result in results if not result["within_budget"]]
+        if over_budget:
+            raise CommandError(
+                "Query budget exceeded: "
+                + ", ".join(
+                    f"{result['endpoint']} ({result['queries']} > "
+                    f"{result['query_budget']})"
+                    for result in over_budget
+                )
+            )
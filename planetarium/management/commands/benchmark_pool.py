@@ -0,0 +1,143 @@
+import json
+import time
+from threading import Barrier, Thread
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium.management.commands.benchmark_asgi import summarize
+from planetarium.models import ShowSession
+from planetarium.pool import pool_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare latency of the show session list opening a new PostgreSQL "
+        "connection for every request with taking connections from the pool, "
+        "from a number of threads. Reads existing data, run generate_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument(
+            "--pool-size",
+            type=int,
+            default=0,
+            help="Pool max size, the POSTGRES_POOL_MAX_SIZE setting by default",
+        )
+        parser.add_argument("--output", type=str, default="")
+
+    @staticmethod
+    def configure(pool_options) -> None:
+        """Switch every thread's connection of the default database"""
+        connection.close()
+        connection.close_pool()
+        settings_dict = connections.settings[DEFAULT_DB_ALIAS]
+        settings_dict["CONN_MAX_AGE"] = 0
+        settings_dict["OPTIONS"]["pool"] = pool_options
+
+    @staticmethod
+    def run(url, headers, threads_count, requests_count) -> dict:
+        timings = []
+        statuses = []
+        barrier = Barrier(threads_count + 1)
+
+        def worker(count):
+            client = Client()
+            barrier.wait()
+            try:
+                for _ in range(count):
+                    start = time.perf_counter()
+                    statuses.append(client.get(url, headers=headers).status_code)
+                    # What a server does after each request, the test client
+                    # keeps the connection open
+                    close_old_connections()
+                    timings.append((time.perf_counter() - start) * 1000)
+            finally:
+                connection.close()
+
+        threads = [
+            Thread(
+                target=worker, args=(len(range(index, requests_count, threads_count)),)
+            )
+            for index in range(threads_count)
+        ]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        return summarize(timings, time.perf_counter() - start, statuses)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Connection pooling needs PostgreSQL")
+        if not ShowSession.objects.exists():
+            raise CommandError("No data to read, run generate_data first")
+
+        settings_dict = connections.settings[DEFAULT_DB_ALIAS]
+        original = (settings_dict["CONN_MAX_AGE"], settings_dict["OPTIONS"].get("pool"))
+        pool_options = dict(original[1] or settings.DATABASE_POOL or {})
+        if options["pool_size"]:
+            pool_options["max_size"] = options["pool_size"]
+        pool_options.setdefault("max_size", 10)
+        pool_options["min_size"] = min(
+            pool_options.get("min_size", 2), pool_options["max_size"]
+        )
+
+        user = get_user_model().objects.create_user(
+            email=f"pool-benchmark-{time.time_ns()}@planetarium.test"
+        )
+        headers = {"authorization": f"Bearer {AccessToken.for_user(user)}"}
+        url = reverse("planetarium:showsession-list")
+        threads_count = options["threads"]
+        requests_count = options["requests"]
+
+        results = {}
+        try:
+            with override_settings(
+                DEBUG=False, ALLOWED_HOSTS=["testserver"]
+            ), mock.patch.object(APIView, "get_throttles", return_value=[]):
+                self.configure(None)
+                results["no_pool"] = self.run(
+                    url, headers, threads_count, requests_count
+                )
+
+                self.configure(pool_options)
+                results["pool"] = self.run(url, headers, threads_count, requests_count)
+                results["pool"]["stats"] = pool_stats()
+        except ImproperlyConfigured as error:
+            raise CommandError(error)
+        finally:
+            self.configure(original[1])
+            settings_dict["CONN_MAX_AGE"] = original[0]
+            user.delete()
+
+        report = json.dumps(
+            {
+                "threads": threads_count,
+                "requests": requests_count,
+                "pool_options": pool_options,
+                **results,
+            },
+            indent=2,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(report)
+        else:
+            self.stdout.write(report)
+
+        if results["no_pool"]["errors"] or results["pool"]["errors"]:
+            raise CommandError("Failed requests, see the report")
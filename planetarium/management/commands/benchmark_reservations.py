@@ -0,0 +1,108 @@
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models.signals import post_save, pre_save
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    Ticket,
+)
+from planetarium.serializers import ReservationSerializer
+from planetarium.signals import mark_ticket_seat, remember_ticket_seat
+
+
+@contextmanager
+def seat_map_signals_disconnected():
+    # Each ticket would also lock and save its show session, which the bulk
+    # path does once, so the comparison would not be of the INSERTs alone
+    pre_save.disconnect(remember_ticket_seat, sender=Ticket)
+    post_save.disconnect(mark_ticket_seat, sender=Ticket)
+    try:
+        yield
+    finally:
+        pre_save.connect(remember_ticket_seat, sender=Ticket)
+        post_save.connect(mark_ticket_seat, sender=Ticket)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare reservation creation with one INSERT per ticket "
+        "against the bulk serializer path. All data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=str, default="1,10,100")
+        parser.add_argument("--repeats", type=int, default=20)
+
+    @staticmethod
+    def create_row_by_row(user, tickets):
+        with seat_map_signals_disconnected():
+            reservation = Reservation.objects.create(user=user)
+            for ticket in tickets:
+                Ticket.objects.create(reservation=reservation, **ticket)
+
+    @staticmethod
+    def create_bulk(user, tickets):
+        serializer = ReservationSerializer()
+        serializer.create({"user": user, "tickets": tickets})
+
+    def measure(self, create, user, session, size, repeats):
+        tickets = [
+            {
+                "row": 1 + index // session.planetarium_dome.seats_in_row,
+                "seat": 1 + index % session.planetarium_dome.seats_in_row,
+                "show_session": session,
+            }
+            for index in range(size)
+        ]
+        elapsed = 0.0
+        queries = 0
+
+        for _ in range(repeats):
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                create(user, tickets)
+                elapsed += time.perf_counter() - start
+            queries = len(context.captured_queries)
+            Ticket.objects.filter(show_session=session).delete()
+
+        return elapsed / repeats * 1000, queries
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",")]
+        repeats = options["repeats"]
+
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email="benchmark@planetarium.test", password="benchmark"
+            )
+            dome = PlanetariumDome.objects.create(
+                name="benchmark", rows=max(sizes), seats_in_row=max(sizes)
+            )
+            show = AstronomyShow.objects.create(
+                title="benchmark reservations", description="benchmark"
+            )
+            session = ShowSession.objects.create(
+                astronomy_show=show, planetarium_dome=dome, show_time=timezone.now()
+            )
+
+            for size in sizes:
+                for label, create in [
+                    ("row-by-row", self.create_row_by_row),
+                    ("bulk", self.create_bulk),
+                ]:
+                    avg_ms, queries = self.measure(create, user, session, size, repeats)
+                    self.stdout.write(
+                        f"{size:>5} tickets | {label:<10} | "
+                        f"{avg_ms:8.2f} ms | {queries:>4} queries"
+                    )
+
+            transaction.set_rollback(True)
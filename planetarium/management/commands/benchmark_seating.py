@@ -0,0 +1,161 @@
+import json
+import random
+import statistics
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from planetarium.models import AstronomyShow, PlanetariumDome, ShowSession
+
+
+def fill_seat_map(session: ShowSession, fill: float, rng: random.Random) -> None:
+    """Sell random groups of 1 to 6 seats until fill of the dome is sold"""
+    dome = session.planetarium_dome
+    while session.tickets_sold < dome.total_seats * fill:
+        size = rng.randint(1, min(6, dome.seats_in_row))
+        row = rng.randint(1, dome.rows)
+        start = rng.randint(1, dome.seats_in_row - size + 1)
+        session.set_seats((row, seat) for seat in range(start, start + size))
+
+
+def scan_seats(session: ShowSession, count: int) -> list[tuple[int, int]]:
+    """best_available_seats() by checking every seat of every row"""
+    rows = session.planetarium_dome.rows
+    seats_in_row = session.planetarium_dome.seats_in_row
+    best = None
+    for row in range(rows):
+        run = 0
+        for seat in range(seats_in_row):
+            run = 0 if session.is_seat_taken(row + 1, seat + 1) else run + 1
+            if run < count:
+                continue
+            start = seat - count + 1
+            score = (
+                ((row - (rows - 1) / 2) / rows) ** 2
+                + ((start - (seats_in_row - count) / 2) / seats_in_row) ** 2,
+                row,
+                start,
+            )
+            best = score if best is None else min(best, score)
+
+    if best is None:
+        return []
+    _, row, start = best
+    return [(row + 1, start + seat + 1) for seat in range(count)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time best-available seat allocation on a large dome filled by group "
+        "bookings, against a scan of every seat and through the reservation "
+        "endpoint. All data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50)
+        parser.add_argument("--seats-in-row", type=int, default=100)
+        parser.add_argument("--fill", type=float, default=0.9)
+        parser.add_argument("--counts", type=str, default="2,4,6")
+        parser.add_argument("--repeats", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+
+    @staticmethod
+    def timed(function, repeats: int) -> tuple[float, object]:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = function()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), result
+
+    def post_best_available(self, client, session, count, repeats) -> dict:
+        url = reverse("planetarium:reservation-list")
+        payload = {"best_available": {"show_session": session.id, "count": count}}
+        timings = []
+        for _ in range(repeats):
+            savepoint = transaction.savepoint()
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = client.post(url, payload, format="json")
+                timings.append((time.perf_counter() - start) * 1000)
+            transaction.savepoint_rollback(savepoint)
+
+        return {
+            "post_status": response.status_code,
+            "post_ms": round(statistics.median(timings), 3),
+            "post_queries": len(context.captured_queries),
+        }
+
+    def handle(self, *args, **options):
+        counts = [int(count) for count in options["counts"].split(",")]
+        repeats = options["repeats"]
+
+        # Throttles would reject repeated requests long before the run ends
+        with override_settings(
+            DEBUG=False, ALLOWED_HOSTS=["testserver"]
+        ), mock.patch.object(
+            APIView, "get_throttles", return_value=[]
+        ), transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email="benchmark@planetarium.test", password="benchmark"
+            )
+            dome = PlanetariumDome.objects.create(
+                name="benchmark seating",
+                rows=options["rows"],
+                seats_in_row=options["seats_in_row"],
+            )
+            show = AstronomyShow.objects.create(
+                title="benchmark seating", description="benchmark"
+            )
+            session = ShowSession(
+                astronomy_show=show, planetarium_dome=dome, show_time=timezone.now()
+            )
+            # Only the seat map is filled, allocation never reads tickets
+            fill_seat_map(session, options["fill"], random.Random(options["seed"]))
+            session.save()
+
+            client = APIClient()
+            client.force_authenticate(user=user)
+            results = []
+            for count in counts:
+                bitmap_ms, seats = self.timed(
+                    lambda: session.best_available_seats(count), repeats
+                )
+                scan_ms, scanned = self.timed(
+                    lambda: scan_seats(session, count), max(repeats // 10, 1)
+                )
+                if seats != scanned:
+                    raise CommandError(f"Allocations of {count} seats differ")
+
+                results.append(
+                    {
+                        "count": count,
+                        "seats": seats,
+                        "bitmap_us": round(bitmap_ms * 1000, 1),
+                        "scan_ms": round(scan_ms, 3),
+                        "speedup": round(scan_ms / bitmap_ms, 1),
+                        **self.post_best_available(client, session, count, repeats),
+                    }
+                )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            json.dumps(
+                {
+                    "dome_seats": dome.total_seats,
+                    "sold": session.tickets_sold,
+                    "results": results,
+                },
+                indent=2,
+            )
+        )
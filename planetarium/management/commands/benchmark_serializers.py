@@ -0,0 +1,98 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+from rest_framework.renderers import JSONRenderer
+
+from planetarium.fast_serializers import fast_serializer
+from planetarium.models import ShowSession
+from planetarium.serializers import (
+    AstronomyShowListSerializer,
+    ReservationListSerializer,
+    ShowSessionListSerializer,
+)
+from planetarium.views import AstronomyShowViewSet, ReservationViewSet
+
+
+def list_querysets() -> list[tuple]:
+    """The querysets of the list actions"""
+    return [
+        (
+            "session list",
+            ShowSession.objects.select_related(
+                "astronomy_show", "planetarium_dome"
+            ).annotate(
+                available_tickets=F("planetarium_dome__rows")
+                * F("planetarium_dome__seats_in_row")
+                - F("tickets_sold")
+            ),
+            ShowSessionListSerializer,
+        ),
+        (
+            "show list",
+            AstronomyShowViewSet.queryset.order_by("id"),
+            AstronomyShowListSerializer,
+        ),
+        (
+            "reservation list",
+            ReservationViewSet.queryset,
+            ReservationListSerializer,
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time fetching and serializing pages of the list actions with the "
+        "serializers and with their values() fast path, and check both "
+        "render the same JSON. Reads existing data, run generate_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    @staticmethod
+    def timed(function, repeat: int) -> tuple[float, object]:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), result
+
+    def handle(self, *args, **options):
+        rows_count = options["rows"]
+        repeat = options["repeat"]
+        renderer = JSONRenderer()
+
+        results = []
+        for name, queryset, serializer_class in list_querysets():
+            fast = fast_serializer(serializer_class)
+
+            regular_ms, regular_data = self.timed(
+                lambda: serializer_class(list(queryset[:rows_count]), many=True).data,
+                repeat,
+            )
+            fast_ms, fast_data = self.timed(
+                lambda: fast.to_representation(fast.rows(queryset)[:rows_count]),
+                repeat,
+            )
+            if not regular_data:
+                raise CommandError(f"No rows for the {name}, run generate_data first")
+            if renderer.render(fast_data) != renderer.render(regular_data):
+                raise CommandError(f"Fast {name} output differs")
+
+            results.append(
+                {
+                    "endpoint": name,
+                    "rows": len(regular_data),
+                    "serializer_ms": round(regular_ms, 3),
+                    "fast_ms": round(fast_ms, 3),
+                    "speedup": round(regular_ms / fast_ms, 2),
+                }
+            )
+
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from planetarium.exports import EXPORT_FORMATS, get_export_rows, stream_export
+from planetarium.mixins import QueryParamsTransform
+
+
+class Command(BaseCommand):
+    help = "Stream reservation tickets as CSV or NDJSON to a file or stdout"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--output", type=str, default="")
+        parser.add_argument("--from", dest="created_from", type=str, default="")
+        parser.add_argument("--to", dest="created_to", type=str, default="")
+        parser.add_argument("--sessions", type=str, default="")
+
+    def handle(self, *args, **options):
+        try:
+            rows = get_export_rows(
+                created_from=options["created_from"]
+                and QueryParamsTransform.query_param_to_datetime(
+                    options["created_from"], "from"
+                ),
+                created_to=options["created_to"]
+                and QueryParamsTransform.query_param_to_datetime(
+                    options["created_to"], "to", end_of_day=True
+                ),
+                show_session_ids=options["sessions"]
+                and QueryParamsTransform.query_params_to_int(options["sessions"]),
+            )
+        except (ValidationError, ValueError) as error:
+            raise CommandError(error)
+
+        output = (
+            open(options["output"], "w", newline="")
+            if options["output"]
+            else self.stdout
+        )
+        try:
+            for chunk in stream_export(options["format"], rows):
+                output.write(chunk)
+        finally:
+            if options["output"]:
+                output.close()
@@ -0,0 +1,272 @@
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from planetarium.bulk import bulk_insert, reset_sequences
+from planetarium.cache import invalidate_catalog
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+
+THEMES = [
+    "Black Holes",
+    "Constellations",
+    "Exoplanets",
+    "Galaxies",
+    "Moon",
+    "Nebulae",
+    "Planets",
+    "Solar System",
+    "Space Exploration",
+    "Stars",
+    "Sun",
+    "Cosmology",
+]
+SHOW_WORDS = (
+    ["Journey to", "Secrets of", "Beyond", "Voyage through", "Light from", "Life of"],
+    ["the Milky Way", "Andromeda", "Saturn's Rings", "the Big Bang", "Dark Matter"],
+)
+# Most bookings are couples and families
+GROUP_SIZES = [1, 2, 3, 4, 5, 6]
+GROUP_WEIGHTS = [20, 40, 15, 15, 6, 4]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic synthetic dataset for load testing: domes of "
+        "varied size, shows with themes, a season of show sessions, users and "
+        "reservations. --fill is the mean share of sold seats per session."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--domes", type=int, default=10)
+        parser.add_argument("--shows", type=int, default=50)
+        parser.add_argument("--themes", type=int, default=len(THEMES))
+        parser.add_argument("--sessions", type=int, default=500)
+        parser.add_argument("--days", type=int, default=90)
+        parser.add_argument("--start", type=str, default="")
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--fill", type=float, default=0.6)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        if options["sessions"] > options["domes"] * options["shows"]:
+            raise CommandError(
+                "Each show can run only once per dome: "
+                "--sessions must not exceed --domes * --shows"
+            )
+        if not 0 <= options["fill"] <= 1:
+            raise CommandError("--fill must be between 0 and 1")
+        if min(options["domes"], options["shows"], options["users"]) < 1:
+            raise CommandError("--domes, --shows and --users must be positive")
+
+        start_day = timezone.localdate()
+        if options["start"]:
+            start_day = parse_date(options["start"])
+            if start_day is None:
+                raise CommandError("--start must be a date (YYYY-MM-DD)")
+
+        self.randomizer = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.pending = defaultdict(list)
+        self.counts = Counter()
+
+        start = time.perf_counter()
+        with transaction.atomic():
+            self.next_ids = {
+                model: (model.objects.aggregate(Max("id"))["id__max"] or 0) + 1
+                for model in (
+                    AstronomyShow,
+                    PlanetariumDome,
+                    Reservation,
+                    ShowSession,
+                    ShowTheme,
+                    get_user_model(),
+                )
+            }
+            themes = self.generate_themes(options["themes"])
+            domes = self.generate_domes(options["domes"])
+            shows = self.generate_shows(options["shows"], themes)
+            users = self.generate_users(options["users"])
+            self.generate_sessions(
+                options["sessions"],
+                options["days"],
+                start_day,
+                options["fill"],
+                shows,
+                domes,
+                users,
+            )
+            self.flush()
+            reset_sequences(self.next_ids)
+        invalidate_catalog()
+
+        elapsed = time.perf_counter() - start
+        total = sum(self.counts.values())
+        for label, count in sorted(self.counts.items()):
+            self.stdout.write(f"{label}: {count}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {total} rows in {elapsed:.2f} s "
+                f"({total / max(elapsed, 1e-9):.0f} rows/s)"
+            )
+        )
+
+    def next_id(self, model) -> int:
+        next_id = self.next_ids[model]
+        self.next_ids[model] += 1
+        return next_id
+
+    def add(self, obj) -> None:
+        self.pending[type(obj)].append(obj)
+        if len(self.pending[type(obj)]) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        for model, objects in self.pending.items():
+            if objects:
+                bulk_insert(model, objects)
+                self.counts[model._meta.label] += len(objects)
+        self.pending.clear()
+
+    def generate_themes(self, count: int) -> list[int]:
+        theme_ids = []
+        for index in range(count):
+            theme_id = self.next_id(ShowTheme)
+            self.add(
+                ShowTheme(
+                    id=theme_id, name=f"{THEMES[index % len(THEMES)]} #{theme_id}"
+                )
+            )
+            theme_ids.append(theme_id)
+        return theme_ids
+
+    def generate_domes(self, count: int) -> list[PlanetariumDome]:
+        domes = []
+        for _ in range(count):
+            dome_id = self.next_id(PlanetariumDome)
+            dome = PlanetariumDome(
+                id=dome_id,
+                name=f"Dome {dome_id}",
+                rows=self.randomizer.randint(5, 30),
+                seats_in_row=self.randomizer.randint(8, 40),
+            )
+            self.add(dome)
+            domes.append(dome)
+        return domes
+
+    def generate_shows(self, count: int, theme_ids: list[int]) -> list[int]:
+        show_ids = []
+        for _ in range(count):
+            show_id = self.next_id(AstronomyShow)
+            title = " ".join(self.randomizer.choice(words) for words in SHOW_WORDS)
+            self.add(
+                AstronomyShow(
+                    id=show_id,
+                    title=f"{title} #{show_id}",
+                    description=f"{title}: a generated show for load testing.",
+                )
+            )
+            for theme_id in self.randomizer.sample(
+                theme_ids, min(len(theme_ids), self.randomizer.randint(1, 3))
+            ):
+                self.add(
+                    AstronomyShow.themes.through(
+                        astronomyshow_id=show_id, showtheme_id=theme_id
+                    )
+                )
+            show_ids.append(show_id)
+        return show_ids
+
+    def generate_users(self, count: int) -> list[int]:
+        User = get_user_model()
+        # Hashing once keeps the generator fast; every user logs in with it
+        password = make_password("password")
+        user_ids = []
+        for _ in range(count):
+            user_id = self.next_id(User)
+            self.add(
+                User(
+                    id=user_id, email=f"user{user_id}@generated.test", password=password
+                )
+            )
+            user_ids.append(user_id)
+        return user_ids
+
+    def fill_ratio(self, fill: float) -> float:
+        # Beta distribution: most sessions near the mean, a few sold out or empty
+        if fill in (0, 1):
+            return fill
+        return self.randomizer.betavariate(fill * 4, (1 - fill) * 4)
+
+    def generate_sessions(
+        self, count, days, start_day, fill, show_ids, domes, user_ids
+    ) -> None:
+        pairs = self.randomizer.sample(
+            [(show_id, dome) for show_id in show_ids for dome in domes], count
+        )
+        first_show_time = timezone.make_aware(
+            datetime.combine(start_day, datetime.min.time())
+        )
+
+        for show_id, dome in pairs:
+            show_time = first_show_time + timedelta(
+                days=self.randomizer.randrange(max(days, 1)),
+                hours=self.randomizer.randint(10, 21),
+                minutes=self.randomizer.choice([0, 15, 30, 45]),
+            )
+            session = ShowSession(
+                id=self.next_id(ShowSession),
+                astronomy_show_id=show_id,
+                planetarium_dome=dome,
+                show_time=show_time,
+            )
+
+            # Sorted bits keep the seats of one reservation next to each other
+            bits = sorted(
+                self.randomizer.sample(
+                    range(dome.total_seats),
+                    round(self.fill_ratio(fill) * dome.total_seats),
+                )
+            )
+            seat_map = bytearray((dome.total_seats + 7) // 8)
+            position = 0
+            while position < len(bits):
+                group_size = self.randomizer.choices(GROUP_SIZES, GROUP_WEIGHTS)[0]
+                reservation = Reservation(
+                    id=self.next_id(Reservation),
+                    user_id=self.randomizer.choice(user_ids),
+                    created_at=show_time
+                    - timedelta(minutes=self.randomizer.randint(10, 60 * 24 * 30)),
+                )
+                self.add(reservation)
+                for bit in bits[position : position + group_size]:
+                    seat_map[bit // 8] |= 1 << (bit % 8)
+                    self.add(
+                        Ticket(
+                            row=bit // dome.seats_in_row + 1,
+                            seat=bit % dome.seats_in_row + 1,
+                            show_session_id=session.id,
+                            reservation_id=reservation.id,
+                        )
+                    )
+                position += group_size
+
+            session.seat_map = bytes(seat_map)
+            session.tickets_sold = len(bits)
+            self.add(session)
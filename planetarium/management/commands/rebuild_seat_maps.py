@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from planetarium.models import ShowSession, Ticket
+
+
+class Command(BaseCommand):
+    help = "Rebuild (or only verify with --verify) show session seat maps from tickets"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify", action="store_true")
+        parser.add_argument("--sessions", type=str, default="")
+
+    def handle(self, *args, **options):
+        sessions = ShowSession.objects.select_related("planetarium_dome").order_by("id")
+        if options["sessions"]:
+            sessions = sessions.filter(
+                id__in=[int(str_id) for str_id in options["sessions"].split(",")]
+            )
+
+        mismatched = 0
+        for session_id in sessions.values_list("id", flat=True).iterator():
+            with transaction.atomic():
+                session = sessions.select_for_update(of=("self",)).get(id=session_id)
+                current = (bytes(session.seat_map or b""), session.tickets_sold)
+                session.seat_map = b""
+                session.tickets_sold = 0
+                session.set_seats(
+                    Ticket.objects.filter(show_session=session).values_list(
+                        "row", "seat"
+                    )
+                )
+                if (session.seat_map, session.tickets_sold) == current:
+                    continue
+
+                mismatched += 1
+                self.stdout.write(f"Seat map mismatch in show session {session.id}")
+                if not options["verify"]:
+                    session.save(
+                        update_fields=["seat_map", "tickets_sold", "updated_at"]
+                    )
+
+        if options["verify"]:
+            if mismatched:
+                raise CommandError(f"{mismatched} seat maps out of sync")
+            self.stdout.write(self.style.SUCCESS("All seat maps are in sync"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{mismatched} seat maps rebuilt"))
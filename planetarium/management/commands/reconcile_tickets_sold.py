@@ -0,0 +1,41 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F
+
+from planetarium.models import ShowSession
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare show session tickets_sold counters with the ticket table "
+        "and rebuild drifted sessions (only report them with --verify)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify", action="store_true")
+
+    def handle(self, *args, **options):
+        drifted = list(
+            ShowSession.objects.annotate(actual_sold=Count("tickets"))
+            .exclude(tickets_sold=F("actual_sold"))
+            .values_list("id", "tickets_sold", "actual_sold")
+        )
+
+        for session_id, tickets_sold, actual_sold in drifted:
+            self.stdout.write(
+                f"Show session {session_id}: "
+                f"tickets_sold={tickets_sold}, tickets={actual_sold}"
+            )
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All tickets_sold counters match"))
+            return
+
+        if options["verify"]:
+            raise CommandError(f"{len(drifted)} tickets_sold counters drifted")
+
+        call_command(
+            "rebuild_seat_maps",
+            sessions=",".join(str(session_id) for session_id, _, _ in drifted),
+            stdout=self.stdout,
+        )
@@ -0,0 +1,151 @@
+import random
+import time
+from collections import Counter
+from threading import Barrier, Thread
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from planetarium.models import AstronomyShow, PlanetariumDome, ShowSession, Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire overlapping reservations at one show session from many threads, "
+        "check that no seat is sold twice and report throughput. "
+        "Needs a database with row locks (PostgreSQL); created data is deleted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--bookings", type=int, default=400)
+        parser.add_argument("--group-size", type=int, default=3)
+        parser.add_argument("--rows", type=int, default=10)
+        parser.add_argument("--seats-in-row", type=int, default=12)
+        parser.add_argument("--seed", type=int, default=0)
+
+    @staticmethod
+    def book(barrier, user, payloads, statuses: Counter):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        url = reverse("planetarium:reservation-list")
+        barrier.wait()
+        try:
+            for payload in payloads:
+                statuses[client.post(url, payload, format="json").status_code] += 1
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        threads_count = options["threads"]
+        group_size = options["group_size"]
+        randomizer = random.Random(options["seed"])
+
+        dome = PlanetariumDome.objects.create(
+            name="stress dome",
+            rows=options["rows"],
+            seats_in_row=options["seats_in_row"],
+        )
+        show = AstronomyShow.objects.create(
+            title=f"stress show {time.time_ns()}", description="stress"
+        )
+        session = ShowSession.objects.create(
+            astronomy_show=show, planetarium_dome=dome, show_time=timezone.now()
+        )
+        users = [
+            get_user_model().objects.create_user(
+                email=f"stress{index}-{session.id}@planetarium.test"
+            )
+            for index in range(threads_count)
+        ]
+
+        payloads = []
+        for _ in range(options["bookings"]):
+            row = randomizer.randint(1, dome.rows)
+            first_seat = randomizer.randint(1, dome.seats_in_row - group_size + 1)
+            payloads.append(
+                {
+                    "tickets": [
+                        {"row": row, "seat": seat, "show_session": session.id}
+                        for seat in range(first_seat, first_seat + group_size)
+                    ]
+                }
+            )
+
+        thread_statuses = [Counter() for _ in users]
+        barrier = Barrier(threads_count + 1)
+        threads = [
+            Thread(
+                target=self.book,
+                args=(
+                    barrier,
+                    user,
+                    payloads[index::threads_count],
+                    thread_statuses[index],
+                ),
+            )
+            for index, user in enumerate(users)
+        ]
+        try:
+            with override_settings(ALLOWED_HOSTS=["testserver"]), mock.patch.object(
+                APIView, "get_throttles", return_value=[]
+            ):
+                for thread in threads:
+                    thread.start()
+                barrier.wait()
+                start = time.perf_counter()
+                for thread in threads:
+                    thread.join()
+                elapsed = time.perf_counter() - start
+
+            statuses = sum(thread_statuses, Counter())
+
+            session.refresh_from_db()
+            tickets = list(
+                Ticket.objects.filter(show_session=session).values_list("row", "seat")
+            )
+            double_sold = len(tickets) - len(set(tickets))
+            errors = []
+            if double_sold:
+                errors.append(f"{double_sold} seats sold twice")
+            if len(tickets) != statuses[201] * group_size:
+                errors.append(
+                    f"{len(tickets)} tickets for {statuses[201]} reservations"
+                )
+            if session.tickets_sold != len(tickets):
+                errors.append(f"tickets_sold is {session.tickets_sold}")
+            if sorted(
+                (seat["row"], seat["seat"]) for seat in session.taken_seats
+            ) != sorted(tickets):
+                errors.append("seat_map does not match tickets")
+            unexpected = {
+                code: count
+                for code, count in statuses.items()
+                if code not in (201, 409)
+            }
+            if unexpected:
+                errors.append(f"unexpected responses {unexpected}")
+
+            self.stdout.write(
+                f"{options['bookings']} bookings from {threads_count} threads "
+                f"in {elapsed:.2f} s ({options['bookings'] / elapsed:.1f} bookings/s): "
+                f"{statuses[201]} created, {statuses[409]} conflicts, "
+                f"{len(tickets)} tickets sold"
+            )
+        finally:
+            session.delete()
+            show.delete()
+            dome.delete()
+            for user in users:
+                user.delete()
+
+        if errors:
+            raise CommandError("; ".join(errors))
+        self.stdout.write(self.style.SUCCESS("No seat was sold twice"))
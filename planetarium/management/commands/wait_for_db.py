@@ -4,18 +4,25 @@ from django.core.management.base import BaseCommand
 from django.db import connection
 from django.db.utils import OperationalError
 
+from planetarium.pool import check_pool, get_pool
+
 
 class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument("--attempts", type=int, default=10)
+        parser.add_argument("--pool-timeout", type=float, default=5.0)
 
     def handle(self, *args, **options):
         times = options["attempts"]
 
         for attempt in range(times):
             try:
-                connection.ensure_connection()
-            except OperationalError:
+                if get_pool():
+                    pool_size = check_pool(timeout=options["pool_timeout"])
+                    self.stdout.write(f"Connection pool filled: {pool_size} connections")
+                else:
+                    connection.ensure_connection()
+            except (OperationalError, connection.Database.OperationalError):
                 self.stdout.write(f"Attempt: {attempt + 1} / {times}")
                 time.sleep(5)
             else:
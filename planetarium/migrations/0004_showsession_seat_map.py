@@ -0,0 +1,35 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:59
+
+from django.db import migrations, models
+
+
+def fill_seat_maps(apps, schema_editor):
+    ShowSession = apps.get_model("planetarium", "ShowSession")
+    Ticket = apps.get_model("planetarium", "Ticket")
+
+    for session in ShowSession.objects.select_related("planetarium_dome"):
+        dome = session.planetarium_dome
+        seat_map = bytearray((dome.rows * dome.seats_in_row + 7) // 8)
+        for row, seat in Ticket.objects.filter(show_session=session).values_list(
+            "row", "seat"
+        ):
+            bit = (row - 1) * dome.seats_in_row + (seat - 1)
+            seat_map[bit // 8] |= 1 << (bit % 8)
+        session.seat_map = bytes(seat_map)
+        session.save(update_fields=["seat_map"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("planetarium", "0003_ticket_unique_row_seat_show"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="showsession",
+            name="seat_map",
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.RunPython(fill_seat_maps, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-18 20:01
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_tickets_sold(apps, schema_editor):
+    ShowSession = apps.get_model("planetarium", "ShowSession")
+
+    for session in ShowSession.objects.annotate(actual_sold=Count("tickets")):
+        session.tickets_sold = session.actual_sold
+        session.save(update_fields=["tickets_sold"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("planetarium", "0004_showsession_seat_map"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="showsession",
+            name="tickets_sold",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_tickets_sold, migrations.RunPython.noop),
+    ]
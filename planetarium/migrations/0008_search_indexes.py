@@ -0,0 +1,103 @@
+# Generated by Django 5.1.2 on 2026-10-18 20:31
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import TextField
+from django.db.models.functions import Cast, Upper
+
+# Copies of planetarium.search.SHOW_SEARCH_VECTOR and SQLITE_SHOW_FTS_TABLE
+# as of this migration, which must not change with the app code
+SHOW_SEARCH_VECTOR = SearchVector("title", weight="A", config="english") + SearchVector(
+    "description", weight="B", config="english"
+)
+SQLITE_SHOW_FTS_TABLE = "planetarium_astronomyshow_fts"
+
+
+def trigram_index(field: str, name: str) -> GinIndex:
+    # Same expression as the lhs of icontains lookups on PostgreSQL
+    return GinIndex(
+        OpClass(Upper(Cast(field, output_field=TextField())), name="gin_trgm_ops"),
+        name=name,
+    )
+
+
+SEARCH_INDEX = (
+    "AstronomyShow",
+    GinIndex(SHOW_SEARCH_VECTOR, name="astronomyshow_search_idx"),
+)
+TRIGRAM_INDEXES = [
+    ("AstronomyShow", trigram_index("title", "astronomyshow_title_trgm_idx")),
+    ("PlanetariumDome", trigram_index("name", "planetariumdome_name_trgm_idx")),
+    ("ShowTheme", trigram_index("name", "showtheme_name_trgm_idx")),
+]
+
+SQLITE_FTS_SQL = [
+    f"CREATE VIRTUAL TABLE {SQLITE_SHOW_FTS_TABLE} USING fts5("
+    "title, description, "
+    "content='planetarium_astronomyshow', content_rowid='id')",
+    f"CREATE TRIGGER {SQLITE_SHOW_FTS_TABLE}_insert "
+    "AFTER INSERT ON planetarium_astronomyshow BEGIN "
+    f"INSERT INTO {SQLITE_SHOW_FTS_TABLE}(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    f"CREATE TRIGGER {SQLITE_SHOW_FTS_TABLE}_delete "
+    "AFTER DELETE ON planetarium_astronomyshow BEGIN "
+    f"INSERT INTO {SQLITE_SHOW_FTS_TABLE}"
+    f"({SQLITE_SHOW_FTS_TABLE}, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    f"CREATE TRIGGER {SQLITE_SHOW_FTS_TABLE}_update "
+    "AFTER UPDATE ON planetarium_astronomyshow BEGIN "
+    f"INSERT INTO {SQLITE_SHOW_FTS_TABLE}"
+    f"({SQLITE_SHOW_FTS_TABLE}, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    f"INSERT INTO {SQLITE_SHOW_FTS_TABLE}(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    f"INSERT INTO {SQLITE_SHOW_FTS_TABLE}({SQLITE_SHOW_FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "postgresql":
+        indexes = [SEARCH_INDEX]
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+            )
+            if cursor.fetchone():
+                schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                indexes += TRIGRAM_INDEXES
+
+        for model_name, index in indexes:
+            schema_editor.add_index(apps.get_model("planetarium", model_name), index)
+
+    if vendor == "sqlite":
+        for sql in SQLITE_FTS_SQL:
+            schema_editor.execute(sql)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "postgresql":
+        for _, index in [SEARCH_INDEX] + TRIGRAM_INDEXES:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {index.name}")
+
+    if vendor == "sqlite":
+        for action in ("insert", "delete", "update"):
+            schema_editor.execute(
+                f"DROP TRIGGER IF EXISTS {SQLITE_SHOW_FTS_TABLE}_{action}"
+            )
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLITE_SHOW_FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("planetarium", "0007_seathold"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
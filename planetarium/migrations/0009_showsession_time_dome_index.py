@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-18 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("planetarium", "0008_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="showsession",
+            index=models.Index(
+                fields=["show_time", "planetarium_dome"], name="session_time_dome_idx"
+            ),
+        ),
+    ]
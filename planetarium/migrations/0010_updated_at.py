@@ -0,0 +1,84 @@
+# Generated by Django 5.1.2 on 2026-10-18 21:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# The full text search table of 0008 and the triggers keeping it in sync
+SQLITE_SHOW_FTS_TABLE = "planetarium_astronomyshow_fts"
+SQLITE_FTS_TRIGGERS_SQL = [
+    f"CREATE TRIGGER {SQLITE_SHOW_FTS_TABLE}_insert "
+    "AFTER INSERT ON planetarium_astronomyshow BEGIN "
+    f"INSERT INTO {SQLITE_SHOW_FTS_TABLE}(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    f"CREATE TRIGGER {SQLITE_SHOW_FTS_TABLE}_delete "
+    "AFTER DELETE ON planetarium_astronomyshow BEGIN "
+    f"INSERT INTO {SQLITE_SHOW_FTS_TABLE}"
+    f"({SQLITE_SHOW_FTS_TABLE}, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    f"CREATE TRIGGER {SQLITE_SHOW_FTS_TABLE}_update "
+    "AFTER UPDATE ON planetarium_astronomyshow BEGIN "
+    f"INSERT INTO {SQLITE_SHOW_FTS_TABLE}"
+    f"({SQLITE_SHOW_FTS_TABLE}, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    f"INSERT INTO {SQLITE_SHOW_FTS_TABLE}(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    f"INSERT INTO {SQLITE_SHOW_FTS_TABLE}({SQLITE_SHOW_FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def restore_sqlite_fts_triggers(apps, schema_editor):
+    # SQLite adds these columns by rebuilding the table, which drops the
+    # triggers keeping the full text search table in sync
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    for action in ("insert", "delete", "update"):
+        schema_editor.execute(
+            f"DROP TRIGGER IF EXISTS {SQLITE_SHOW_FTS_TABLE}_{action}"
+        )
+    for sql in SQLITE_FTS_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("planetarium", "0009_showsession_time_dome_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_sqlite_fts_triggers),
+        migrations.AddField(
+            model_name="astronomyshow",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="planetariumdome",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="showsession",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="showtheme",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(restore_sqlite_fts_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.2 on 2026-10-18 21:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("planetarium", "0010_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedShowSession",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("show_time", models.DateTimeField()),
+                ("tickets_sold", models.PositiveIntegerField(default=0)),
+                ("archived_at", models.DateTimeField()),
+                (
+                    "astronomy_show",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_sessions",
+                        to="planetarium.astronomyshow",
+                    ),
+                ),
+                (
+                    "planetarium_dome",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_sessions",
+                        to="planetarium.planetariumdome",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["show_time", "id"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedTicket",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("row", models.IntegerField()),
+                ("seat", models.IntegerField()),
+                (
+                    "reservation",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_tickets",
+                        to="planetarium.reservation",
+                    ),
+                ),
+                (
+                    "show_session",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tickets",
+                        to="planetarium.archivedshowsession",
+                    ),
+                ),
+            ],
+        ),
+    ]
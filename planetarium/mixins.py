@@ -1,4 +1,273 @@
+import hashlib
+import inspect
+from datetime import datetime, time, timedelta
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from planetarium.cache import (
+    CATALOG_CACHE_TIMEOUT,
+    catalog_cache,
+    count_catalog_lookup,
+    get_catalog_version,
+)
+from planetarium.fast_serializers import fast_serializer
+from planetarium.timing import current_timings, time_serializer, timed_serializer_class
+
+
+class SerializerTimingMixin:
+    """Count serializer.data of the view as serializer time of the request"""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if current_timings.get() is not None:
+            serializer.__class__ = timed_serializer_class(type(serializer))
+        return serializer
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'"{digest}"'
+
+
+def not_modified(request, etag: str):
+    """304 response if the client's If-None-Match has etag, otherwise None"""
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response["ETag"] = etag
+    return response
+
+
 class QueryParamsTransform:
     @staticmethod
     def query_params_to_int(query_param):
         return [int(str_id) for str_id in query_param.split(",")]
+
+    @staticmethod
+    def query_param_to_datetime(query_param, name, end_of_day=False):
+        """Parse ISO date or datetime, dates become start (or end) of the day"""
+        try:
+            if day := parse_date(query_param):
+                value = datetime.combine(day, time.min)
+                if end_of_day:
+                    value += timedelta(days=1)
+            else:
+                value = parse_datetime(query_param)
+        except ValueError:
+            value = None
+
+        if value is None:
+            raise ValidationError({name: "Use YYYY-MM-DD or ISO 8601 datetime."})
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
+
+
+class FastListMixin:
+    """list() from values() rows with the fast path of the list serializer
+
+    Enabled with the FAST_LIST_SERIALIZERS setting, the output is the same.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_LIST_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+
+        serializer = fast_serializer(self.get_serializer_class())
+        queryset = serializer.rows(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        # Not serializer.data, so timed here for the Server-Timing header
+        with time_serializer():
+            data = serializer.to_representation(queryset if page is None else page)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+class CachedCatalogListMixin:
+    """Serve list responses from the catalog cache
+
+    The ETag is derived from the cache key, which holds the catalog version,
+    so conditional requests are answered before any cache or database read.
+    """
+
+    throttle_scopes = {"list": "catalog", "retrieve": "catalog"}
+
+    def get_cache_key(self) -> str:
+        query = "&".join(
+            f"{key}={','.join(values)}"
+            for key, values in sorted(self.request.query_params.lists())
+        )
+        # Hashed: paths and query strings may hold characters memcached keys
+        # cannot, and have no length limit. The host is part of it, as
+        # paginated responses link to their next and previous pages with it.
+        digest = hashlib.md5(
+            f"{self.request.get_host()}{self.request.path}?{query}".encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        return (
+            f"catalog:{get_catalog_version()}:{self.get_serializer_class().__name__}:"
+            f"{digest}"
+        )
+
+    def cached_response(self, action, request, *args, **kwargs):
+        cache = catalog_cache()
+        key = self.get_cache_key()
+        etag = make_etag(key, request.accepted_renderer.format)
+        if response := not_modified(request, etag):
+            return response
+
+        cached = cache.get(key)
+        count_catalog_lookup(hit=cached is not None)
+
+        if cached is not None:
+            response = Response(cached)
+            response["X-Cache"] = "HIT"
+        else:
+            response = action(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout=CATALOG_CACHE_TIMEOUT)
+            response["X-Cache"] = "MISS"
+
+        if response.status_code == 200:
+            response["ETag"] = etag
+        return response
+
+    async def acached_response(self, action, request, *args, **kwargs):
+        cache = catalog_cache()
+        key = self.get_cache_key()
+        etag = make_etag(key, request.accepted_renderer.format)
+        if response := not_modified(request, etag):
+            return response
+
+        cached = await cache.aget(key)
+        count_catalog_lookup(hit=cached is not None)
+
+        if cached is not None:
+            response = Response(cached)
+            response["X-Cache"] = "HIT"
+        else:
+            response = await action(request, *args, **kwargs)
+            if response.status_code == 200:
+                await cache.aset(key, response.data, timeout=CATALOG_CACHE_TIMEOUT)
+            response["X-Cache"] = "MISS"
+
+        if response.status_code == 200:
+            response["ETag"] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedCatalogMixin(CachedCatalogListMixin):
+    """Also serve retrieve responses from the catalog cache
+
+    Only for viewsets with a retrieve action, the router exposes a detail
+    route for any viewset having the method.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+
+class AsyncCachedCatalogMixin(CachedCatalogMixin):
+    async def list(self, request, *args, **kwargs):
+        return await self.acached_response(super().list, request, *args, **kwargs)
+
+    async def retrieve(self, request, *args, **kwargs):
+        return await self.acached_response(super().retrieve, request, *args, **kwargs)
+
+
+class AsyncReadOnlyMixin:
+    """Serve list/retrieve of a viewset from the event loop under ASGI
+
+    Authentication, permissions and throttles stay synchronous and run in
+    a worker thread; querysets are evaluated with the async ORM, so every
+    relation the serializer reads must be selected or prefetched.
+    """
+
+    http_method_names = ["get", "head", "options"]
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        return markcoroutinefunction(super().as_view(*args, **kwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = self.http_method_not_allowed
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (
+            queryset.model.DoesNotExist,
+            TypeError,
+            ValueError,
+            DjangoValidationError,
+        ):
+            raise Http404(
+                f"No {queryset.model._meta.object_name} matches the given query."
+            )
+
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        if hasattr(self.paginator, "apaginate_queryset"):
+            return await self.paginator.apaginate_queryset(
+                queryset, self.request, view=self
+            )
+        # DRF cursor pagination is sync only; its page query runs in the
+        # thread the async ORM would hand it to anyway
+        return await sync_to_async(self.paginator.paginate_queryset)(
+            queryset, self.request, view=self
+        )
+
+    async def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer([obj async for obj in queryset], many=True)
+        return Response(serializer.data)
+
+    async def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_serializer(await self.aget_object())
+        return Response(serializer.data)
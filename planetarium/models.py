@@ -1,6 +1,9 @@
+import math
+
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils import timezone
 
 from config.settings import AUTH_USER_MODEL
 
@@ -13,22 +16,120 @@ class ShowSession(models.Model):
         to="PlanetariumDome", on_delete=models.CASCADE, related_name="sessions"
     )
     show_time = models.DateTimeField()
+    seat_map = models.BinaryField(default=bytes, editable=False)
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
+        ordering = ["show_time", "id"]
         constraints = [
             models.UniqueConstraint(
                 fields=["astronomy_show", "planetarium_dome"], name="unique_show_dome"
             )
         ]
+        indexes = [
+            models.Index(fields=["show_time", "id"], name="session_time_id_idx"),
+            models.Index(
+                fields=["show_time", "planetarium_dome"], name="session_time_dome_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.astronomy_show.title} in {self.planetarium_dome.name} Dome at {self.show_time}"
 
+    def seat_bit(self, row: int, seat: int) -> int:
+        return (row - 1) * self.planetarium_dome.seats_in_row + (seat - 1)
+
+    def is_seat_taken(self, row: int, seat: int) -> bool:
+        bit = self.seat_bit(row, seat)
+        seat_map = bytes(self.seat_map or b"")
+        return bit // 8 < len(seat_map) and bool(seat_map[bit // 8] >> (bit % 8) & 1)
+
+    def set_seats(self, seats, taken: bool = True) -> None:
+        """Mark (row, seat) pairs as taken or free in seat_map and tickets_sold"""
+        seat_map = bytearray(self.seat_map or b"")
+        size = (self.planetarium_dome.total_seats + 7) // 8
+        if len(seat_map) < size:
+            seat_map.extend(bytes(size - len(seat_map)))
+
+        for row, seat in seats:
+            bit = self.seat_bit(row, seat)
+            mask = 1 << (bit % 8)
+            if bool(seat_map[bit // 8] & mask) == taken:
+                continue
+            seat_map[bit // 8] ^= mask
+            self.tickets_sold += 1 if taken else -1
+
+        self.seat_map = bytes(seat_map)
+
+    def best_available_seats(self, count: int, unavailable=()) -> list[tuple[int, int]]:
+        """(row, seat) of the free block of count seats in a row nearest the center
+
+        Every row of seat_map is read as an integer of free bits, shifted and
+        ANDed with itself until only the starts of long enough runs are left.
+        """
+        rows = self.planetarium_dome.rows
+        seats_in_row = self.planetarium_dome.seats_in_row
+        taken = int.from_bytes(bytes(self.seat_map or b""), "little")
+        for row, seat in unavailable:
+            taken |= 1 << self.seat_bit(row, seat)
+
+        row_mask = (1 << seats_in_row) - 1
+        center_row = (rows - 1) / 2
+        center_start = (seats_in_row - count) / 2
+        best = None
+
+        for row in range(rows):
+            starts = ~(taken >> (row * seats_in_row)) & row_mask
+            run = 1
+            while starts and run < count:
+                shift = min(run, count - run)
+                starts &= starts >> shift
+                run += shift
+            if not starts:
+                continue
+
+            # The start nearest the center of the row is on either side of it
+            candidates = []
+            first_after = math.ceil(center_start)
+            if after := starts >> first_after:
+                candidates.append(first_after + (after & -after).bit_length() - 1)
+            if before := starts & ((1 << (math.floor(center_start) + 1)) - 1):
+                candidates.append(before.bit_length() - 1)
+
+            for start in candidates:
+                score = (
+                    ((row - center_row) / rows) ** 2
+                    + ((start - center_start) / seats_in_row) ** 2,
+                    row,
+                    start,
+                )
+                if best is None or score < best:
+                    best = score
+
+        if best is None:
+            return []
+        _, row, start = best
+        return [(row + 1, start + seat + 1) for seat in range(count)]
+
+    @property
+    def taken_seats(self) -> list[dict]:
+        seats_in_row = self.planetarium_dome.seats_in_row
+        seat_map = bytes(self.seat_map or b"")
+        return [
+            {"seat": bit % seats_in_row + 1, "row": bit // seats_in_row + 1}
+            for index, byte in enumerate(seat_map)
+            if byte
+            for bit in range(index * 8, index * 8 + 8)
+            if byte >> (bit % 8) & 1
+        ]
+
 
 class PlanetariumDome(models.Model):
     name = models.CharField(max_length=128)
     rows = models.IntegerField(validators=[MinValueValidator(limit_value=0)])
     seats_in_row = models.IntegerField(validators=[MinValueValidator(limit_value=0)])
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} (rows: {self.rows}, seats in row: {self.seats_in_row})"
@@ -37,11 +138,34 @@ class PlanetariumDome(models.Model):
     def total_seats(self):
         return self.rows * self.seats_in_row
 
+    def validate_size(self):
+        """Seat maps of show sessions are laid out by the dome size"""
+        if (
+            self.pk
+            and ShowSession.objects.filter(planetarium_dome_id=self.pk)
+            .exclude(
+                planetarium_dome__rows=self.rows,
+                planetarium_dome__seats_in_row=self.seats_in_row,
+            )
+            .exists()
+        ):
+            raise ValidationError(
+                "rows and seats_in_row cannot change while the dome has show sessions"
+            )
+
+    def clean(self):
+        self.validate_size()
+
+    def save(self, *args, **kwargs):
+        self.validate_size()
+        super().save(*args, **kwargs)
+
 
 class AstronomyShow(models.Model):
     title = models.CharField(max_length=64, unique=True)
     description = models.TextField()
     themes = models.ManyToManyField(to="ShowTheme", related_name="astronomy_shows")
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
@@ -49,6 +173,7 @@ class AstronomyShow(models.Model):
 
 class ShowTheme(models.Model):
     name = models.CharField(max_length=64, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -104,7 +229,103 @@ class Reservation(models.Model):
     )
 
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="reservation_user_created_idx",
+            )
+        ]
 
     def __str__(self):
         return str(self.created_at)
+
+
+class ArchivedShowSession(models.Model):
+    """A past show session moved out of ShowSession, see planetarium.archive"""
+
+    id = models.BigIntegerField(primary_key=True)
+    astronomy_show = models.ForeignKey(
+        to="AstronomyShow", on_delete=models.CASCADE, related_name="archived_sessions"
+    )
+    planetarium_dome = models.ForeignKey(
+        to="PlanetariumDome",
+        on_delete=models.CASCADE,
+        related_name="archived_sessions",
+    )
+    show_time = models.DateTimeField()
+    tickets_sold = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["show_time", "id"]
+
+    def __str__(self):
+        return f"{self.astronomy_show.title} in {self.planetarium_dome.name} Dome at {self.show_time} (archived)"
+
+
+class ArchivedTicket(models.Model):
+    """A ticket of an archived show session, its reservation stays in place"""
+
+    id = models.BigIntegerField(primary_key=True)
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    show_session = models.ForeignKey(
+        to="ArchivedShowSession", on_delete=models.CASCADE, related_name="tickets"
+    )
+    reservation = models.ForeignKey(
+        to="Reservation", on_delete=models.CASCADE, related_name="archived_tickets"
+    )
+
+    def __str__(self):
+        return f"Ticket: row - {self.row}, seat - {self.seat} ({self.show_session.astronomy_show.title}, archived)"
+
+
+class SeatHold(models.Model):
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    show_session = models.ForeignKey(
+        to="ShowSession", on_delete=models.CASCADE, related_name="holds"
+    )
+    user = models.ForeignKey(
+        to=AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="seat_holds"
+    )
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["row", "seat", "show_session"], name="unique_row_seat_hold"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["show_session", "expires_at"], name="hold_session_expires_idx"
+            )
+        ]
+
+    def __str__(self):
+        return f"Hold: row - {self.row}, seat - {self.seat} until {self.expires_at}"
+
+    @staticmethod
+    def active_holds(show_session_ids, exclude_user=None):
+        holds = SeatHold.objects.filter(
+            show_session_id__in=show_session_ids, expires_at__gt=timezone.now()
+        )
+        if exclude_user is not None:
+            holds = holds.exclude(user=exclude_user)
+
+        return holds.values_list("show_session_id", "row", "seat")
+
+    @staticmethod
+    def active_seats(show_session_ids, exclude_user=None) -> set[tuple[int, int, int]]:
+        """(show_session_id, row, seat) of holds that have not expired yet"""
+        return set(SeatHold.active_holds(show_session_ids, exclude_user))
+
+    @staticmethod
+    async def aactive_seats(
+        show_session_ids, exclude_user=None
+    ) -> set[tuple[int, int, int]]:
+        return {
+            seat async for seat in SeatHold.active_holds(show_session_ids, exclude_user)
+        }
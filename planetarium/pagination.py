@@ -0,0 +1,133 @@
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    LimitOffsetPagination,
+    _reverse_ordering,
+)
+
+
+class AsyncLimitOffsetPagination(LimitOffsetPagination):
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() with the count and page fetched by the async ORM"""
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return [obj async for obj in queryset[self.offset : self.offset + self.limit]]
+
+
+class KeysetCursorPagination(CursorPagination):
+    """CursorPagination on every ordering field, not the first and an offset
+
+    The cursor holds the ordering values of the row it points at, so the
+    ordering must be unique (end it with id) and an index on the same
+    fields serves every page, however many rows share the first value.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor and self.cursor.position
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after_position(ordering, position))
+
+        # One more row tells whether a page follows in this direction
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_following = len(results) > len(self.page)
+        if reverse:
+            self.page.reverse()
+        self.has_next = has_following if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_following
+
+        if self.page:
+            self.previous_position = self._get_position_from_instance(
+                self.page[0], self.ordering
+            )
+            self.next_position = self._get_position_from_instance(
+                self.page[-1], self.ordering
+            )
+        else:
+            self.previous_position = self.next_position = position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def after_position(self, ordering, position) -> Q:
+        """Rows after position in ordering, compared field by field"""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        after, equal = Q(), Q()
+        for order, value in zip(ordering, values):
+            field = order.lstrip("-")
+            lookup = "lt" if order.startswith("-") else "gt"
+            after |= equal & Q(**{f"{field}__{lookup}": value})
+            equal &= Q(**{field: value})
+
+        # Bounds the index scan by the first field before the OR is checked
+        first = ordering[0].lstrip("-")
+        lookup = "lte" if ordering[0].startswith("-") else "gte"
+        return Q(**{f"{first}__{lookup}": values[0]}) & after
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self.next_position)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=self.previous_position)
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        return json.dumps(
+            [
+                str(
+                    instance[order.lstrip("-")]
+                    if isinstance(instance, dict)
+                    else getattr(instance, order.lstrip("-"))
+                )
+                for order in ordering
+            ]
+        )
+
+
+class ShowSessionPagination(KeysetCursorPagination):
+    ordering = ("show_time", "id")
+
+
+class ReservationPagination(KeysetCursorPagination):
+    ordering = ("-created_at", "-id")
@@ -0,0 +1,51 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def get_pool(alias: str = DEFAULT_DB_ALIAS):
+    """psycopg connection pool of the database, None when it is not pooled"""
+    return getattr(connections[alias], "pool", None)
+
+
+def check_pool(alias: str = DEFAULT_DB_ALIAS, timeout: float = 5.0) -> int:
+    """Open the pool, wait for its minimum connections and check each of them
+
+    Returns the number of connections in the pool. A pool which could not
+    fill up is thrown away, so the next check starts a fresh one.
+    """
+    pool = get_pool(alias)
+    try:
+        pool.open()
+        pool.wait(timeout=timeout)
+        pool.check()
+    except Exception:
+        connections[alias].close_pool()
+        raise
+    return pool.get_stats()["pool_size"]
+
+
+def pool_stats(alias: str = DEFAULT_DB_ALIAS) -> dict | None:
+    """Usage of the connection pool of this process since it was opened"""
+    pool = get_pool(alias)
+    if pool is None:
+        return None
+
+    stats = pool.get_stats()
+    size = stats.get("pool_size", 0)
+    queued = stats.get("requests_queued", 0)
+    wait_ms = stats.get("requests_wait_ms", 0)
+    return {
+        "min_size": pool.min_size,
+        "max_size": pool.max_size,
+        "size": size,
+        "in_use": size - stats.get("pool_available", 0),
+        # Connections opened above min_size to serve a burst
+        "overflow": max(size - pool.min_size, 0),
+        "waiting": stats.get("requests_waiting", 0),
+        "requests": stats.get("requests_num", 0),
+        "queued_requests": queued,
+        "wait_ms_total": wait_ms,
+        "wait_ms_avg": round(wait_ms / queued, 3) if queued else 0,
+        "timeouts": stats.get("requests_errors", 0),
+        "connections_opened": stats.get("connections_num", 0),
+        "connections_lost": stats.get("connections_lost", 0),
+    }
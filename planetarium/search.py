@@ -0,0 +1,53 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+# Must stay identical to the expression of astronomyshow_search_idx (0008)
+SHOW_SEARCH_VECTOR = SearchVector("title", weight="A", config="english") + SearchVector(
+    "description", weight="B", config="english"
+)
+SQLITE_SHOW_FTS_TABLE = "planetarium_astronomyshow_fts"
+
+
+def sqlite_match_expression(text: str) -> str:
+    """Quote every term so user input is never parsed as FTS5 syntax"""
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in text.split())
+
+
+def search_astronomy_shows(queryset, text: str):
+    """Filter shows by title and description, best matches first"""
+    if connection.vendor == "postgresql":
+        query = SearchQuery(text, search_type="websearch", config="english")
+        return (
+            queryset.alias(search=SHOW_SEARCH_VECTOR)
+            .filter(search=query)
+            .annotate(rank=SearchRank(SHOW_SEARCH_VECTOR, query))
+            .order_by("-rank", "id")
+        )
+
+    if connection.vendor == "sqlite":
+        match = sqlite_match_expression(text)
+        if not match:
+            return queryset.none()
+
+        table = SQLITE_SHOW_FTS_TABLE
+        return (
+            queryset.filter(
+                id__in=RawSQL(
+                    f"SELECT rowid FROM {table} WHERE {table} MATCH %s", (match,)
+                )
+            )
+            .annotate(
+                rank=RawSQL(
+                    f"SELECT bm25({table}, 10.0, 1.0) FROM {table} "
+                    f"WHERE {table} MATCH %s "
+                    f"AND rowid = planetarium_astronomyshow.id",
+                    (match,),
+                    output_field=FloatField(),
+                )
+            )
+            .order_by("rank", "id")
+        )
+
+    return queryset.filter(Q(title__icontains=text) | Q(description__icontains=text))
@@ -1,9 +1,22 @@
-from rest_framework import serializers
-
+from collections import Counter, defaultdict
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, Q, prefetch_related_objects
+from django.utils import timezone
+from rest_framework import serializers, status
+
+from planetarium.exceptions import SeatConflict, SeatsNotTogether
 from planetarium.models import (
+    ArchivedShowSession,
+    ArchivedTicket,
     AstronomyShow,
     PlanetariumDome,
     Reservation,
+    SeatHold,
     ShowSession,
     ShowTheme,
     Ticket,
@@ -42,10 +55,91 @@ class AstronomyShowRetrieveSerializer(AstronomyShowSerializer):
     themes = ShowThemeSerializer(many=True)
 
 
+class ShowSessionField(serializers.PrimaryKeyRelatedField):
+    """Show session by id, from the sessions fetched for the batch if any
+
+    SeatBatchSerializer sets them for its items, a show_sessions context
+    entry covers every field of a serializer.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault(
+            "queryset", ShowSession.objects.select_related("planetarium_dome")
+        )
+        super().__init__(**kwargs)
+        self.show_sessions = None
+
+    def to_internal_value(self, data):
+        show_sessions = self.show_sessions
+        if show_sessions is None:
+            show_sessions = self.context.get("show_sessions")
+        if show_sessions is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return show_sessions[int(data)]
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+
+
+def session_ids(data) -> set[int]:
+    ids = set()
+    for item in data:
+        try:
+            ids.add(int(item["show_session"]))
+        except (KeyError, TypeError, ValueError):
+            pass
+    return ids
+
+
+class SeatBatchSerializer(serializers.ListSerializer):
+    """Seats of many show sessions validated together
+
+    The show sessions and their domes are fetched in one query for the
+    whole list and seats requested twice are rejected.
+    """
+
+    def to_internal_value(self, data):
+        field = self.child.fields["show_session"]
+        if (
+            isinstance(data, list)
+            and isinstance(field, ShowSessionField)
+            and "show_sessions" not in self.context
+        ):
+            field.show_sessions = field.get_queryset().in_bulk(session_ids(data))
+        try:
+            return super().to_internal_value(data)
+        finally:
+            field.show_sessions = None
+
+    def validate(self, attrs):
+        seats = Counter(
+            (item["show_session"].id, item["row"], item["seat"]) for item in attrs
+        )
+        duplicates = sorted(seat for seat, count in seats.items() if count > 1)
+        if duplicates:
+            raise serializers.ValidationError(
+                [
+                    f"Seat {seat} in row {row} of show session {session_id} "
+                    "is requested more than once."
+                    for session_id, row, seat in duplicates
+                ]
+            )
+        return attrs
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    show_session = ShowSessionField()
+
     class Meta:
         model = Ticket
         fields = ["id", "row", "seat", "show_session"]
+        # Taken seats are checked for the whole batch in ReservationSerializer
+        validators = []
+        list_serializer_class = SeatBatchSerializer
 
     def validate(self, attrs):
         Ticket.validate_seat_row(
@@ -63,12 +157,6 @@ class TicketListSerializer(TicketSerializer):
     )
 
 
-class ShowSessionTicketSerializer(TicketSerializer):
-    class Meta:
-        model = Ticket
-        fields = ["seat", "row"]
-
-
 class ShowSessionSerializer(serializers.ModelSerializer):
     available_tickets = serializers.IntegerField(read_only=True)
 
@@ -88,38 +176,473 @@ class ShowSessionListSerializer(ShowSessionSerializer):
     planetarium_dome = serializers.SlugRelatedField(slug_field="name", read_only=True)
 
 
+class ShowSessionAvailabilitySerializer(ShowSessionSerializer):
+    held_tickets = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = ShowSession
+        fields = ["id", "show_time", "available_tickets", "held_tickets"]
+
+
 class ShowSessionRetrieveSerializer(ShowSessionSerializer):
     astronomy_show = AstronomyShowListSerializer()
     planetarium_dome = serializers.SlugRelatedField(read_only=True, slug_field="name")
-    taken_tickets = ShowSessionTicketSerializer(many=True, source="tickets")
+    taken_tickets = serializers.ListField(
+        child=serializers.DictField(child=serializers.IntegerField()),
+        source="taken_seats",
+        read_only=True,
+    )
+    held_tickets = serializers.SerializerMethodField()
 
     class Meta:
         model = ShowSession
-        fields = ShowSessionSerializer.Meta.fields + ["taken_tickets"]
+        fields = ShowSessionSerializer.Meta.fields + ["taken_tickets", "held_tickets"]
+
+    def get_held_tickets(self, obj) -> list[dict]:
+        # Async views look the holds up beforehand with the async ORM
+        held_seats = self.context.get("held_seats")
+        if held_seats is None:
+            held_seats = SeatHold.active_seats([obj.id])
+
+        return [{"seat": seat, "row": row} for _, row, seat in sorted(held_seats)]
 
 
 class TicketRetrieveSerializer(TicketListSerializer):
     show_session = ShowSessionListSerializer()
 
 
+def lock_show_sessions(items: list[dict]) -> dict[int, ShowSession]:
+    return (
+        ShowSession.objects.select_for_update(of=("self",))
+        .select_related("planetarium_dome")
+        .order_by("id")
+        .in_bulk({item["show_session"].id for item in items})
+    )
+
+
+def get_unavailable_seats(
+    items: list[dict], show_sessions: dict[int, ShowSession], user, held_seats=None
+) -> list[tuple[int, int, int]]:
+    """Requested seats that are sold or held by another user"""
+    if held_seats is None:
+        held_seats = SeatHold.active_seats(list(show_sessions), exclude_user=user)
+    return sorted(
+        (item["show_session"].id, item["row"], item["seat"])
+        for item in items
+        if (item["show_session"].id, item["row"], item["seat"]) in held_seats
+        or show_sessions[item["show_session"].id].is_seat_taken(
+            item["row"], item["seat"]
+        )
+    )
+
+
+def get_best_available_tickets(
+    best_available: dict, show_sessions: dict[int, ShowSession], user, held_seats=None
+) -> list[dict]:
+    """Tickets for the best free seats together, the session must be locked"""
+    show_session = best_available["show_session"]
+    if held_seats is None:
+        held_seats = SeatHold.active_seats([show_session.id], exclude_user=user)
+    seats = show_sessions[show_session.id].best_available_seats(
+        best_available["count"],
+        unavailable=[
+            (row, seat)
+            for session_id, row, seat in held_seats
+            if session_id == show_session.id
+        ],
+    )
+    if not seats:
+        raise SeatsNotTogether(best_available["count"])
+
+    return [
+        {"row": row, "seat": seat, "show_session": show_session} for row, seat in seats
+    ]
+
+
+def get_sold_seats(tickets: list[dict]) -> list[tuple[int, int, int]]:
+    """Requested seats that already have a ticket, read from the ticket table"""
+    return sorted(
+        Ticket.objects.filter(
+            reduce(
+                or_,
+                (
+                    Q(
+                        show_session=ticket["show_session"],
+                        row=ticket["row"],
+                        seat=ticket["seat"],
+                    )
+                    for ticket in tickets
+                ),
+            )
+        ).values_list("show_session_id", "row", "seat")
+    )
+
+
+def hold_seats(holds: list[dict]) -> list[SeatHold]:
+    user = holds[0]["user"]
+    now = timezone.now()
+
+    with transaction.atomic():
+        show_sessions = lock_show_sessions(holds)
+        # Expired holds are only reclaimed here, for the sessions being held
+        SeatHold.objects.filter(
+            show_session__in=list(show_sessions), expires_at__lte=now
+        ).delete()
+        held_seats = set()
+        own_seats = defaultdict(set)
+        for session_id, row, seat, user_id in SeatHold.objects.filter(
+            show_session__in=list(show_sessions), expires_at__gt=now
+        ).values_list("show_session_id", "row", "seat", "user_id"):
+            if user_id == user.id:
+                own_seats[session_id].add((row, seat))
+            else:
+                held_seats.add((session_id, row, seat))
+
+        unavailable_seats = get_unavailable_seats(
+            holds, show_sessions, user, held_seats
+        )
+        if unavailable_seats:
+            raise SeatConflict(unavailable_seats)
+
+        # Holds being renewed count once
+        for hold in holds:
+            own_seats[hold["show_session"].id].add((hold["row"], hold["seat"]))
+        limit = settings.SEAT_HOLD_MAX_PER_SESSION
+        over_limit = sorted(
+            session_id for session_id, seats in own_seats.items() if len(seats) > limit
+        )
+        if over_limit:
+            raise serializers.ValidationError(
+                [
+                    f"No more than {limit} seats can be held in show session "
+                    f"{session_id}."
+                    for session_id in over_limit
+                ]
+            )
+
+        expires_at = now + timedelta(minutes=settings.SEAT_HOLD_MINUTES)
+        return SeatHold.objects.bulk_create(
+            [SeatHold(expires_at=expires_at, **hold) for hold in holds],
+            update_conflicts=True,
+            unique_fields=["row", "seat", "show_session"],
+            update_fields=["expires_at"],
+        )
+
+
+class SeatHoldListSerializer(SeatBatchSerializer):
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("allow_empty", False)
+        kwargs.setdefault("max_length", settings.SEAT_HOLD_MAX_PER_REQUEST)
+        super().__init__(*args, **kwargs)
+
+    def create(self, validated_data):
+        return hold_seats(validated_data)
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    show_session = ShowSessionField()
+
+    class Meta:
+        model = SeatHold
+        fields = ["id", "row", "seat", "show_session", "expires_at"]
+        read_only_fields = ["expires_at"]
+        # Held and sold seats are checked for the whole batch under a lock
+        validators = []
+        list_serializer_class = SeatHoldListSerializer
+
+    def validate(self, attrs):
+        Ticket.validate_seat_row(
+            attrs["row"],
+            attrs["seat"],
+            attrs["show_session"].planetarium_dome,
+        )
+        return attrs
+
+    def create(self, validated_data):
+        return hold_seats([validated_data])[0]
+
+
+class BestAvailableSerializer(serializers.Serializer):
+    show_session = ShowSessionField()
+    count = serializers.IntegerField(min_value=1)
+
+    def validate(self, attrs):
+        seats_in_row = attrs["show_session"].planetarium_dome.seats_in_row
+        if attrs["count"] > seats_in_row:
+            raise serializers.ValidationError(
+                {"count": f"At most {seats_in_row} seats fit in a row."}
+            )
+        return attrs
+
+
 class ReservationSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True)
+    tickets = TicketSerializer(many=True, required=False)
+    # Seats together chosen by the server instead of tickets
+    best_available = BestAvailableSerializer(write_only=True, required=False)
 
     class Meta:
         model = Reservation
-        fields = ["id", "created_at", "tickets"]
+        fields = ["id", "created_at", "tickets", "best_available"]
+
+    def validate(self, attrs):
+        if ("tickets" in attrs) == ("best_available" in attrs):
+            raise serializers.ValidationError("Pass either tickets or best_available.")
+        return attrs
 
     def create(self, validated_data):
-        tickets = validated_data.pop("tickets")
-        reservation = Reservation.objects.create(**validated_data)
-        for ticket in tickets:
-            Ticket.objects.create(reservation=reservation, **ticket)
+        tickets = validated_data.pop("tickets", None)
+        best_available = validated_data.pop("best_available", None)
+
+        with transaction.atomic():
+            if best_available:
+                show_sessions = lock_show_sessions([best_available])
+                tickets = get_best_available_tickets(
+                    best_available, show_sessions, validated_data["user"]
+                )
+            else:
+                show_sessions = lock_show_sessions(tickets)
+                unavailable_seats = get_unavailable_seats(
+                    tickets, show_sessions, validated_data["user"]
+                )
+                if unavailable_seats:
+                    raise SeatConflict(unavailable_seats)
+
+            reservation = Reservation.objects.create(**validated_data)
+            try:
+                with transaction.atomic():
+                    Ticket.objects.bulk_create(
+                        Ticket(reservation=reservation, **ticket) for ticket in tickets
+                    )
+            except IntegrityError:
+                # seat_map is out of sync with the ticket table
+                sold_seats = get_sold_seats(tickets)
+                if not sold_seats:
+                    raise
+                raise SeatConflict(sold_seats)
+
+            seats_by_session = defaultdict(list)
+            for ticket in tickets:
+                seats_by_session[ticket["show_session"].id].append(
+                    (ticket["row"], ticket["seat"])
+                )
+            for session_id, seats in seats_by_session.items():
+                show_session = show_sessions[session_id]
+                show_session.set_seats(seats)
+                show_session.save(
+                    update_fields=["seat_map", "tickets_sold", "updated_at"]
+                )
+                # Own holds on the booked seats are converted into tickets
+                SeatHold.objects.filter(
+                    reduce(or_, (Q(row=row, seat=seat) for row, seat in seats)),
+                    user=validated_data["user"],
+                    show_session_id=session_id,
+                ).delete()
+
         return reservation
 
 
+class ArchivedShowSessionSerializer(serializers.ModelSerializer):
+    astronomy_show = serializers.SlugRelatedField(slug_field="title", read_only=True)
+    planetarium_dome = serializers.SlugRelatedField(slug_field="name", read_only=True)
+
+    class Meta:
+        model = ArchivedShowSession
+        fields = ["id", "astronomy_show", "planetarium_dome", "show_time"]
+
+
+class ArchivedTicketSerializer(serializers.ModelSerializer):
+    show_session = serializers.SlugRelatedField(
+        read_only=True,
+        slug_field="astronomy_show.title",
+    )
+
+    class Meta:
+        model = ArchivedTicket
+        fields = ["id", "row", "seat", "show_session"]
+
+
+class ArchivedTicketRetrieveSerializer(ArchivedTicketSerializer):
+    show_session = ArchivedShowSessionSerializer()
+
+
 class ReservationListSerializer(ReservationSerializer):
     tickets = TicketListSerializer(many=True)
+    # Tickets of sessions moved to the archive tables
+    archived_tickets = ArchivedTicketSerializer(many=True, read_only=True)
 
+    class Meta(ReservationSerializer.Meta):
+        fields = ReservationSerializer.Meta.fields + ["archived_tickets"]
 
-class ReservationRetrieveSerializer(ReservationSerializer):
+
+class ReservationRetrieveSerializer(ReservationListSerializer):
     tickets = TicketRetrieveSerializer(many=True)
+    archived_tickets = ArchivedTicketRetrieveSerializer(many=True, read_only=True)
+
+
+def requested_seats(reservation: dict) -> list[dict]:
+    """Tickets and best_available requests of a reservation payload"""
+    seats = reservation.get("tickets")
+    seats = list(seats) if isinstance(seats, list) else []
+    if isinstance(reservation.get("best_available"), dict):
+        seats.append(reservation["best_available"])
+    return seats
+
+
+class ReservationBatchSerializer(serializers.Serializer):
+    """Many reservations of one user validated together and written in bulk
+
+    Every item follows the ReservationSerializer rules. With atomic (the
+    default) nothing is booked unless every item can be, otherwise the
+    valid items are booked and the others reported.
+    """
+
+    reservations = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=50
+    )
+    atomic = serializers.BooleanField(default=True)
+
+    def validate(self, attrs):
+        reservations = attrs["reservations"]
+        # One query for the show sessions of every item
+        context = {
+            **self.context,
+            "show_sessions": ShowSession.objects.select_related(
+                "planetarium_dome"
+            ).in_bulk(
+                session_ids(
+                    seat
+                    for reservation in reservations
+                    for seat in requested_seats(reservation)
+                )
+            ),
+        }
+        attrs["items"] = []
+        for reservation in reservations:
+            serializer = ReservationSerializer(data=reservation, context=context)
+            if serializer.is_valid():
+                attrs["items"].append((serializer.validated_data, None))
+            else:
+                attrs["items"].append((None, serializer.errors))
+        return attrs
+
+    @staticmethod
+    def book(item: dict, show_sessions: dict[int, ShowSession], held_seats, user):
+        """Tickets of a reservation, marked taken in the locked show sessions"""
+        if "best_available" in item:
+            tickets = get_best_available_tickets(
+                item["best_available"], show_sessions, user, held_seats
+            )
+        else:
+            tickets = item["tickets"]
+            unavailable_seats = get_unavailable_seats(
+                tickets, show_sessions, user, held_seats
+            )
+            if unavailable_seats:
+                raise SeatConflict(unavailable_seats)
+
+        for ticket in tickets:
+            show_sessions[ticket["show_session"].id].set_seats(
+                [(ticket["row"], ticket["seat"])]
+            )
+        return tickets
+
+    def create(self, validated_data):
+        user = validated_data["user"]
+        atomic = validated_data["atomic"]
+        results = [
+            errors and {"status": status.HTTP_400_BAD_REQUEST, "errors": errors}
+            for _, errors in validated_data["items"]
+        ]
+        items = [
+            (index, item)
+            for index, (item, _) in enumerate(validated_data["items"])
+            if item is not None
+        ]
+        if not items or (atomic and len(items) < len(results)):
+            return self.skip_valid(results, items)
+
+        with transaction.atomic():
+            show_sessions = lock_show_sessions(
+                [seat for _, item in items for seat in requested_seats(item)]
+            )
+            held_seats = SeatHold.active_seats(list(show_sessions), exclude_user=user)
+            booked = []
+            for index, item in items:
+                try:
+                    booked.append(
+                        (index, self.book(item, show_sessions, held_seats, user))
+                    )
+                except (SeatConflict, SeatsNotTogether) as exc:
+                    results[index] = {"status": exc.status_code, "errors": exc.detail}
+            if not booked or (atomic and len(booked) < len(items)):
+                # Conflicts are found before any write, nothing to roll back
+                return self.skip_valid(results, booked)
+
+            reservations = Reservation.objects.bulk_create(
+                Reservation(user=user) for _ in booked
+            )
+            tickets = [
+                ticket
+                for _, reservation_tickets in booked
+                for ticket in reservation_tickets
+            ]
+            try:
+                with transaction.atomic():
+                    Ticket.objects.bulk_create(
+                        Ticket(reservation=reservation, **ticket)
+                        for reservation, (_, reservation_tickets) in zip(
+                            reservations, booked
+                        )
+                        for ticket in reservation_tickets
+                    )
+            except IntegrityError:
+                # seat_map is out of sync with the ticket table
+                sold_seats = get_sold_seats(tickets)
+                if not sold_seats:
+                    raise
+                raise SeatConflict(sold_seats)
+
+            # bulk_update() leaves auto_now fields alone
+            now = timezone.now()
+            booked_sessions = {ticket["show_session"].id for ticket in tickets}
+            for session_id in booked_sessions:
+                show_sessions[session_id].updated_at = now
+            ShowSession.objects.bulk_update(
+                [show_sessions[session_id] for session_id in booked_sessions],
+                ["seat_map", "tickets_sold", "updated_at"],
+            )
+            # Own holds on the booked seats are converted into tickets
+            if tickets:
+                SeatHold.objects.filter(
+                    reduce(
+                        or_,
+                        (
+                            Q(
+                                show_session_id=ticket["show_session"].id,
+                                row=ticket["row"],
+                                seat=ticket["seat"],
+                            )
+                            for ticket in tickets
+                        ),
+                    ),
+                    user=user,
+                ).delete()
+
+        prefetch_related_objects(
+            reservations, Prefetch("tickets", queryset=Ticket.objects.order_by("id"))
+        )
+        for reservation, (index, _) in zip(reservations, booked):
+            results[index] = {
+                "status": status.HTTP_201_CREATED,
+                "reservation": ReservationSerializer(
+                    reservation, context=self.context
+                ).data,
+            }
+        return results
+
+    @staticmethod
+    def skip_valid(results: list[dict], items: list[tuple]) -> list[dict]:
+        """Report items left out because another item of the batch failed"""
+        for index, _ in items:
+            results[index] = {"status": status.HTTP_424_FAILED_DEPENDENCY}
+        return results
@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from planetarium.cache import invalidate_catalog
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+
+
+def update_seat_maps(freed=(), taken=()) -> None:
+    """Free and take (show_session_id, row, seat) seats in the seat maps
+
+    Show sessions are locked in primary key order, so two tickets moving
+    between the same sessions cannot deadlock.
+    """
+    with transaction.atomic():
+        show_sessions = (
+            ShowSession.objects.select_for_update(of=("self",))
+            .select_related("planetarium_dome")
+            .filter(pk__in={seat[0] for seat in (*freed, *taken)})
+            .order_by("pk")
+        )
+        for show_session in show_sessions:
+            for seats, is_taken in ((freed, False), (taken, True)):
+                show_session.set_seats(
+                    [
+                        (row, seat)
+                        for show_session_id, row, seat in seats
+                        if show_session_id == show_session.id
+                    ],
+                    taken=is_taken,
+                )
+            show_session.save(update_fields=["seat_map", "tickets_sold", "updated_at"])
+
+
+def ticket_seat(ticket: Ticket) -> tuple[int, int, int]:
+    return ticket.show_session_id, ticket.row, ticket.seat
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_ticket_seat(sender, instance, raw, **kwargs):
+    # The seat the ticket had, freed in mark_ticket_seat when it changes
+    instance.previous_seat = None
+    if not raw and not instance._state.adding:
+        instance.previous_seat = (
+            Ticket.objects.filter(pk=instance.pk)
+            .values_list("show_session_id", "row", "seat")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Ticket)
+def mark_ticket_seat(sender, instance, created, **kwargs):
+    seat = ticket_seat(instance)
+    if created:
+        update_seat_maps(taken=[seat])
+    elif instance.previous_seat and instance.previous_seat != seat:
+        update_seat_maps(freed=[instance.previous_seat], taken=[seat])
+
+
+@receiver(post_delete, sender=Ticket)
+def free_ticket_seat(sender, instance, **kwargs):
+    update_seat_maps(freed=[ticket_seat(instance)])
+
+
+@receiver(post_save, sender=AstronomyShow)
+@receiver(post_save, sender=ShowTheme)
+@receiver(post_save, sender=PlanetariumDome)
+@receiver(post_delete, sender=AstronomyShow)
+@receiver(post_delete, sender=ShowTheme)
+@receiver(post_delete, sender=PlanetariumDome)
+@receiver(m2m_changed, sender=AstronomyShow.themes.through)
+def invalidate_catalog_cache(sender, **kwargs):
+    if kwargs.get("action", "post_").startswith("post_"):
+        # Invalidate again after commit so a response cached from
+        # the old rows between the write and the commit is dropped too
+        invalidate_catalog()
+        transaction.on_commit(invalidate_catalog)
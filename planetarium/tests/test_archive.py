@@ -0,0 +1,134 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import (
+    ArchivedShowSession,
+    ArchivedTicket,
+    Reservation,
+    SeatHold,
+    ShowSession,
+    Ticket,
+)
+from planetarium.tests.test_astronomy_show_api import sample_show
+from planetarium.tests.test_planetarium_dome_api import sample_dome
+from planetarium.tests.test_reservation_api import RESERVATION_URL, detail_url
+
+
+class ArchiveSessionsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.dome = sample_dome()
+        now = timezone.now()
+        self.old_sessions = [
+            self.sample_session(now - timedelta(days=days)) for days in (400, 410, 420)
+        ]
+        self.session = self.sample_session(now + timedelta(days=1))
+
+        self.reservation = Reservation.objects.create(user=self.user)
+        for session in self.old_sessions + [self.session]:
+            Ticket.objects.create(
+                row=1, seat=1, show_session=session, reservation=self.reservation
+            )
+        SeatHold.objects.create(
+            row=2,
+            seat=2,
+            show_session=self.old_sessions[0],
+            user=self.user,
+            expires_at=now + timedelta(minutes=5),
+        )
+
+    def sample_session(self, show_time) -> ShowSession:
+        return ShowSession.objects.create(
+            astronomy_show=sample_show(title=f"Archive {show_time}"),
+            planetarium_dome=self.dome,
+            show_time=show_time,
+        )
+
+    def archive(self, **options) -> str:
+        out = StringIO()
+        call_command("archive_sessions", stdout=out, **options)
+        return out.getvalue()
+
+    def test_archive_old_sessions_in_batches(self):
+        old_tickets = set(
+            Ticket.objects.filter(show_session__in=self.old_sessions).values_list(
+                "id", "row", "seat", "show_session", "reservation"
+            )
+        )
+
+        output = self.archive(days=365, batch_size=2)
+
+        self.assertIn("3 show sessions and 3 tickets", output)
+        self.assertIn("in 2 batches", output)
+        self.assertEqual(list(ShowSession.objects.all()), [self.session])
+        self.assertEqual(Ticket.objects.get().show_session, self.session)
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertEqual(
+            set(
+                ArchivedTicket.objects.values_list(
+                    "id", "row", "seat", "show_session", "reservation"
+                )
+            ),
+            old_tickets,
+        )
+
+        archived = ArchivedShowSession.objects.get(id=self.old_sessions[0].id)
+        self.assertEqual(archived.show_time, self.old_sessions[0].show_time)
+        self.assertEqual(archived.astronomy_show, self.old_sessions[0].astronomy_show)
+        self.assertEqual(archived.tickets_sold, 1)
+        # Archived tickets are not freed from the live seat map on their way out
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.tickets_sold, 1)
+
+        self.assertIn("0 show sessions", self.archive(days=365))
+
+    def test_archive_horizon(self):
+        self.archive(days=415)
+
+        self.assertEqual(ArchivedShowSession.objects.count(), 1)
+        self.assertEqual(ShowSession.objects.count(), 3)
+
+    def test_invalid_options_rejected(self):
+        for options in ({"days": 0}, {"days": -1}, {"batch_size": 0}):
+            with self.subTest(**options), self.assertRaises(CommandError):
+                self.archive(**options)
+
+        with override_settings(ARCHIVE_AFTER_DAYS=0), self.assertRaises(CommandError):
+            self.archive()
+
+        self.assertFalse(ArchivedShowSession.objects.exists())
+        self.assertTrue(SeatHold.objects.exists())
+
+    def test_reservation_history_readable(self):
+        self.archive(days=365)
+
+        response = self.client.get(RESERVATION_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        reservation = response.data["results"][0]
+        self.assertEqual(len(reservation["tickets"]), 1)
+        self.assertEqual(
+            [ticket["show_session"] for ticket in reservation["archived_tickets"]],
+            [session.astronomy_show.title for session in self.old_sessions],
+        )
+
+        with override_settings(FAST_LIST_SERIALIZERS=True):
+            self.assertEqual(self.client.get(RESERVATION_URL).content, response.content)
+
+        response = self.client.get(detail_url(self.reservation.id))
+        archived_session = response.data["archived_tickets"][0]["show_session"]
+        self.assertEqual(archived_session["id"], self.old_sessions[0].id)
+        self.assertEqual(archived_session["planetarium_dome"], self.dome.name)
@@ -1,4 +1,7 @@
+from unittest import skipUnless
+
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
 from django.urls import reverse
 
@@ -6,6 +9,7 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 from planetarium.models import AstronomyShow
+from planetarium.search import search_astronomy_shows
 from planetarium.serializers import (
     AstronomyShowListSerializer,
     AstronomyShowRetrieveSerializer,
@@ -107,6 +111,52 @@ class PrivateShowThemeApiTests(TestCase):
         self.assertNotIn(serializer.data, response.data["results"])
         self.assertIn(serializer_with_expected_show.data, response.data["results"])
 
+    def test_search_astronomy_shows_by_title_and_description(self):
+        sample_show(title="Saturn rings", description="A tour of the planet")
+        in_description = sample_show(
+            title="Night sky", description="Rings of Saturn and its moons"
+        )
+        in_title = sample_show(title="Saturn", description="Gas giant")
+        sample_show(title="Mars", description="The red planet")
+
+        response = self.client.get(ASTRONOMY_SHOW_URL, {"search": "saturn moons"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [show["id"] for show in response.data["results"]], [in_description.id]
+        )
+
+        response = self.client.get(ASTRONOMY_SHOW_URL, {"search": "saturn"})
+        ids = [show["id"] for show in response.data["results"]]
+
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(ids[-1], in_description.id)
+        self.assertIn(in_title.id, ids[:2])
+
+    def test_search_astronomy_shows_ignores_query_syntax(self):
+        sample_show(title="Comets", description="Dirty snowballs")
+
+        response = self.client.get(ASTRONOMY_SHOW_URL, {"search": '"comets" OR ('})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @skipUnless(connection.vendor == "postgresql", "PostgreSQL indexes")
+    def test_search_uses_indexes(self):
+        queryset = search_astronomy_shows(AstronomyShow.objects.all(), "saturn")
+        title_queryset = AstronomyShow.objects.filter(title__icontains="saturn")
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            has_trigram = cursor.fetchone() is not None
+            cursor.execute("SET enable_seqscan = off")
+            search_plan = queryset.explain()
+            title_plan = title_queryset.explain()
+            cursor.execute("SET enable_seqscan = on")
+
+        self.assertIn("astronomyshow_search_idx", search_plan)
+        if has_trigram:
+            self.assertIn("astronomyshow_title_trgm_idx", title_plan)
+
     def test_post_astronomy_show_forbidden(self):
         payload = DEFAULT_PAYLOAD
 
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.cache import catalog_cache
+from planetarium.models import AstronomyShow, SeatHold, ShowSession
+from planetarium.tests.test_show_session_api import sample_session
+
+
+def page_results(response) -> list:
+    return response.data["results"]
+
+
+class PublicAsyncReadApiTest(TestCase):
+    def test_auth_required(self):
+        res = APIClient().get(reverse("planetarium:async-showsession-list"))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AsyncReadApiTests(TestCase):
+    def setUp(self):
+        catalog_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.session = sample_session()
+        ShowSession.objects.create(
+            astronomy_show=AstronomyShow.objects.create(
+                title="Another show", description=""
+            ),
+            planetarium_dome=self.session.planetarium_dome,
+            show_time=self.session.show_time + timedelta(hours=2),
+        )
+
+    def assert_same_response(self, url_name, args=None):
+        sync_res = self.client.get(reverse(f"planetarium:{url_name}", args=args))
+        async_res = self.client.get(reverse(f"planetarium:async-{url_name}", args=args))
+
+        self.assertEqual(sync_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_res.status_code, status.HTTP_200_OK)
+        if "results" in sync_res.data:
+            self.assertEqual(page_results(sync_res), page_results(async_res))
+        else:
+            self.assertEqual(sync_res.data, async_res.data)
+
+    def test_async_endpoints_match_sync_endpoints(self):
+        SeatHold.objects.create(
+            row=1,
+            seat=1,
+            show_session=self.session,
+            user=self.user,
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        show_id = self.session.astronomy_show_id
+
+        self.assert_same_response("showsession-list")
+        self.assert_same_response("showsession-detail", [self.session.id])
+        self.assert_same_response("astronomyshow-list")
+        self.assert_same_response("astronomyshow-detail", [show_id])
+        self.assert_same_response("planetariumdome-list")
+
+    def test_async_availability_matches_sync(self):
+        params = {"ids": str(self.session.id)}
+        sync_res = self.client.get(
+            reverse("planetarium:showsession-availability"), params
+        )
+        async_res = self.client.get(
+            reverse("planetarium:async-showsession-availability"), params
+        )
+
+        self.assertEqual(async_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_res.data, sync_res.data)
+
+    def test_async_detail_not_found(self):
+        res = self.client.get(reverse("planetarium:async-showsession-detail", args=[0]))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_async_endpoints_are_read_only(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        res = self.client.post(reverse("planetarium:async-astronomyshow-list"), {})
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class AsyncBenchmarkTests(TransactionTestCase):
+    def test_benchmark_asgi(self):
+        sample_session()
+        out = StringIO()
+        with override_settings(DEBUG=False):
+            call_command("benchmark_asgi", concurrency=2, requests=4, stdout=out)
+
+        self.assertIn('"asgi"', out.getvalue())
@@ -0,0 +1,38 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from planetarium.models import Ticket
+from planetarium.tests.test_reservation_api import sample_reservation
+from planetarium.tests.test_show_session_api import sample_session
+
+
+class BenchmarkReservationsTests(TestCase):
+    def test_row_by_row_runs_one_insert_per_ticket(self):
+        out = StringIO()
+        call_command("benchmark_reservations", sizes="10", repeats=1, stdout=out)
+
+        row_by_row = next(
+            line for line in out.getvalue().splitlines() if "row-by-row" in line
+        )
+        # The reservation and its ten tickets, no seat map updates
+        self.assertIn(" 11 queries", row_by_row)
+
+    def test_seat_map_signals_reconnected(self):
+        call_command("benchmark_reservations", sizes="1", repeats=1, stdout=StringIO())
+        user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpass"
+        )
+        show_session = sample_session()
+
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=show_session,
+            reservation=sample_reservation(user),
+        )
+        show_session.refresh_from_db()
+
+        self.assertEqual(show_session.tickets_sold, 1)
@@ -0,0 +1,124 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from planetarium.models import AstronomyShow, Reservation, ShowSession, Ticket
+from planetarium.tests.test_show_session_api import sample_session
+
+
+class BulkLoadTests(TestCase):
+    def write_ndjson(self, objects: list[dict]) -> str:
+        fixture = tempfile.NamedTemporaryFile(
+            "w", suffix=".ndjson", delete=False, encoding="utf-8"
+        )
+        with fixture:
+            for obj in objects:
+                fixture.write(json.dumps(obj) + "\n")
+        self.addCleanup(os.remove, fixture.name)
+        return fixture.name
+
+    def test_load_data_fixture(self):
+        out = StringIO()
+        call_command("bulk_load", str(settings.BASE_DIR / "data.json"), stdout=out)
+
+        self.assertIn("rows/s", out.getvalue())
+        self.assertEqual(Ticket.objects.count(), 5)
+        self.assertEqual(AstronomyShow.themes.through.objects.count(), 3)
+        self.assertEqual(
+            Reservation.objects.get(id=1).created_at.isoformat(),
+            "2024-10-12T09:19:59.514000+00:00",
+        )
+        self.assertEqual(
+            ShowSession.objects.get(id=1).tickets_sold,
+            Ticket.objects.filter(show_session_id=1).count(),
+        )
+        call_command("rebuild_seat_maps", "--verify", stdout=StringIO())
+
+    def test_tickets_before_sessions_and_for_existing_sessions(self):
+        user = get_user_model().objects.create_user(email="test@test.com")
+        existing = sample_session()
+        dome_id = existing.planetarium_dome_id
+        objects = [
+            {
+                "model": "planetarium.reservation",
+                "pk": 100,
+                "fields": {"created_at": "2024-10-12T09:00:00Z", "user": user.id},
+            },
+            {
+                "model": "planetarium.ticket",
+                "pk": 100,
+                "fields": {
+                    "row": 2,
+                    "seat": 3,
+                    "show_session": 100,
+                    "reservation": 100,
+                },
+            },
+            {
+                "model": "planetarium.ticket",
+                "pk": 101,
+                "fields": {
+                    "row": 1,
+                    "seat": 1,
+                    "show_session": existing.id,
+                    "reservation": 100,
+                },
+            },
+            {
+                "model": "planetarium.astronomyshow",
+                "pk": 100,
+                "fields": {"title": "Loaded show", "description": "", "themes": []},
+            },
+            {
+                "model": "planetarium.showsession",
+                "pk": 100,
+                "fields": {
+                    "astronomy_show": 100,
+                    "planetarium_dome": dome_id,
+                    "show_time": "2024-10-15T14:00:00Z",
+                },
+            },
+        ]
+
+        call_command(
+            "bulk_load", self.write_ndjson(objects), batch_size=1, stdout=StringIO()
+        )
+
+        loaded = ShowSession.objects.get(id=100)
+        existing.refresh_from_db()
+        self.assertEqual(loaded.taken_seats, [{"seat": 3, "row": 2}])
+        self.assertEqual(existing.taken_seats, [{"seat": 1, "row": 1}])
+        self.assertEqual(existing.tickets_sold, 1)
+
+    def test_invalid_seat_loads_nothing(self):
+        user = get_user_model().objects.create_user(email="test@test.com")
+        session = sample_session()
+        dome = session.planetarium_dome
+        objects = [
+            {
+                "model": "planetarium.reservation",
+                "pk": 100,
+                "fields": {"created_at": "2024-10-12T09:00:00Z", "user": user.id},
+            },
+            {
+                "model": "planetarium.ticket",
+                "pk": 100,
+                "fields": {
+                    "row": dome.rows + 1,
+                    "seat": 1,
+                    "show_session": session.id,
+                    "reservation": 100,
+                },
+            },
+        ]
+
+        with self.assertRaisesMessage(CommandError, "row number must be"):
+            call_command("bulk_load", self.write_ndjson(objects), stdout=StringIO())
+
+        self.assertFalse(Reservation.objects.exists())
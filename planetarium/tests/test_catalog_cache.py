@@ -0,0 +1,119 @@
+import warnings
+
+from django.contrib.auth import get_user_model
+from django.core.cache import CacheKeyWarning
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from planetarium.cache import catalog_cache, get_catalog_cache_stats
+from planetarium.tests.test_astronomy_show_api import (
+    ASTRONOMY_SHOW_URL,
+    detail_url,
+    sample_show,
+)
+from planetarium.tests.test_planetarium_dome_api import (
+    PLANETARIUM_DOME_URL,
+    sample_dome,
+)
+from planetarium.tests.test_show_theme_api import sample_theme
+
+CATALOG_CACHE_URL = reverse("planetarium:catalog-cache")
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        catalog_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_served_from_cache(self):
+        sample_dome()
+
+        first = self.client.get(PLANETARIUM_DOME_URL)
+        with self.assertNumQueries(0):
+            second = self.client.get(PLANETARIUM_DOME_URL)
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(get_catalog_cache_stats(), {"hits": 1, "misses": 1})
+
+    def test_query_params_are_part_of_key(self):
+        sample_dome(name="main")
+        sample_dome(name="small")
+
+        self.client.get(PLANETARIUM_DOME_URL, {"name": "main"})
+        response = self.client.get(PLANETARIUM_DOME_URL, {"name": "small"})
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["name"], "small")
+
+    def test_key_safe_for_any_query_string(self):
+        sample_dome(name="main dome")
+        params = {"name": "main dome\t", "ignored": "x" * 500}
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", CacheKeyWarning)
+            first = self.client.get(PLANETARIUM_DOME_URL, params)
+            second = self.client.get(PLANETARIUM_DOME_URL, params)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second["X-Cache"], "HIT")
+
+    def test_save_invalidates_cache(self):
+        dome = sample_dome()
+        self.client.get(PLANETARIUM_DOME_URL)
+
+        dome.name = "renamed"
+        dome.save()
+        response = self.client.get(PLANETARIUM_DOME_URL)
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["name"], "renamed")
+
+    def test_themes_change_invalidates_cache(self):
+        show = sample_show()
+        self.client.get(detail_url(show.id))
+        self.client.get(ASTRONOMY_SHOW_URL)
+
+        show.themes.add(sample_theme(name="galaxies"))
+        detail = self.client.get(detail_url(show.id))
+        shows = self.client.get(ASTRONOMY_SHOW_URL)
+
+        self.assertEqual(detail["X-Cache"], "MISS")
+        self.assertEqual(detail.data["themes"][0]["name"], "galaxies")
+        self.assertEqual(shows.data["results"][0]["themes"], ["galaxies"])
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "mirror.test"])
+    def test_host_is_part_of_key(self):
+        for index in range(5):
+            sample_dome(name=f"dome{index}")
+
+        self.client.get(PLANETARIUM_DOME_URL)
+        response = self.client.get(PLANETARIUM_DOME_URL, HTTP_HOST="mirror.test")
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertTrue(response.data["next"].startswith("http://mirror.test/"))
+
+    def test_stats_staff_only(self):
+        response = self.client.get(CATALOG_CACHE_URL)
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_stats(self):
+        self.user.is_staff = True
+        self.user.save()
+        sample_dome()
+        self.client.get(PLANETARIUM_DOME_URL)
+        self.client.get(PLANETARIUM_DOME_URL)
+
+        response = self.client.get(CATALOG_CACHE_URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"hits": 1, "misses": 1})
@@ -0,0 +1,130 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.cache import catalog_cache
+from planetarium.models import Reservation, SeatHold, Ticket
+from planetarium.tests.test_astronomy_show_api import detail_url as show_detail_url
+from planetarium.tests.test_planetarium_dome_api import PLANETARIUM_DOME_URL
+from planetarium.tests.test_show_session_api import detail_url, sample_session
+from planetarium.tests.test_show_theme_api import sample_theme
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        catalog_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.session = sample_session()
+
+    def get_again(self, url, response):
+        return self.client.get(url, headers={"If-None-Match": response["ETag"]})
+
+    def test_catalog_list_not_modified(self):
+        first = self.client.get(PLANETARIUM_DOME_URL)
+        with self.assertNumQueries(0):
+            second = self.get_again(PLANETARIUM_DOME_URL, first)
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second.content, b"")
+
+        dome = self.session.planetarium_dome
+        dome.name = "renamed"
+        dome.save()
+        third = self.get_again(PLANETARIUM_DOME_URL, first)
+
+        self.assertEqual(third.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(third["ETag"], first["ETag"])
+        self.assertEqual(third.data["results"][0]["name"], "renamed")
+
+    def test_catalog_detail_not_modified(self):
+        url = show_detail_url(self.session.astronomy_show_id)
+        first = self.client.get(url)
+
+        self.assertEqual(self.get_again(url, first).status_code, 304)
+
+        self.session.astronomy_show.themes.add(sample_theme(name="galaxies"))
+        response = self.get_again(url, first)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["themes"][0]["name"], "galaxies")
+
+    def test_cleared_catalog_cache_changes_etag(self):
+        first = self.client.get(PLANETARIUM_DOME_URL)
+        catalog_cache().clear()
+
+        self.assertEqual(self.get_again(PLANETARIUM_DOME_URL, first).status_code, 200)
+
+    def test_session_detail_not_modified_without_loading_it(self):
+        url = detail_url(self.session.id)
+        first = self.client.get(url)
+
+        self.assertIn("Last-Modified", first)
+        # Versions and active holds only, the session is not serialized
+        with self.assertNumQueries(2):
+            second = self.get_again(url, first)
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+        async_response = self.get_again(
+            reverse("planetarium:async-showsession-detail", args=[self.session.id]),
+            first,
+        )
+        self.assertEqual(async_response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_session_detail_changes(self):
+        url = detail_url(self.session.id)
+        responses = [self.client.get(url)]
+
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=1, seat=1, show_session=self.session, reservation=reservation
+        )
+        responses.append(self.get_again(url, responses[-1]))
+
+        SeatHold.objects.create(
+            row=1,
+            seat=2,
+            show_session=self.session,
+            user=self.user,
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        responses.append(self.get_again(url, responses[-1]))
+
+        show = self.session.astronomy_show
+        show.title = "renamed"
+        show.save()
+        responses.append(self.get_again(url, responses[-1]))
+
+        self.assertEqual([response.status_code for response in responses], [200] * 4)
+        self.assertEqual(len({response["ETag"] for response in responses}), 4)
+        self.assertEqual(responses[1].data["taken_tickets"], [{"seat": 1, "row": 1}])
+        self.assertEqual(responses[2].data["held_tickets"], [{"seat": 2, "row": 1}])
+        self.assertEqual(responses[3].data["astronomy_show"]["title"], "renamed")
+
+    def test_if_modified_since_alone_is_not_enough(self):
+        url = detail_url(self.session.id)
+        first = self.client.get(url)
+
+        response = self.client.get(
+            url, headers={"If-Modified-Since": first["Last-Modified"]}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_missing_session(self):
+        response = self.client.get(detail_url(0), headers={"If-None-Match": "*"})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
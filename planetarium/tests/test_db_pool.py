@@ -0,0 +1,62 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.pool import check_pool, get_pool, pool_stats
+from planetarium.tests.test_show_session_api import sample_session
+
+DB_POOL_URL = reverse("planetarium:db-pool")
+
+
+class DatabasePoolApiTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_staff_only(self):
+        res = self.client.get(DB_POOL_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_pool_stats(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        res = self.client.get(DB_POOL_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["pooled"], get_pool() is not None)
+
+    @skipUnless(connection.settings_dict["OPTIONS"].get("pool"), "Pooled database")
+    def test_pool_validated(self):
+        out = StringIO()
+        call_command("wait_for_db", attempts=1, stdout=out)
+        stats = pool_stats()
+
+        self.assertIn("Connection pool filled", out.getvalue())
+        self.assertGreaterEqual(check_pool(), stats["min_size"])
+        self.assertEqual(stats["timeouts"], 0)
+
+
+@skipUnless(connection.vendor == "postgresql", "PostgreSQL connections")
+class PoolBenchmarkTests(TransactionTestCase):
+    def test_benchmark_pool(self):
+        sample_session()
+        out = StringIO()
+
+        call_command("benchmark_pool", threads=2, requests=6, stdout=out)
+
+        self.assertIn('"no_pool"', out.getvalue())
+        self.assertIn('"requests": 6', out.getvalue())
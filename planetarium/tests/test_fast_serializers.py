@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from planetarium.cache import catalog_cache
+from planetarium.fast_serializers import fast_serializer
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+from planetarium.serializers import (
+    ReservationListSerializer,
+    ShowSessionListSerializer,
+    ShowSessionRetrieveSerializer,
+)
+
+
+class FastListSerializerTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        dome = PlanetariumDome.objects.create(name="Main", rows=10, seats_in_row=12)
+        themes = [ShowTheme.objects.create(name=name) for name in ("Moon", "Sun")]
+        for index in range(6):
+            show = AstronomyShow.objects.create(
+                title=f"Show {index}", description=f"About {index}"
+            )
+            show.themes.set(themes[: index % 3])
+            session = ShowSession.objects.create(
+                astronomy_show=show,
+                planetarium_dome=dome,
+                show_time=timezone.now() + timedelta(days=index + 1, microseconds=7),
+            )
+            reservation = Reservation.objects.create(user=self.user)
+            Ticket.objects.bulk_create(
+                Ticket(row=1, seat=seat, show_session=session, reservation=reservation)
+                for seat in range(1, index + 2)
+            )
+
+    def get_both(self, url):
+        responses = []
+        for fast in (False, True):
+            catalog_cache().clear()
+            with override_settings(FAST_LIST_SERIALIZERS=fast), CaptureQueriesContext(
+                connection
+            ) as queries:
+                responses.append((self.client.get(url), len(queries)))
+        return responses
+
+    def test_list_endpoints_identical(self):
+        for url_name in ("showsession-list", "astronomyshow-list", "reservation-list"):
+            with self.subTest(url_name):
+                (regular, regular_queries), (fast, fast_queries) = self.get_both(
+                    reverse(f"planetarium:{url_name}")
+                )
+
+                self.assertEqual(regular.status_code, 200)
+                self.assertEqual(fast.content, regular.content)
+                self.assertLessEqual(fast_queries, regular_queries)
+
+    def test_paginated_and_filtered_lists_identical(self):
+        regular, fast = self.get_both(reverse("planetarium:showsession-list"))
+        self.assertEqual(fast[0].content, regular[0].content)
+
+        next_url = regular[0].data["next"]
+        regular, fast = self.get_both(next_url)
+        self.assertEqual(fast[0].content, regular[0].content)
+
+        regular, fast = self.get_both(
+            f"{reverse('planetarium:astronomyshow-list')}?title=show 2"
+        )
+        self.assertEqual(fast[0].content, regular[0].content)
+
+    def test_same_data_as_serializer(self):
+        serializer = fast_serializer(ReservationListSerializer)
+        queryset = Reservation.objects.filter(user=self.user)
+
+        self.assertEqual(
+            serializer.to_representation(serializer.rows(queryset)),
+            ReservationListSerializer(queryset, many=True).data,
+        )
+        self.assertEqual(
+            fast_serializer(ShowSessionListSerializer).lookups[:3],
+            ["id", "astronomy_show__title", "planetarium_dome__name"],
+        )
+
+    def test_unsupported_fields(self):
+        with self.assertRaises(ImproperlyConfigured):
+            fast_serializer(ShowSessionRetrieveSerializer)
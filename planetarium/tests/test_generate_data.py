@@ -0,0 +1,54 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db.models import Sum
+from django.test import TestCase
+
+from planetarium.models import Reservation, ShowSession, Ticket
+
+
+def generate(**options) -> None:
+    defaults = {"domes": 3, "shows": 4, "sessions": 10, "users": 5}
+    defaults.update(options)
+    call_command("generate_data", start="2030-01-01", stdout=StringIO(), **defaults)
+
+
+class GenerateDataTests(TestCase):
+    def test_generated_data_is_consistent(self):
+        generate(fill=0.5)
+
+        self.assertEqual(ShowSession.objects.count(), 10)
+        self.assertEqual(
+            Ticket.objects.count(),
+            ShowSession.objects.aggregate(Sum("tickets_sold"))["tickets_sold__sum"],
+        )
+        self.assertFalse(Reservation.objects.filter(tickets__isnull=True).exists())
+        call_command("rebuild_seat_maps", "--verify", stdout=StringIO())
+
+    def test_same_seed_generates_same_data(self):
+        generate(seed=7)
+        first = list(
+            ShowSession.objects.order_by("id").values_list(
+                "show_time", "tickets_sold", "planetarium_dome__rows"
+            )
+        )
+        last_id = ShowSession.objects.order_by("id").last().id
+
+        generate(seed=7)
+        second = list(
+            ShowSession.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("show_time", "tickets_sold", "planetarium_dome__rows")
+        )
+
+        self.assertEqual(first, second)
+
+    def test_full_fill_sells_every_seat(self):
+        generate(fill=1)
+
+        for session in ShowSession.objects.select_related("planetarium_dome"):
+            self.assertEqual(session.tickets_sold, session.planetarium_dome.total_seats)
+
+    def test_more_sessions_than_show_dome_pairs(self):
+        with self.assertRaises(CommandError):
+            generate(sessions=13)
@@ -0,0 +1,61 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from planetarium.management.commands.benchmark_endpoints import QUERY_BUDGETS
+
+
+class EndpointQueryBudgetTests(TestCase):
+    def test_endpoints_within_query_budgets(self):
+        out = StringIO()
+        call_command(
+            "benchmark_endpoints",
+            domes=3,
+            sessions=12,
+            tickets=300,
+            repeats=1,
+            stdout=out,
+        )
+        report = json.loads(out.getvalue())
+
+        for result in report["endpoints"]:
+            self.assertLess(result["status"], 400, result["endpoint"])
+            self.assertTrue(result["within_budget"], result["endpoint"])
+        self.assertCountEqual(
+            [result["endpoint"] for result in report["endpoints"]], QUERY_BUDGETS
+        )
+
+    def test_endpoint_without_budget_rejected(self):
+        budgets = dict(QUERY_BUDGETS)
+        del budgets["DELETE planetarium:seathold-detail"]
+
+        with mock.patch.dict(QUERY_BUDGETS, budgets, clear=True):
+            with self.assertRaisesMessage(
+                CommandError, "DELETE planetarium:seathold-detail"
+            ):
+                call_command("benchmark_endpoints", stdout=StringIO())
+
+    def test_cached_endpoints_counted_on_cache_miss(self):
+        out = StringIO()
+        call_command(
+            "benchmark_endpoints",
+            domes=3,
+            sessions=12,
+            tickets=300,
+            repeats=3,
+            stdout=out,
+        )
+        queries = {
+            result["endpoint"]: result["queries"]
+            for result in json.loads(out.getvalue())["endpoints"]
+        }
+
+        for endpoint in (
+            "GET planetarium:planetariumdome-list",
+            "GET planetarium:astronomyshow-detail",
+            "GET planetarium:async-astronomyshow-list",
+        ):
+            self.assertGreater(queries[endpoint], 0, endpoint)
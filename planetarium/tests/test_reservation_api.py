@@ -1,11 +1,27 @@
+import csv
+import json
+from datetime import timedelta
+from io import StringIO
+from threading import Barrier, Thread
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from planetarium.models import Reservation
+from planetarium.models import (
+    AstronomyShow,
+    Reservation,
+    SeatHold,
+    ShowSession,
+    Ticket,
+)
 from planetarium.serializers import (
     ReservationListSerializer,
     ReservationRetrieveSerializer
@@ -14,6 +30,8 @@ from planetarium.tests.test_show_session_api import sample_session
 
 
 RESERVATION_URL = reverse("planetarium:reservation-list")
+BATCH_URL = reverse("planetarium:reservation-batch")
+EXPORT_URL = reverse("planetarium:reservation-export")
 
 
 def detail_url(user_id: int) -> str:
@@ -80,3 +98,543 @@ class AuthenticatedShowThemeApiTests(TestCase):
         response = self.client.post(RESERVATION_URL, payload, format="json")
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_post_reservation_with_taken_seats(self):
+        reservation = sample_reservation(self.user)
+        Ticket.objects.create(
+            row=1, seat=1, show_session=self.session, reservation=reservation
+        )
+        Ticket.objects.create(
+            row=1, seat=2, show_session=self.session, reservation=reservation
+        )
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 1, "show_session": self.session.id},
+                {"row": 1, "seat": 2, "show_session": self.session.id},
+                {"row": 1, "seat": 3, "show_session": self.session.id},
+            ]
+        }
+        response = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            response.data["seats"],
+            [
+                {"show_session": self.session.id, "row": 1, "seat": 1},
+                {"show_session": self.session.id, "row": 1, "seat": 2},
+            ],
+        )
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertFalse(Ticket.objects.filter(seat=3).exists())
+
+    def test_post_reservation_with_seat_map_out_of_sync(self):
+        Ticket.objects.bulk_create(
+            [
+                Ticket(
+                    row=3,
+                    seat=3,
+                    show_session=self.session,
+                    reservation=sample_reservation(self.user),
+                )
+            ]
+        )
+        payload = {
+            "tickets": [
+                {"row": 3, "seat": seat, "show_session": self.session.id}
+                for seat in (2, 3)
+            ]
+        }
+        response = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            response.data["seats"],
+            [{"show_session": self.session.id, "row": 3, "seat": 3}],
+        )
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_tickets_sold_follows_reservations(self):
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": seat, "show_session": self.session.id}
+                for seat in (1, 2, 3)
+            ]
+        }
+        self.client.post(RESERVATION_URL, payload, format="json")
+        self.session.refresh_from_db()
+
+        self.assertEqual(self.session.tickets_sold, 3)
+
+        Ticket.objects.filter(seat=1).delete()
+        self.session.refresh_from_db()
+
+        self.assertEqual(self.session.tickets_sold, 2)
+
+        Reservation.objects.all().delete()
+        self.session.refresh_from_db()
+
+        self.assertEqual(self.session.tickets_sold, 0)
+
+    def test_tickets_sold_follows_moved_ticket(self):
+        other_session = ShowSession.objects.create(
+            astronomy_show=AstronomyShow.objects.create(
+                title="othershow", description="otherdesc"
+            ),
+            planetarium_dome=self.session.planetarium_dome,
+            show_time=self.session.show_time,
+        )
+        ticket = Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=self.session,
+            reservation=sample_reservation(self.user),
+        )
+
+        ticket.show_session = other_session
+        ticket.save()
+        self.session.refresh_from_db()
+        other_session.refresh_from_db()
+
+        self.assertEqual(self.session.tickets_sold, 0)
+        self.assertEqual(other_session.tickets_sold, 1)
+        call_command("reconcile_tickets_sold", "--verify", stdout=StringIO())
+
+    def test_reconcile_tickets_sold(self):
+        reservation = sample_reservation(self.user)
+        Ticket.objects.bulk_create(
+            [
+                Ticket(
+                    row=2, seat=seat, show_session=self.session, reservation=reservation
+                )
+                for seat in (1, 2)
+            ]
+        )
+
+        with self.assertRaises(CommandError):
+            call_command("reconcile_tickets_sold", "--verify", stdout=StringIO())
+
+        call_command("reconcile_tickets_sold", stdout=StringIO())
+        call_command("reconcile_tickets_sold", "--verify", stdout=StringIO())
+        self.session.refresh_from_db()
+
+        self.assertEqual(self.session.tickets_sold, 2)
+
+    def test_post_reservation_query_count_is_constant(self):
+        queries = []
+        for row, seats in ((1, [1]), (2, range(1, 7))):
+            payload = {
+                "tickets": [
+                    {"row": row, "seat": seat, "show_session": self.session.id}
+                    for seat in seats
+                ]
+            }
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(RESERVATION_URL, payload, format="json")
+
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            queries.append(len(context))
+
+        self.assertEqual(queries[0], queries[1])
+
+    def test_post_reservation_with_duplicate_seats(self):
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 1, "show_session": self.session.id},
+                {"row": 1, "seat": 2, "show_session": self.session.id},
+                {"row": 1, "seat": 1, "show_session": self.session.id},
+            ]
+        }
+        with self.assertNumQueries(1):
+            response = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("row 1", str(response.data["tickets"]))
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_post_reservation_with_unknown_session(self):
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 1, "show_session": self.session.id},
+                {"row": 1, "seat": 2, "show_session": 0},
+                {"row": 1, "seat": 3, "show_session": "first"},
+            ]
+        }
+        response = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data["tickets"]
+        self.assertEqual(errors[0], {})
+        self.assertEqual(errors[1]["show_session"][0].code, "does_not_exist")
+        self.assertEqual(errors[2]["show_session"][0].code, "incorrect_type")
+
+    def best_available(self, count: int):
+        payload = {"best_available": {"show_session": self.session.id, "count": count}}
+        return self.client.post(RESERVATION_URL, payload, format="json")
+
+    def test_post_reservation_best_available(self):
+        response = self.best_available(3)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(ticket["row"], ticket["seat"]) for ticket in response.data["tickets"]],
+            [(3, 2), (3, 3), (3, 4)],
+        )
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.tickets_sold, 3)
+
+    def test_best_available_skips_sold_and_held_seats(self):
+        other_user = get_user_model().objects.create_user(
+            email="other@test.com", password="testpass"
+        )
+        expires_at = timezone.now() + timedelta(minutes=5)
+        SeatHold.objects.create(
+            row=2,
+            seat=3,
+            show_session=self.session,
+            user=other_user,
+            expires_at=expires_at,
+        )
+        SeatHold.objects.create(
+            row=4,
+            seat=3,
+            show_session=self.session,
+            user=self.user,
+            expires_at=expires_at,
+        )
+        Ticket.objects.create(
+            row=3,
+            seat=4,
+            show_session=self.session,
+            reservation=sample_reservation(other_user),
+        )
+
+        response = self.best_available(4)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(ticket["row"], ticket["seat"]) for ticket in response.data["tickets"]],
+            [(4, 2), (4, 3), (4, 4), (4, 5)],
+        )
+        # The own hold was booked, the other user's one is untouched
+        self.assertEqual(list(SeatHold.objects.values_list("row", "seat")), [(2, 3)])
+
+    def test_best_available_rejected(self):
+        for row in range(1, 6):
+            Ticket.objects.create(
+                row=row,
+                seat=3,
+                show_session=self.session,
+                reservation=sample_reservation(self.user),
+            )
+        self.assertEqual(self.best_available(4).status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.best_available(7).status_code, 400)
+
+        payload = {
+            "tickets": [{"row": 1, "seat": 1, "show_session": self.session.id}],
+            "best_available": {"show_session": self.session.id, "count": 1},
+        }
+        response = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.session.tickets.count(), 5)
+
+
+class ReservationBatchApiTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.session = sample_session()
+
+    def reservation(self, *seats) -> dict:
+        return {
+            "tickets": [
+                {"row": row, "seat": seat, "show_session": self.session.id}
+                for row, seat in seats
+            ]
+        }
+
+    def post_batch(self, reservations, **params):
+        return self.client.post(
+            BATCH_URL, {"reservations": reservations, **params}, format="json"
+        )
+
+    def test_batch_with_constant_query_count(self):
+        SeatHold.objects.create(
+            row=2,
+            seat=1,
+            show_session=self.session,
+            user=self.user,
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        queries = []
+        for row, count in ((1, 2), (2, 6)):
+            reservations = [self.reservation((row, seat)) for seat in range(1, count)]
+            reservations.append(
+                {"best_available": {"show_session": self.session.id, "count": 2}}
+            )
+            with CaptureQueriesContext(connection) as context:
+                response = self.post_batch(reservations)
+
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            queries.append(len(context))
+
+        self.assertEqual(queries[0], queries[1])
+        self.assertEqual(Reservation.objects.count(), 8)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]], [201] * 6
+        )
+        self.assertEqual(
+            response.data["results"][0]["reservation"]["tickets"][0]["seat"], 1
+        )
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.tickets_sold, 10)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_atomic_batch_books_nothing_on_conflict(self):
+        response = self.post_batch(
+            [self.reservation((1, 1)), self.reservation((1, 2), (1, 1))]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]], [424, 409]
+        )
+        self.assertEqual(
+            response.data["results"][1]["errors"]["seats"],
+            [{"show_session": self.session.id, "row": 1, "seat": 1}],
+        )
+        self.assertFalse(Reservation.objects.exists())
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.tickets_sold, 0)
+
+    def test_non_atomic_batch_reports_each_item(self):
+        response = self.post_batch(
+            [
+                self.reservation((1, 1)),
+                self.reservation((1, 1)),
+                self.reservation((9, 1)),
+                {"best_available": {"show_session": self.session.id, "count": 3}},
+            ],
+            atomic=False,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            [201, 409, 400, 201],
+        )
+        self.assertEqual(Reservation.objects.count(), 2)
+        self.assertEqual(self.session.tickets.count(), 4)
+
+    def test_batch_with_empty_reservations(self):
+        # Like a single reservation posted without tickets
+        response = self.post_batch([{"tickets": []}, {"tickets": []}])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [result["reservation"]["tickets"] for result in response.data["results"]],
+            [[], []],
+        )
+
+        response = self.post_batch([{"tickets": []}, self.reservation((1, 1))])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.session.tickets.count(), 1)
+
+    def test_invalid_batch(self):
+        response = self.post_batch([self.reservation((1, 1)), {}])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]], [424, 400]
+        )
+
+        response = self.post_batch([self.reservation((1, 1))] * 51)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("reservations", response.data)
+        self.assertFalse(Reservation.objects.exists())
+
+
+class ReservationExportApiTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.session = sample_session()
+        self.other_session = ShowSession.objects.create(
+            astronomy_show=AstronomyShow.objects.create(
+                title="othershow", description="otherdesc"
+            ),
+            planetarium_dome=self.session.planetarium_dome,
+            show_time=self.session.show_time,
+        )
+        for session, seats in ((self.session, (1, 2)), (self.other_session, (3,))):
+            reservation = sample_reservation(self.user)
+            Ticket.objects.bulk_create(
+                Ticket(row=1, seat=seat, show_session=session, reservation=reservation)
+                for seat in seats
+            )
+
+    def test_export_forbidden_for_non_staff(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        response = client.get(EXPORT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_csv(self):
+        response = self.client.get(EXPORT_URL)
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual([row["seat"] for row in rows], ["1", "2", "3"])
+        self.assertEqual(rows[0]["user_email"], self.user.email)
+
+    def test_export_ndjson_by_session(self):
+        response = self.client.get(
+            EXPORT_URL, {"file_format": "ndjson", "session": self.other_session.id}
+        )
+        content = b"".join(response.streaming_content).decode()
+        rows = [json.loads(line) for line in content.splitlines()]
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["show_session_id"], self.other_session.id)
+        self.assertEqual(rows[0]["astronomy_show"], "othershow")
+
+    def test_export_invalid_filters(self):
+        for params in ({"session": "abc"}, {"from": "abc"}, {"file_format": "xml"}):
+            with self.subTest(**params):
+                response = self.client.get(EXPORT_URL, params)
+
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(next(iter(params)), response.data)
+
+    def test_export_by_created_date(self):
+        response = self.client.get(EXPORT_URL, {"to": "2000-01-01"})
+        content = b"".join(response.streaming_content).decode()
+
+        self.assertEqual(len(content.splitlines()), 1)
+
+    def test_export_command(self):
+        out = StringIO()
+        call_command("export_reservations", format="ndjson", stdout=out)
+
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentReservationTests(TransactionTestCase):
+    def setUp(self):
+        self.session = sample_session()
+        self.users = [
+            get_user_model().objects.create_user(
+                email=f"user{index}@test.com", password="testpass"
+            )
+            for index in range(self.session.planetarium_dome.seats_in_row)
+        ]
+
+    def book(self, barrier: Barrier, user, seats: list[int], results: list) -> None:
+        client = APIClient()
+        client.force_authenticate(user=user)
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": seat, "show_session": self.session.id}
+                for seat in seats
+            ]
+        }
+        barrier.wait()
+        try:
+            results.append(
+                client.post(RESERVATION_URL, payload, format="json").status_code
+            )
+        finally:
+            connection.close()
+
+    def test_tickets_sold_does_not_drift_under_concurrent_bookings(self):
+        barrier = Barrier(len(self.users))
+        results = []
+        threads = [
+            Thread(
+                target=self.book,
+                args=(
+                    barrier,
+                    user,
+                    [index + 1, (index + 1) % len(self.users) + 1],
+                    results,
+                ),
+            )
+            for index, user in enumerate(self.users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.session.refresh_from_db()
+
+        self.assertEqual(
+            self.session.tickets_sold,
+            Ticket.objects.filter(show_session=self.session).count(),
+        )
+        self.assertEqual(
+            self.session.tickets_sold, 2 * results.count(status.HTTP_201_CREATED)
+        )
+
+    def test_concurrent_best_available_bookings(self):
+        dome = self.session.planetarium_dome
+        barrier = Barrier(dome.rows + 1)
+        results = []
+
+        def book_row(user):
+            client = APIClient()
+            client.force_authenticate(user=user)
+            payload = {
+                "best_available": {
+                    "show_session": self.session.id,
+                    "count": dome.seats_in_row,
+                }
+            }
+            barrier.wait()
+            try:
+                results.append(
+                    client.post(RESERVATION_URL, payload, format="json").status_code
+                )
+            finally:
+                connection.close()
+
+        threads = [
+            Thread(target=book_row, args=(user,))
+            for user in self.users[: dome.rows + 1]
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.session.refresh_from_db()
+
+        self.assertEqual(
+            sorted(results),
+            [status.HTTP_201_CREATED] * dome.rows + [status.HTTP_409_CONFLICT],
+        )
+        self.assertEqual(self.session.tickets_sold, dome.total_seats)
+
+    def test_no_double_sells_under_overlapping_bookings(self):
+        out = StringIO()
+        call_command("stress_reservations", threads=8, bookings=200, stdout=out)
+
+        self.assertIn("No seat was sold twice", out.getvalue())
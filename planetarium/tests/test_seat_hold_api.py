@@ -0,0 +1,181 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import SeatHold, ShowSession, Ticket
+from planetarium.tests.test_astronomy_show_api import sample_show
+from planetarium.tests.test_reservation_api import RESERVATION_URL
+from planetarium.tests.test_show_session_api import detail_url, sample_session
+from planetarium.throttling import THROTTLE_CACHE_ALIAS
+
+
+SEAT_HOLD_URL = reverse("planetarium:seathold-list")
+
+
+def hold_payload(session, *seats) -> list[dict]:
+    return [
+        {"row": row, "seat": seat, "show_session": session.id} for row, seat in seats
+    ]
+
+
+class PublicSeatHoldApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(SEAT_HOLD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedSeatHoldApiTests(TestCase):
+    def setUp(self):
+        # User ids repeat across tests on SQLite, and so would booking throttles
+        caches[THROTTLE_CACHE_ALIAS].clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.other_user = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.other_client = APIClient()
+        self.other_client.force_authenticate(user=self.other_user)
+        self.session = sample_session()
+
+    def test_held_seats_shown_in_session_detail(self):
+        response = self.client.post(
+            SEAT_HOLD_URL, hold_payload(self.session, (1, 2), (1, 3)), format="json"
+        )
+        detail = self.client.get(detail_url(self.session.id))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            detail.data["held_tickets"], [{"seat": 2, "row": 1}, {"seat": 3, "row": 1}]
+        )
+
+    def test_seat_held_by_other_user_cannot_be_reserved(self):
+        self.client.post(
+            SEAT_HOLD_URL, hold_payload(self.session, (1, 1)), format="json"
+        )
+
+        response = self.other_client.post(
+            RESERVATION_URL,
+            {"tickets": hold_payload(self.session, (1, 1))},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(len(response.data["seats"]), 1)
+
+    def test_reservation_converts_own_holds(self):
+        self.client.post(
+            SEAT_HOLD_URL, hold_payload(self.session, (1, 1), (1, 2)), format="json"
+        )
+
+        response = self.client.post(
+            RESERVATION_URL,
+            {"tickets": hold_payload(self.session, (1, 1))},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(list(SeatHold.objects.values_list("row", "seat")), [(1, 2)])
+
+    def test_expired_hold_does_not_block(self):
+        SeatHold.objects.create(
+            row=1,
+            seat=1,
+            show_session=self.session,
+            user=self.user,
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        response = self.other_client.post(
+            SEAT_HOLD_URL, hold_payload(self.session, (1, 1)), format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.get().user, self.other_user)
+
+    def test_sold_seat_cannot_be_held(self):
+        self.other_client.post(
+            RESERVATION_URL,
+            {"tickets": hold_payload(self.session, (2, 2))},
+            format="json",
+        )
+
+        response = self.client.post(
+            SEAT_HOLD_URL, {"row": 2, "seat": 2, "show_session": self.session.id}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertTrue(Ticket.objects.filter(row=2, seat=2).exists())
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_duplicate_seats_rejected(self):
+        response = self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.session, (1, 1), (1, 2), (1, 1)),
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_empty_hold_list_rejected(self):
+        response = self.client.post(SEAT_HOLD_URL, [], format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SeatHold.objects.exists())
+
+    @override_settings(SEAT_HOLD_MAX_PER_REQUEST=3)
+    def test_seats_per_request_limited(self):
+        response = self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.session, *((1, seat) for seat in range(1, 5))),
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SeatHold.objects.exists())
+
+    @override_settings(SEAT_HOLD_MAX_PER_SESSION=3)
+    def test_seats_per_user_and_session_limited(self):
+        first = self.client.post(
+            SEAT_HOLD_URL, hold_payload(self.session, (1, 1), (1, 2)), format="json"
+        )
+        # Renewing held seats does not count them twice
+        renewed = self.client.post(
+            SEAT_HOLD_URL,
+            hold_payload(self.session, (1, 1), (1, 2), (1, 3)),
+            format="json",
+        )
+        over = self.client.post(
+            SEAT_HOLD_URL, hold_payload(self.session, (2, 1)), format="json"
+        )
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(renewed.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(over.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(SeatHold.objects.count(), 3)
+
+        other_session = ShowSession.objects.create(
+            astronomy_show=sample_show(title="Other hold limit show"),
+            planetarium_dome=self.session.planetarium_dome,
+            show_time=self.session.show_time,
+        )
+        response = self.client.post(
+            SEAT_HOLD_URL, hold_payload(other_session, (2, 1)), format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
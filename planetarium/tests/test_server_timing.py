@@ -0,0 +1,86 @@
+import re
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from planetarium.tests.test_show_session_api import sample_session
+from planetarium.timing import ServerTimingMiddleware
+
+SHOW_SESSION_URL = reverse("planetarium:showsession-list")
+
+
+def parse_server_timing(header: str) -> dict:
+    return {
+        name: (float(duration), description)
+        for name, duration, description in re.findall(
+            r'(\w+);dur=([\d.]+)(?:;desc="([^"]*)")?', header
+        )
+    }
+
+
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+            is_staff=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        sample_session()
+
+    def test_server_timing_header(self):
+        # The values() fast path of list actions is timed too
+        for fast in (False, True):
+            with self.subTest(fast=fast), override_settings(
+                FAST_LIST_SERIALIZERS=fast
+            ), CaptureQueriesContext(connection) as queries:
+                res = self.client.get(SHOW_SESSION_URL)
+
+                metrics = parse_server_timing(res["Server-Timing"])
+                self.assertEqual(set(metrics), {"db", "serializer", "view", "total"})
+                self.assertEqual(metrics["db"][1], f"{len(queries)} queries")
+                self.assertGreater(metrics["serializer"][0], 0)
+                self.assertLessEqual(metrics["view"][0], metrics["total"][0])
+
+    def test_header_only_under_debug_or_for_staff(self):
+        self.user.is_staff = False
+        self.user.save()
+
+        self.assertNotIn("Server-Timing", self.client.get(SHOW_SESSION_URL))
+
+        middleware = ServerTimingMiddleware(lambda request: HttpResponse())
+        self.assertNotIn("Server-Timing", middleware(RequestFactory().get("/")))
+        with override_settings(DEBUG=True):
+            self.assertIn("Server-Timing", middleware(RequestFactory().get("/")))
+
+    def test_log_line_keyed_by_action(self):
+        with self.assertLogs("planetarium.timing", "INFO") as logs:
+            self.client.get(SHOW_SESSION_URL)
+            self.client.get(reverse("planetarium:async-showsession-list"))
+
+        self.assertRegex(logs.output[0], r"ShowSessionViewSet\.list 200 db_queries=1 ")
+        self.assertIn("AsyncShowSessionViewSet.list 200", logs.output[1])
+        self.assertEqual(logs.records[0].view, "ShowSessionViewSet.list")
+
+    def test_async_view_queries_counted(self):
+        res = self.client.get(reverse("planetarium:async-showsession-list"))
+
+        metrics = parse_server_timing(res["Server-Timing"])
+        self.assertEqual(metrics["db"][1], "1 queries")
+
+    def test_overhead_per_request(self):
+        middleware = ServerTimingMiddleware(lambda request: HttpResponse())
+        request = RequestFactory().get("/")
+        start = time.perf_counter()
+        for _ in range(1000):
+            middleware(request)
+
+        self.assertLess((time.perf_counter() - start) / 1000, 0.0001)
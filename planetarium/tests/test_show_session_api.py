@@ -1,35 +1,53 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest import mock, skipUnless
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from planetarium.models import ShowSession
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    SeatHold,
+    ShowSession,
+    Ticket,
+)
 from planetarium.serializers import (
     ShowSessionListSerializer,
     ShowSessionRetrieveSerializer,
 )
 from planetarium.tests.test_astronomy_show_api import sample_show
 from planetarium.tests.test_planetarium_dome_api import sample_dome
+from planetarium.views import ShowSessionViewSet
 
 
 SHOW_SESSION_URL = reverse("planetarium:showsession-list")
+AVAILABILITY_URL = reverse("planetarium:showsession-availability")
 
 
 def detail_url(session_id: int) -> str:
     return reverse("planetarium:showsession-detail", args=[session_id])
 
 
+def upcoming_time(**delta) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(**(delta or {"days": 1}))
+
+
 def sample_session(**params) -> ShowSession:
     show = sample_show()
     dome = sample_dome()
     default = {
         "astronomy_show": show,
         "planetarium_dome": dome,
-        "show_time": datetime.now(),
+        "show_time": upcoming_time(),
     }
     default.update(params)
 
@@ -64,7 +82,7 @@ class PrivateShowSessionApiTests(TestCase):
         self.show_session = ShowSession.objects.create(
             astronomy_show=self.show,
             planetarium_dome=self.dome,
-            show_time=datetime.now(),
+            show_time=upcoming_time(),
         )
         self.user = get_user_model().objects.create_user(
             email="test@test.com",
@@ -85,6 +103,131 @@ class PrivateShowSessionApiTests(TestCase):
         for data in serializer.data:
             self.assertIn(data, response.data["results"])
 
+    def test_get_show_session_list_cursor_pages(self):
+        for index in range(1, 7):
+            ShowSession.objects.create(
+                astronomy_show=sample_show(title=f"paged{index}"),
+                planetarium_dome=self.dome,
+                show_time=datetime(2030, 1, 1, 20 - index, tzinfo=timezone.utc),
+            )
+        expected_ids = list(
+            ShowSession.objects.order_by("show_time", "id").values_list("id", flat=True)
+        )
+
+        ids = []
+        url = SHOW_SESSION_URL
+        while url:
+            response = self.client.get(url)
+            ids.extend(session["id"] for session in response.data["results"])
+            url = response.data["next"]
+
+        self.assertEqual(ids, expected_ids)
+
+    def test_get_show_session_list_cursor_pages_shared_show_time(self):
+        show_time = datetime(2030, 1, 1, 20, tzinfo=timezone.utc)
+        for index in range(1, 10):
+            ShowSession.objects.create(
+                astronomy_show=sample_show(title=f"tied{index}"),
+                planetarium_dome=self.dome,
+                show_time=show_time,
+            )
+        expected_ids = list(
+            ShowSession.objects.order_by("show_time", "id").values_list("id", flat=True)
+        )
+
+        for fast in (False, True):
+            with self.subTest(fast=fast), override_settings(FAST_LIST_SERIALIZERS=fast):
+                pages = []
+                url = SHOW_SESSION_URL
+                while url:
+                    response = self.client.get(url)
+                    pages.append(
+                        [session["id"] for session in response.data["results"]]
+                    )
+                    previous_url, url = response.data["previous"], response.data["next"]
+                previous_pages = []
+                while previous_url:
+                    response = self.client.get(previous_url)
+                    previous_pages.append(
+                        [session["id"] for session in response.data["results"]]
+                    )
+                    previous_url = response.data["previous"]
+
+                self.assertEqual(sum(pages, []), expected_ids)
+                self.assertEqual(previous_pages, pages[-2::-1])
+
+    def test_get_show_session_list_invalid_cursor(self):
+        response = self.client.get(SHOW_SESSION_URL, {"cursor": "cD1vb3Bz"})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_show_session_list_by_show_time(self):
+        past_session = ShowSession.objects.create(
+            astronomy_show=sample_show(title="past"),
+            planetarium_dome=self.dome,
+            show_time=upcoming_time(days=-1),
+        )
+        later_session = ShowSession.objects.create(
+            astronomy_show=sample_show(title="later"),
+            planetarium_dome=self.dome,
+            show_time=upcoming_time(days=10),
+        )
+
+        def listed_ids(params):
+            response = self.client.get(SHOW_SESSION_URL, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return {session["id"] for session in response.data["results"]}
+
+        self.assertEqual(listed_ids({}), {self.show_session.id, later_session.id})
+        self.assertIn(past_session.id, listed_ids({"upcoming": "false"}))
+        self.assertEqual(
+            listed_ids({"date": past_session.show_time.date().isoformat()}),
+            {past_session.id},
+        )
+        self.assertEqual(
+            listed_ids(
+                {
+                    "from": upcoming_time(days=2).isoformat(),
+                    "to": upcoming_time(days=11).date().isoformat(),
+                }
+            ),
+            {later_session.id},
+        )
+
+    def test_get_show_session_list_by_invalid_date(self):
+        response = self.client.get(SHOW_SESSION_URL, {"from": "tomorrow"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(connection.vendor == "postgresql", "PostgreSQL query plans")
+    def test_show_time_filter_uses_index(self):
+        # A year of past sessions in the one dome, so only show_time narrows
+        # the rows down once the planner has statistics
+        shows = AstronomyShow.objects.bulk_create(
+            AstronomyShow(title=f"indexed{index}", description="indexed")
+            for index in range(365)
+        )
+        ShowSession.objects.bulk_create(
+            ShowSession(
+                astronomy_show=show,
+                planetarium_dome=self.dome,
+                show_time=upcoming_time(days=-index),
+            )
+            for index, show in enumerate(shows, start=1)
+        )
+        queryset = ShowSession.objects.filter(
+            show_time__gte=upcoming_time(), planetarium_dome__id__in=[self.dome.id]
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {ShowSession._meta.db_table}")
+            cursor.execute("SET enable_seqscan = off")
+            plan = queryset.explain()
+            cursor.execute("SET enable_seqscan = on")
+
+        # Either index leading with show_time serves the range
+        self.assertRegex(plan, r"session_time_(dome|id)_idx")
+
     def test_get_show_session(self):
         url = detail_url(self.show_session.id)
         response = self.client.get(url)
@@ -97,12 +240,12 @@ class PrivateShowSessionApiTests(TestCase):
         session_with_show_1 = ShowSession.objects.create(
             astronomy_show=sample_show(title="testshow1"),
             planetarium_dome=self.dome,
-            show_time=datetime.now(),
+            show_time=upcoming_time(),
         )
         session_with_show_2 = ShowSession.objects.create(
             astronomy_show=sample_show(title="testshow2"),
             planetarium_dome=self.dome,
-            show_time=datetime.now(),
+            show_time=upcoming_time(),
         )
         set_available_tickets_field(session_with_show_1)
         set_available_tickets_field(session_with_show_2)
@@ -131,12 +274,12 @@ class PrivateShowSessionApiTests(TestCase):
         session_with_dome_1 = ShowSession.objects.create(
             astronomy_show=sample_show(title="testshow3"),
             planetarium_dome=dome,
-            show_time=datetime.now(),
+            show_time=upcoming_time(),
         )
         session_with_dome_2 = ShowSession.objects.create(
             astronomy_show=sample_show(title="testshow4"),
             planetarium_dome=dome,
-            show_time=datetime.now(),
+            show_time=upcoming_time(),
         )
 
         set_available_tickets_field(session_with_dome_1)
@@ -155,6 +298,102 @@ class PrivateShowSessionApiTests(TestCase):
         self.assertIn(serializer_with_dome_1.data, response.data["results"])
         self.assertIn(serializer_with_dome_2.data, response.data["results"])
 
+    def test_get_show_session_taken_tickets_from_seat_map(self):
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=2, seat=3, show_session=self.show_session, reservation=reservation
+        )
+        Ticket.objects.create(
+            row=1, seat=6, show_session=self.show_session, reservation=reservation
+        )
+
+        with self.assertNumQueries(4):
+            response = self.client.get(detail_url(self.show_session.id))
+
+        self.assertEqual(
+            response.data["taken_tickets"],
+            [{"seat": 6, "row": 1}, {"seat": 3, "row": 2}],
+        )
+
+        Ticket.objects.get(row=1, seat=6).delete()
+        response = self.client.get(detail_url(self.show_session.id))
+
+        self.assertEqual(response.data["taken_tickets"], [{"seat": 3, "row": 2}])
+
+    def test_dome_size_fixed_while_it_has_sessions(self):
+        dome = self.show_session.planetarium_dome
+        dome.name = "renamed dome"
+        dome.save()
+
+        for field in ("rows", "seats_in_row"):
+            with self.subTest(field=field):
+                dome.refresh_from_db()
+                setattr(dome, field, getattr(dome, field) + 1)
+
+                with self.assertRaises(ValidationError):
+                    dome.full_clean()
+                with self.assertRaises(ValidationError):
+                    dome.save()
+
+        self.show_session.delete()
+        dome.save()
+        self.assertEqual(
+            PlanetariumDome.objects.get(id=dome.id).seats_in_row, dome.seats_in_row
+        )
+
+    def test_seat_map_follows_moved_ticket(self):
+        other_session = ShowSession.objects.create(
+            astronomy_show=sample_show(title="Moved to"),
+            planetarium_dome=self.show_session.planetarium_dome,
+            show_time=self.show_session.show_time,
+        )
+        ticket = Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=self.show_session,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+
+        ticket.seat = 2
+        ticket.save()
+        self.show_session.refresh_from_db()
+        self.assertEqual(self.show_session.taken_seats, [{"seat": 2, "row": 1}])
+
+        ticket.show_session = other_session
+        ticket.row = 3
+        ticket.save()
+        self.show_session.refresh_from_db()
+        other_session.refresh_from_db()
+        self.assertEqual(self.show_session.taken_seats, [])
+        self.assertEqual(other_session.taken_seats, [{"seat": 2, "row": 3}])
+        call_command("rebuild_seat_maps", "--verify", stdout=StringIO())
+
+    def test_rebuild_seat_maps(self):
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.bulk_create(
+            [
+                Ticket(
+                    row=1,
+                    seat=seat,
+                    show_session=self.show_session,
+                    reservation=reservation,
+                )
+                for seat in (1, 2)
+            ]
+        )
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_seat_maps", "--verify", stdout=StringIO())
+
+        call_command("rebuild_seat_maps", stdout=StringIO())
+        call_command("rebuild_seat_maps", "--verify", stdout=StringIO())
+        self.show_session.refresh_from_db()
+
+        self.assertEqual(
+            self.show_session.taken_seats,
+            [{"seat": 1, "row": 1}, {"seat": 2, "row": 1}],
+        )
+
     def test_post_astronomy_show_forbidden(self):
         payload = {
             "astronomy_show": sample_show(title="forbidden"),
@@ -166,6 +405,81 @@ class PrivateShowSessionApiTests(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_availability_of_many_sessions_in_one_query(self):
+        other_session = ShowSession.objects.create(
+            astronomy_show=sample_show(title="next day"),
+            planetarium_dome=self.dome,
+            show_time=upcoming_time(days=2),
+        )
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=1, seat=1, show_session=self.show_session, reservation=reservation
+        )
+        SeatHold.objects.create(
+            row=1,
+            seat=2,
+            show_session=self.show_session,
+            user=self.user,
+            expires_at=upcoming_time(minutes=5),
+        )
+        SeatHold.objects.create(
+            row=1,
+            seat=3,
+            show_session=self.show_session,
+            user=self.user,
+            expires_at=upcoming_time(minutes=-5),
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                AVAILABILITY_URL,
+                {"ids": f"{other_session.id},{self.show_session.id},0"},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [
+                (session["id"], session["available_tickets"], session["held_tickets"])
+                for session in response.data
+            ],
+            [(self.show_session.id, 29, 1), (other_session.id, 30, 0)],
+        )
+
+    def test_availability_by_date_window(self):
+        ShowSession.objects.create(
+            astronomy_show=sample_show(title="next week"),
+            planetarium_dome=self.dome,
+            show_time=upcoming_time(days=5),
+        )
+
+        response = self.client.get(
+            AVAILABILITY_URL, {"to": upcoming_time(days=2).date().isoformat()}
+        )
+
+        self.assertEqual(
+            [session["id"] for session in response.data], [self.show_session.id]
+        )
+
+    def test_availability_limits(self):
+        limit = ShowSessionViewSet.availability_limit
+        ids = ",".join(str(index) for index in range(1, limit + 2))
+        for params in ({}, {"ids": ids}, {"ids": "1,a"}):
+            with self.subTest(params):
+                response = self.client.get(AVAILABILITY_URL, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with mock.patch.object(ShowSessionViewSet, "availability_limit", 1):
+            ShowSession.objects.create(
+                astronomy_show=sample_show(title="over the limit"),
+                planetarium_dome=self.dome,
+                show_time=upcoming_time(days=2),
+            )
+            response = self.client.get(
+                AVAILABILITY_URL, {"from": upcoming_time(days=-1).isoformat()}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class AdminShowThemeApiTests(TestCase):
     def setUp(self):
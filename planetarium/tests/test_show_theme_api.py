@@ -62,6 +62,13 @@ class PrivateShowThemeApiTests(TestCase):
         self.assertNotIn(serializer_1.data, response.data["results"])
         self.assertIn(serializer_with_expected_theme.data, response.data["results"])
 
+    def test_show_theme_detail_not_routed(self):
+        theme = sample_theme()
+
+        response = self.client.get(f"{SHOW_THEME_URL}{theme.id}/")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_post_show_theme_forbidden(self):
         payload = {"name": "testpost"}
 
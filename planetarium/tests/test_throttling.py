@@ -0,0 +1,105 @@
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.tests.test_show_session_api import sample_session
+from planetarium.throttling import (
+    THROTTLE_CACHE_ALIAS,
+    UserSlidingWindowThrottle,
+    check_throttle_cache,
+)
+
+RATES = {"user": "3/min", "catalog": "1000/day", "booking": "1/min"}
+
+
+@mock.patch.object(UserSlidingWindowThrottle, "THROTTLE_RATES", RATES)
+class SlidingWindowThrottleTests(TestCase):
+    def setUp(self):
+        caches[THROTTLE_CACHE_ALIAS].clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.request = SimpleNamespace(user=self.user, META={})
+        self.view = SimpleNamespace(action="list", throttle_scopes={})
+
+    def allow(
+        self, now: float = None, view=None
+    ) -> tuple[bool, UserSlidingWindowThrottle]:
+        throttle = UserSlidingWindowThrottle()
+        if now is not None:
+            throttle.timer = lambda: now
+        return throttle.allow_request(self.request, view or self.view), throttle
+
+    def test_limit_in_window(self):
+        results = [self.allow(now=120)[0] for _ in range(4)]
+        allowed, throttle = self.allow(now=150)
+
+        self.assertEqual(results, [True, True, True, False])
+        self.assertFalse(allowed)
+        self.assertEqual(throttle.wait(), 30)
+
+    def test_previous_window_slides_out(self):
+        for _ in range(3):
+            self.allow(now=120)
+
+        # Half of the previous window still counts: 1.5 + 1, then 1.5 + 2
+        self.assertTrue(self.allow(now=210)[0])
+        self.assertFalse(self.allow(now=210)[0])
+        self.assertTrue(self.allow(now=235)[0])
+
+    def test_action_scopes_have_own_limit(self):
+        booking_view = SimpleNamespace(
+            action="create", throttle_scopes={"create": "booking"}
+        )
+
+        self.assertTrue(self.allow(now=120, view=booking_view)[0])
+        self.assertFalse(self.allow(now=120, view=booking_view)[0])
+        self.assertTrue(self.allow(now=120)[0])
+
+    def test_overhead_per_request(self):
+        view = SimpleNamespace(action="list", throttle_scopes={"list": "catalog"})
+        start = time.perf_counter()
+        for _ in range(500):
+            self.allow(view=view)
+
+        self.assertLess((time.perf_counter() - start) / 500, 0.001)
+
+    def test_reservation_create_throttled(self):
+        session = sample_session()
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = reverse("planetarium:reservation-list")
+
+        def reserve(seat):
+            payload = {
+                "tickets": [{"row": 1, "seat": seat, "show_session": session.id}]
+            }
+            return client.post(url, payload, format="json")
+
+        self.assertEqual(reserve(1).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(reserve(2).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_per_process_cache_warned_outside_debug(self):
+        locmem = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        redis = {"BACKEND": "django.core.cache.backends.redis.RedisCache"}
+
+        for debug, backend, expected in (
+            (False, locmem, ["planetarium.W001"]),
+            (True, locmem, []),
+            (False, redis, []),
+        ):
+            caches_setting = {"default": locmem, THROTTLE_CACHE_ALIAS: backend}
+            with self.subTest(debug=debug, backend=backend["BACKEND"]):
+                with override_settings(DEBUG=debug, CACHES=caches_setting):
+                    errors = check_throttle_cache(None)
+                self.assertEqual([error.id for error in errors], expected)
@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+THROTTLE_CACHE_ALIAS = "throttle"
+
+# Backends keeping a separate store in every worker process
+PER_PROCESS_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@checks.register(checks.Tags.caches)
+def check_throttle_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get(THROTTLE_CACHE_ALIAS, {}).get("BACKEND")
+    if settings.DEBUG or backend not in PER_PROCESS_CACHE_BACKENDS:
+        return []
+    return [
+        checks.Warning(
+            f"The {THROTTLE_CACHE_ALIAS!r} cache uses {backend}, so every worker "
+            "process counts requests on its own and the limits are not global.",
+            hint="Set CACHE_BACKEND and CACHE_LOCATION to a shared cache "
+            "such as Redis or Memcached.",
+            id="planetarium.W001",
+        )
+    ]
+
+
+class SlidingWindowThrottleMixin:
+    """Sliding window counter kept in the shared throttle cache
+
+    Instead of a list of request timestamps every client has two integers
+    per scope, the request counts of the current and the previous fixed
+    window. The previous count is weighted by how much of the previous
+    window still overlaps the sliding one. Counters are only incremented,
+    which is atomic on shared backends such as Redis or Memcached.
+    """
+
+    @property
+    def cache(self):
+        return caches[THROTTLE_CACHE_ALIAS]
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        window, self.elapsed = divmod(self.timer(), self.duration)
+        current_key = f"{self.key}:{int(window)}"
+        cache = self.cache
+        try:
+            self.count = cache.incr(current_key)
+        except ValueError:
+            cache.add(current_key, 0, timeout=self.duration * 2)
+            self.count = cache.incr(current_key)
+        self.previous = cache.get(f"{self.key}:{int(window) - 1}", 0)
+
+        if self.weighted_count() > self.num_requests:
+            # Rejected requests do not use up the limit
+            cache.decr(current_key)
+            self.count -= 1
+            return self.throttle_failure()
+        return True
+
+    def weighted_count(self) -> float:
+        return self.previous * (1 - self.elapsed / self.duration) + self.count
+
+    def wait(self):
+        remaining = self.duration - self.elapsed
+        if self.count >= self.num_requests or not self.previous:
+            return remaining
+
+        # Until enough of the previous window has slid out for one more request
+        free_at = self.duration * (
+            1 - (self.num_requests - self.count - 1) / self.previous
+        )
+        return min(max(free_at - self.elapsed, 0), remaining)
+
+
+class AnonSlidingWindowThrottle(SlidingWindowThrottleMixin, AnonRateThrottle):
+    pass
+
+
+class UserSlidingWindowThrottle(SlidingWindowThrottleMixin, UserRateThrottle):
+    """Per-user limit, views map actions to their own rate with throttle_scopes"""
+
+    def allow_request(self, request, view):
+        scope = getattr(view, "throttle_scopes", {}).get(getattr(view, "action", None))
+        if scope:
+            self.scope = scope
+            self.rate = self.get_rate()
+            self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        return super().allow_request(request, view)
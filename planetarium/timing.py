@@ -0,0 +1,220 @@
+import logging
+from contextlib import contextmanager
+from functools import cache
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+MIDDLEWARE_PATH = "planetarium.timing.ServerTimingMiddleware"
+
+logger = logging.getLogger(__name__)
+
+current_timings = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    __slots__ = (
+        "start",
+        "label",
+        "view_start",
+        "view",
+        "queries",
+        "db",
+        "serializer",
+    )
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.label = None
+        self.view_start = None
+        self.view = None
+        self.queries = 0
+        self.db = 0.0
+        self.serializer = 0.0
+
+    def start_view(self, label: str) -> None:
+        self.label = label
+        self.view_start = perf_counter()
+
+    def stop_view(self) -> None:
+        if self.view_start is not None and self.view is None:
+            self.view = perf_counter() - self.view_start
+
+    def metrics(self) -> dict:
+        self.stop_view()
+        return {
+            "db_queries": self.queries,
+            "db_ms": round(self.db * 1000, 3),
+            "serializer_ms": round(self.serializer * 1000, 3),
+            "view_ms": round((self.view or 0) * 1000, 3),
+            "total_ms": round((perf_counter() - self.start) * 1000, 3),
+        }
+
+
+def view_label(view_func, method: str) -> str:
+    """ShowSessionViewSet.list for viewsets, the class or function name otherwise"""
+    view_class = getattr(view_func, "cls", None) or getattr(
+        view_func, "view_class", None
+    )
+    if view_class is None:
+        return getattr(view_func, "__qualname__", type(view_func).__name__)
+
+    method = method.lower()
+    actions = getattr(view_func, "actions", None) or {}
+    return f"{view_class.__name__}.{actions.get(method, method)}"
+
+
+def server_timing_header(metrics: dict) -> str:
+    return ", ".join(
+        [
+            f'db;dur={metrics["db_ms"]};desc="{metrics["db_queries"]} queries"',
+            f'serializer;dur={metrics["serializer_ms"]}',
+            f'view;dur={metrics["view_ms"]}',
+            f'total;dur={metrics["total_ms"]}',
+        ]
+    )
+
+
+def record_query(execute, sql, params, many, context):
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += perf_counter() - start
+        timings.queries += 1
+
+
+def instrument_connection(sender, connection, **kwargs) -> None:
+    # First, so connection.execute_wrapper() blocks still pop their own one
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+@contextmanager
+def time_serializer():
+    """Count the block as serializer time of the current request"""
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.serializer += perf_counter() - start
+
+
+@cache
+def timed_serializer_class(serializer_class):
+    """Subclass of serializer_class whose data is counted as serializer time"""
+
+    def data(serializer):
+        with time_serializer():
+            return super(timed_class, serializer).data
+
+    timed_class = type(
+        serializer_class.__name__,
+        (serializer_class,),
+        {"__module__": serializer_class.__module__, "data": property(data)},
+    )
+    return timed_class
+
+
+def install_instrumentation() -> None:
+    """Hook query timing, only when the middleware is enabled"""
+    if MIDDLEWARE_PATH not in settings.MIDDLEWARE:
+        return
+
+    connection_created.connect(
+        instrument_connection, dispatch_uid="planetarium.timing.queries"
+    )
+
+
+class ServerTimingMiddleware:
+    """Per request DB, serializer, view and total time
+
+    Logged with the view action, e.g. ShowSessionViewSet.list, and sent as
+    a Server-Timing header under DEBUG or to staff users. Works for sync and
+    async views alike. Serializer time is counted by views with
+    planetarium.mixins.SerializerTimingMixin.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # The handler would run sync hooks in a thread
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = current_timings.get()
+        if timings is not None:
+            timings.start_view(view_label(view_func, request.method))
+
+    def process_template_response(self, request, response):
+        # Called between the view and rendering of DRF responses
+        timings = current_timings.get()
+        if timings is not None:
+            timings.stop_view()
+        return response
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        return self.process_view(request, view_func, view_args, view_kwargs)
+
+    async def aprocess_template_response(self, request, response):
+        return self.process_template_response(request, response)
+
+    @staticmethod
+    def finish(request, response, timings: RequestTimings):
+        metrics = timings.metrics()
+        # DRF sets the authenticated user on the Django request too
+        user = getattr(request, "user", None)
+        if settings.DEBUG or getattr(user, "is_staff", False):
+            response["Server-Timing"] = server_timing_header(metrics)
+
+        if not logger.isEnabledFor(logging.INFO):
+            return response
+
+        label = timings.label or request.path_info
+        logger.info(
+            "%s %s %s",
+            label,
+            response.status_code,
+            " ".join(f"{key}={value}" for key, value in metrics.items()),
+            extra={"view": label, "status": response.status_code, **metrics},
+        )
+        return response
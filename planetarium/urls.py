@@ -2,9 +2,15 @@ from django.urls import path, include
 from rest_framework import routers
 
 from planetarium.views import (
+    AsyncAstronomyShowViewSet,
+    AsyncPlanetariumDomeViewSet,
+    AsyncShowSessionViewSet,
     AstronomyShowViewSet,
+    CatalogCacheView,
+    DatabasePoolView,
     PlanetariumDomeViewSet,
     ReservationViewSet,
+    SeatHoldViewSet,
     ShowSessionViewSet,
     ShowThemeViewSet,
 )
@@ -17,7 +23,25 @@ router.register("planetarium-domes", PlanetariumDomeViewSet)
 router.register("astronomy-shows", AstronomyShowViewSet)
 router.register("show-themes", ShowThemeViewSet)
 router.register("reservations", ReservationViewSet)
+router.register("seat-holds", SeatHoldViewSet)
+
+# Async read-only twins of the hot read endpoints, for ASGI deployments
+router.register(
+    "async/show-sessions", AsyncShowSessionViewSet, basename="async-showsession"
+)
+router.register(
+    "async/planetarium-domes",
+    AsyncPlanetariumDomeViewSet,
+    basename="async-planetariumdome",
+)
+router.register(
+    "async/astronomy-shows", AsyncAstronomyShowViewSet, basename="async-astronomyshow"
+)
 
 app_name = "planetarium"
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("", include(router.urls)),
+    path("db-pool/", DatabasePoolView.as_view(), name="db-pool"),
+    path("catalog-cache/", CatalogCacheView.as_view(), name="catalog-cache"),
+]
@@ -1,28 +1,63 @@
-from django.db.models import Count, F
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, F, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import http_date
 
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
-from rest_framework import viewsets, mixins
-from rest_framework.permissions import IsAuthenticated
-
-from planetarium.mixins import QueryParamsTransform
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from planetarium.cache import get_catalog_cache_stats, get_catalog_version
+from planetarium.exports import EXPORT_FORMATS, get_export_rows, stream_export
+from planetarium.mixins import (
+    AsyncCachedCatalogMixin,
+    AsyncReadOnlyMixin,
+    CachedCatalogListMixin,
+    CachedCatalogMixin,
+    FastListMixin,
+    QueryParamsTransform,
+    SerializerTimingMixin,
+    make_etag,
+    not_modified,
+)
 from planetarium.models import (
+    ArchivedTicket,
     AstronomyShow,
     PlanetariumDome,
     Reservation,
+    SeatHold,
     ShowSession,
-    ShowTheme
+    ShowTheme,
+    Ticket,
 )
+from planetarium.pagination import (
+    AsyncLimitOffsetPagination,
+    ReservationPagination,
+    ShowSessionPagination,
+)
+from planetarium.pool import pool_stats
+from planetarium.search import search_astronomy_shows
 from planetarium.serializers import (
     AstronomyShowSerializer,
     AstronomyShowListSerializer,
     AstronomyShowRetrieveSerializer,
     PlanetariumDomeSerializer,
     PlanetariumDomeListSerializer,
+    ReservationBatchSerializer,
     ReservationSerializer,
     ReservationListSerializer,
     ReservationRetrieveSerializer,
+    SeatHoldSerializer,
+    ShowSessionAvailabilitySerializer,
     ShowSessionSerializer,
     ShowSessionListSerializer,
     ShowSessionRetrieveSerializer,
@@ -30,8 +65,32 @@ from planetarium.serializers import (
 )
 
 
+SESSION_VERSION_FIELDS = (
+    "id",
+    "updated_at",
+    "astronomy_show__updated_at",
+    "planetarium_dome__updated_at",
+)
+
+AVAILABILITY_PARAMETERS = [
+    OpenApiParameter(
+        "ids",
+        type={"type": "list", "items": {"type": "number"}},
+        description=(
+            "Show sessions id, at most 100 (ex. ?ids=1,2), "
+            "or a date, from or to window like the list"
+        ),
+    ),
+    OpenApiParameter("date", type=OpenApiTypes.DATE),
+    OpenApiParameter("from", type=OpenApiTypes.DATETIME),
+    OpenApiParameter("to", type=OpenApiTypes.DATETIME),
+]
+
+
 class ShowSessionViewSet(
+    SerializerTimingMixin,
     QueryParamsTransform,
+    FastListMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.CreateModelMixin,
@@ -39,6 +98,9 @@ class ShowSessionViewSet(
 ):
     queryset = ShowSession.objects.all()
     serializer_class = ShowSessionSerializer
+    pagination_class = ShowSessionPagination
+    # Show sessions per availability request
+    availability_limit = 100
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -54,22 +116,63 @@ class ShowSessionViewSet(
             queryset = queryset.filter(planetarium_dome__id__in=planetarium_domes_id)
 
         if self.action == "list":
+            queryset = self.filter_by_show_time(queryset)
             queryset = (
                 queryset
-                .prefetch_related("tickets")
+                .select_related("astronomy_show", "planetarium_dome")
                 .annotate(available_tickets=(
                         F("planetarium_dome__rows")
                         * F("planetarium_dome__seats_in_row")
-                        - Count("tickets")
+                        - F("tickets_sold")
                 ))
             )
-        return queryset.distinct()
+
+        if self.action == "retrieve":
+            queryset = queryset.select_related(
+                "astronomy_show", "planetarium_dome"
+            ).prefetch_related("astronomy_show__themes")
+
+        return queryset
+
+    def filter_by_show_time(self, queryset):
+        query_params = self.request.query_params
+        show_date = query_params.get("date")
+        show_time_from = query_params.get("from")
+        show_time_to = query_params.get("to")
+
+        if show_date:
+            queryset = queryset.filter(
+                show_time__gte=self.query_param_to_datetime(show_date, "date"),
+                show_time__lt=self.query_param_to_datetime(
+                    show_date, "date", end_of_day=True
+                ),
+            )
+
+        if show_time_from:
+            queryset = queryset.filter(
+                show_time__gte=self.query_param_to_datetime(show_time_from, "from")
+            )
+
+        if show_time_to:
+            queryset = queryset.filter(
+                show_time__lt=self.query_param_to_datetime(
+                    show_time_to, "to", end_of_day=True
+                )
+            )
+
+        upcoming = query_params.get("upcoming", "true").lower() != "false"
+        if upcoming and not (show_date or show_time_from or show_time_to):
+            queryset = queryset.filter(show_time__gte=timezone.now())
+
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
             return ShowSessionListSerializer
         if self.action == "retrieve":
             return ShowSessionRetrieveSerializer
+        if self.action == "availability":
+            return ShowSessionAvailabilitySerializer
         return self.serializer_class
 
     @extend_schema(
@@ -83,14 +186,130 @@ class ShowSessionViewSet(
                 "dome",
                 type={"type": "list", "items": {"type": "number"}},
                 description="Filter show sessions by planetarium domes id (ex. ?dome=1,2)",
-            )
+            ),
+            OpenApiParameter(
+                "date",
+                type=OpenApiTypes.DATE,
+                description="Filter show sessions by day (ex. ?date=2024-10-20)",
+            ),
+            OpenApiParameter(
+                "from",
+                type=OpenApiTypes.DATETIME,
+                description=(
+                    "Show sessions starting at or after date/datetime "
+                    "(ex. ?from=2024-10-20T18:00)"
+                ),
+            ),
+            OpenApiParameter(
+                "to",
+                type=OpenApiTypes.DATETIME,
+                description=(
+                    "Show sessions starting before datetime or up to the end "
+                    "of the date (ex. ?to=2024-10-27)"
+                ),
+            ),
+            OpenApiParameter(
+                "upcoming",
+                type=OpenApiTypes.BOOL,
+                description=(
+                    "Without date filters only upcoming show sessions are listed, "
+                    "pass ?upcoming=false to include past ones"
+                ),
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    def get_availability_queryset(self):
+        query_params = self.request.query_params
+        limit = self.availability_limit
+        queryset = self.get_queryset()
+
+        if session_ids := query_params.get("ids"):
+            try:
+                session_ids = self.query_params_to_int(session_ids)
+            except ValueError:
+                raise ValidationError({"ids": "Use comma separated show session ids."})
+            if len(session_ids) > limit:
+                raise ValidationError({"ids": f"At most {limit} show sessions."})
+            queryset = queryset.filter(id__in=session_ids)
+        elif any(query_params.get(name) for name in ("date", "from", "to")):
+            queryset = self.filter_by_show_time(queryset)
+        else:
+            raise ValidationError({"ids": "Pass show session ids or a date window."})
+
+        held_tickets = (
+            SeatHold.objects.filter(
+                show_session=OuterRef("pk"), expires_at__gt=timezone.now()
+            )
+            .values("show_session")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        return queryset.values("id", "show_time").annotate(
+            available_tickets=(
+                F("planetarium_dome__rows") * F("planetarium_dome__seats_in_row")
+                - F("tickets_sold")
+            ),
+            held_tickets=Coalesce(Subquery(held_tickets), 0),
+        )[: limit + 1]
+
+    def availability_response(self, sessions):
+        limit = self.availability_limit
+        if len(sessions) > limit:
+            raise ValidationError(
+                {"detail": f"More than {limit} show sessions, narrow the window."}
+            )
 
-class PlanetariumDomeViewSet(viewsets.ReadOnlyModelViewSet):
+        return Response(self.get_serializer(sessions, many=True).data)
+
+    @extend_schema(parameters=AVAILABILITY_PARAMETERS)
+    @action(detail=False)
+    def availability(self, request):
+        """Remaining and held seats of many show sessions in one query"""
+        return self.availability_response(list(self.get_availability_queryset()))
+
+    def get_version_queryset(self):
+        return (
+            self.get_queryset()
+            .prefetch_related(None)
+            .values_list(*SESSION_VERSION_FIELDS, named=True)
+        )
+
+    def get_detail_etag(self, version, held_seats) -> str:
+        return make_etag(
+            get_catalog_version(),
+            tuple(version),
+            sorted(held_seats),
+            self.request.accepted_renderer.format,
+        )
+
+    @staticmethod
+    def set_validators(response, etag, version):
+        if response.status_code == 200:
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(max(version[1:]).timestamp())
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        # Seat map writes bump updated_at, so the versions, active holds and
+        # the catalog version decide the ETag without loading the session
+        version = get_object_or_404(self.get_version_queryset(), pk=kwargs["pk"])
+        held_seats = SeatHold.active_seats([version.id])
+        etag = self.get_detail_etag(version, held_seats)
+        if response := not_modified(request, etag):
+            return response
+
+        context = self.get_serializer_context()
+        context["held_seats"] = held_seats
+        serializer = self.get_serializer(self.get_object(), context=context)
+        return self.set_validators(Response(serializer.data), etag, version)
+
+
+class PlanetariumDomeViewSet(
+    SerializerTimingMixin, CachedCatalogMixin, viewsets.ReadOnlyModelViewSet
+):
     queryset = PlanetariumDome.objects.all()
     serializer_class = PlanetariumDomeSerializer
 
@@ -122,8 +341,17 @@ class PlanetariumDomeViewSet(viewsets.ReadOnlyModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class AstronomyShowViewSet(QueryParamsTransform, viewsets.ModelViewSet):
-    queryset = AstronomyShow.objects.prefetch_related("themes")
+class AstronomyShowViewSet(
+    SerializerTimingMixin,
+    CachedCatalogMixin,
+    QueryParamsTransform,
+    FastListMixin,
+    viewsets.ModelViewSet
+):
+    # Related rows in primary key order, like the fast list path
+    queryset = AstronomyShow.objects.prefetch_related(
+        Prefetch("themes", queryset=ShowTheme.objects.order_by("id"))
+    )
     serializer_class = AstronomyShowSerializer
 
     def get_serializer_class(self):
@@ -137,6 +365,7 @@ class AstronomyShowViewSet(QueryParamsTransform, viewsets.ModelViewSet):
         queryset = super().get_queryset()
         themes_id = self.request.query_params.get("themes")
         show_title = self.request.query_params.get("title")
+        search_text = self.request.query_params.get("search")
 
         if themes_id:
             themes_id = self.query_params_to_int(themes_id)
@@ -145,6 +374,9 @@ class AstronomyShowViewSet(QueryParamsTransform, viewsets.ModelViewSet):
         if show_title:
             queryset = queryset.filter(title__icontains=show_title)
 
+        if search_text:
+            queryset = search_astronomy_shows(queryset, search_text)
+
         return queryset.distinct()
 
     @extend_schema(
@@ -158,7 +390,15 @@ class AstronomyShowViewSet(QueryParamsTransform, viewsets.ModelViewSet):
                 "title",
                 type={"type": "list", "items": {"type": "number"}},
                 description="Filter astronomy shows by themes id (ex. ?themes=1,2)",
-            )
+            ),
+            OpenApiParameter(
+                "search",
+                type=OpenApiTypes.STR,
+                description=(
+                    "Full-text search in astronomy show title and description, "
+                    "best matches first (ex. ?search=black holes)"
+                ),
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
@@ -166,6 +406,8 @@ class AstronomyShowViewSet(QueryParamsTransform, viewsets.ModelViewSet):
 
 
 class ShowThemeViewSet(
+    SerializerTimingMixin,
+    CachedCatalogListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     viewsets.GenericViewSet
@@ -196,16 +438,28 @@ class ShowThemeViewSet(
 
 
 class ReservationViewSet(
+    SerializerTimingMixin,
+    QueryParamsTransform,
+    FastListMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.CreateModelMixin,
     viewsets.GenericViewSet
 ):
     queryset = Reservation.objects.prefetch_related(
-        "tickets__show_session__astronomy_show"
+        Prefetch("tickets", queryset=Ticket.objects.order_by("id")),
+        "tickets__show_session__astronomy_show",
+        Prefetch(
+            "archived_tickets",
+            queryset=ArchivedTicket.objects.select_related(
+                "show_session__astronomy_show", "show_session__planetarium_dome"
+            ).order_by("id"),
+        ),
     )
     serializer_class = ReservationSerializer
+    pagination_class = ReservationPagination
     permission_classes = [IsAuthenticated]
+    throttle_scopes = {"create": "booking", "batch": "booking"}
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -221,9 +475,179 @@ class ReservationViewSet(
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @action(
+        detail=False,
+        methods=["post"],
+        serializer_class=ReservationBatchSerializer,
+    )
+    def batch(self, request):
+        """Create many reservations in one request, with an outcome per item"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save(user=request.user)
+
+        outcomes = {result["status"] for result in results}
+        if outcomes == {status.HTTP_201_CREATED}:
+            response_status = status.HTTP_201_CREATED
+        elif status.HTTP_201_CREATED in outcomes:
+            response_status = status.HTTP_207_MULTI_STATUS
+        elif status.HTTP_400_BAD_REQUEST in outcomes:
+            response_status = status.HTTP_400_BAD_REQUEST
+        else:
+            response_status = status.HTTP_409_CONFLICT
+        return Response({"results": results}, status=response_status)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "file_format",
+                type=OpenApiTypes.STR,
+                enum=list(EXPORT_FORMATS),
+                description="Export file format, csv by default (ex. ?file_format=ndjson)",
+            ),
+            OpenApiParameter(
+                "from",
+                type=OpenApiTypes.DATETIME,
+                description="Reservations created at or after date/datetime",
+            ),
+            OpenApiParameter(
+                "to",
+                type=OpenApiTypes.DATETIME,
+                description="Reservations created before datetime or up to the end of the date",
+            ),
+            OpenApiParameter(
+                "session",
+                type={"type": "list", "items": {"type": "number"}},
+                description="Only tickets of these show sessions (ex. ?session=1,2)",
+            ),
+        ],
+        responses={(200, "text/csv"): OpenApiTypes.STR},
+    )
+    @action(detail=False, permission_classes=[IsAdminUser])
+    def export(self, request):
+        """Stream every reservation ticket as CSV or NDJSON (staff only)"""
+        query_params = request.query_params
+        export_format = query_params.get("file_format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError(
+                {"file_format": f"Use one of: {', '.join(EXPORT_FORMATS)}."}
+            )
+
+        created_from = query_params.get("from")
+        created_to = query_params.get("to")
+        if show_session_ids := query_params.get("session"):
+            try:
+                show_session_ids = self.query_params_to_int(show_session_ids)
+            except ValueError:
+                raise ValidationError(
+                    {"session": "Use comma separated show session ids."}
+                )
+        rows = get_export_rows(
+            created_from=created_from
+            and self.query_param_to_datetime(created_from, "from"),
+            created_to=created_to
+            and self.query_param_to_datetime(created_to, "to", end_of_day=True),
+            show_session_ids=show_session_ids,
+        )
+
+        response = StreamingHttpResponse(
+            stream_export(export_format, rows),
+            content_type=EXPORT_FORMATS[export_format],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="reservations.{export_format}"'
+        )
+        return response
+
     def get_serializer_class(self):
         if self.action == "list":
             return ReservationListSerializer
         if self.action == "retrieve":
             return ReservationRetrieveSerializer
         return self.serializer_class
+
+
+class SeatHoldViewSet(
+    SerializerTimingMixin,
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet
+):
+    queryset = SeatHold.objects.all()
+    serializer_class = SeatHoldSerializer
+    permission_classes = [IsAuthenticated]
+    throttle_scopes = {"create": "booking"}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return queryset.filter(user=self.request.user, expires_at__gt=timezone.now())
+
+    def get_serializer(self, *args, **kwargs):
+        if isinstance(kwargs.get("data"), list):
+            kwargs["many"] = True
+        return super().get_serializer(*args, **kwargs)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class AsyncShowSessionViewSet(AsyncReadOnlyMixin, ShowSessionViewSet):
+    @extend_schema(parameters=AVAILABILITY_PARAMETERS)
+    @action(detail=False)
+    async def availability(self, request):
+        """Remaining and held seats of many show sessions in one query"""
+        sessions = [session async for session in self.get_availability_queryset()]
+        return self.availability_response(sessions)
+
+    async def retrieve(self, request, *args, **kwargs):
+        try:
+            version = await self.get_version_queryset().aget(pk=kwargs["pk"])
+        except (ShowSession.DoesNotExist, TypeError, ValueError, DjangoValidationError):
+            raise Http404("No ShowSession matches the given query.")
+        held_seats = await SeatHold.aactive_seats([version.id])
+        etag = self.get_detail_etag(version, held_seats)
+        if response := not_modified(request, etag):
+            return response
+
+        context = self.get_serializer_context()
+        context["held_seats"] = held_seats
+        serializer = self.get_serializer(await self.aget_object(), context=context)
+        return self.set_validators(Response(serializer.data), etag, version)
+
+
+class AsyncPlanetariumDomeViewSet(
+    AsyncCachedCatalogMixin,
+    AsyncReadOnlyMixin,
+    PlanetariumDomeViewSet
+):
+    pagination_class = AsyncLimitOffsetPagination
+
+
+class AsyncAstronomyShowViewSet(
+    AsyncCachedCatalogMixin,
+    AsyncReadOnlyMixin,
+    AstronomyShowViewSet
+):
+    pagination_class = AsyncLimitOffsetPagination
+
+
+class DatabasePoolView(APIView):
+    """Connection pool usage of the process serving the request (staff only)"""
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    def get(self, request):
+        stats = pool_stats()
+        return Response({"pooled": stats is not None, "stats": stats})
+
+
+class CatalogCacheView(APIView):
+    """Catalog cache hits and misses since the cache was last cleared (staff only)"""
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    def get(self, request):
+        return Response(get_catalog_cache_stats())
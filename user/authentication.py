@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from planetarium.throttling import PER_PROCESS_CACHE_BACKENDS
+
+
+def user_cache_key(user_id) -> str:
+    return f"jwt-user:{user_id}"
+
+
+# What authentication and permission checks read, never the password hash
+CACHED_USER_FIELDS = ("id", "email", "is_active", "is_staff", "is_superuser")
+
+
+def invalidate_cached_user(user_id) -> None:
+    cache.delete(user_cache_key(user_id))
+
+
+def cached_user_data(user) -> dict:
+    data = {name: getattr(user, name) for name in CACHED_USER_FIELDS}
+    if api_settings.CHECK_REVOKE_TOKEN:
+        # The digest the token claim is compared with
+        data["password_hash_md5"] = get_md5_hash_password(user.password)
+    return data
+
+
+@checks.register(checks.Tags.caches)
+def check_user_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get(DEFAULT_CACHE_ALIAS, {}).get("BACKEND")
+    if settings.DEBUG or backend not in PER_PROCESS_CACHE_BACKENDS:
+        return []
+    return [
+        checks.Warning(
+            f"The {DEFAULT_CACHE_ALIAS!r} cache uses {backend}, so a user "
+            "deactivated or demoted on one worker process keeps the old flags "
+            "on the others for up to JWT_USER_CACHE_TIMEOUT seconds.",
+            hint="Set CACHE_BACKEND and CACHE_LOCATION to a shared cache "
+            "such as Redis or Memcached.",
+            id="user.W001",
+        )
+    ]
+
+
+def user_from_cache(data: dict):
+    """A user with only the cached fields loaded, the others are deferred
+
+    save() then writes the loaded fields only, as for .only() querysets.
+    """
+    User = get_user_model()
+    # from_db() takes the values in model field order
+    field_names = [
+        field.attname
+        for field in User._meta.concrete_fields
+        if field.attname in CACHED_USER_FIELDS
+    ]
+    return User.from_db(
+        router.db_for_read(User), field_names, [data[name] for name in field_names]
+    )
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that keeps token users in the default cache
+
+    Saving or deleting a user drops its entry (see user.signals), queryset
+    updates bypass signals and are picked up after JWT_USER_CACHE_TIMEOUT.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = user_cache_key(user_id)
+        data = cache.get(key)
+        if data is None:
+            user = super().get_user(validated_token)
+            cache.set(
+                key, cached_user_data(user), timeout=settings.JWT_USER_CACHE_TIMEOUT
+            )
+            return user
+
+        # Same checks as JWTAuthentication.get_user(), on the cached fields
+        if not data["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != data.get(
+                "password_hash_md5"
+            ):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user_from_cache(data)
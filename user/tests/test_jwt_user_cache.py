@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user.authentication import check_user_cache, user_cache_key
+
+ME_URL = reverse("user:manage")
+SHOW_THEME_URL = reverse("planetarium:showtheme-list")
+
+
+class JWTUserCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="testpass",
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def test_user_served_from_cache(self):
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data["email"], self.user.email)
+
+    def test_manage_user_update_invalidates_cache(self):
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {"email": "new@test.com"})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data["email"], "new@test.com")
+
+    def test_staff_change_invalidates_cache(self):
+        payload = {"name": "Stars"}
+        res = self.client.post(SHOW_THEME_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.post(SHOW_THEME_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_deactivated_user_rejected(self):
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_hash_not_cached(self):
+        self.client.get(ME_URL)
+
+        data = cache.get(user_cache_key(self.user.id))
+        self.assertEqual(data["email"], self.user.email)
+        self.assertNotIn("password", data)
+        self.assertNotIn(self.user.password, data.values())
+
+    def test_cached_user_update_keeps_other_fields(self):
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {"email": "new@test.com"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "new@test.com")
+        self.assertTrue(self.user.check_password("testpass"))
+
+        self.client.get(ME_URL)
+        self.client.patch(ME_URL, {"password": "newpass"})
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("newpass"))
+
+    def test_schema_has_jwt_security_scheme(self):
+        schema = SchemaGenerator().get_schema(public=True)
+
+        self.assertIn("jwtAuth", schema["components"]["securitySchemes"])
+
+    def test_per_process_cache_warned_outside_debug(self):
+        locmem = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        redis = {"BACKEND": "django.core.cache.backends.redis.RedisCache"}
+
+        for debug, backend, expected in (
+            (False, locmem, ["user.W001"]),
+            (True, locmem, []),
+            (False, redis, []),
+        ):
+            with self.subTest(debug=debug, backend=backend["BACKEND"]):
+                with override_settings(DEBUG=debug, CACHES={"default": backend}):
+                    errors = check_user_cache(None)
+                self.assertEqual([error.id for error in errors], expected)